@@ -59,6 +59,7 @@ def create_client_from_config(config: dict):
             "total_commission": 0.0
         },
         "trades": [],
+        "monthly_trade_summary": {},
         "silent_mode": False,
         "silent_mode_days_left": 0,
         "silent_reason": "",
@@ -2,11 +2,15 @@
 
 import os
 import json
+import threading
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Optional
 
+from audit.audit_writer import get_audit_writer, append_line_sync
 from core.request_context import RequestContext
 
+ACTION_LOG_VERBOSE = os.getenv("ACTION_LOG_VERBOSE", "0") == "1"
+
 
 class ActionLogger:
     """
@@ -25,7 +29,10 @@ class ActionLogger:
     ---------------
     - Each event is logged in structured JSONL format (1 JSON per line)
     - Logs are stored by role → user → date, enabling traceability and filtering
-    - Supports real-time debug printing and structured audit trail storage
+    - Structured audit trail storage; real-time debug printing is opt-in (ACTION_LOG_VERBOSE=1)
+    - Lines are queued to the shared background audit writer (audit/audit_writer.py),
+      so UI renders and scheduler loops never wait on disk
+    - Use `get_action_logger()` to reuse one instance per (role, user, module, date)
 
     Example log path:
     -----------------
@@ -44,6 +51,7 @@ class ActionLogger:
 
         # Get current date (used for folder-level log partitioning)
         today = datetime.now().strftime("%Y-%m-%d")
+        self.date_str = today
 
         # Construct log directory path
         log_dir = os.path.join("audit", "user_action_logs", role, user_id, today)
@@ -86,18 +94,53 @@ class ActionLogger:
             "module_version": getattr(ctx, "system_version", "v1.0.0")  # Optional version tag
         }
 
-        # Attempt to write to file
+        # Hand the line to the background writer (synchronous append in sync mode)
         try:
-            with open(self.log_path, "a") as f:
-                f.write(json.dumps(entry) + "\n")
+            line = (json.dumps(entry) + "\n").encode("utf-8")
+            writer = get_audit_writer()
+            if writer is not None:
+                writer.write(self.log_path, line)
+            else:
+                append_line_sync(self.log_path, line)
         except Exception as e:
             print(f"❌ Failed to log action: {e}")
 
         # Optional real-time printing (can be turned off via env)
-        if os.getenv("ACTION_LOG_VERBOSE", "1") == "1":
+        if ACTION_LOG_VERBOSE:
             print(f"📝 [{event_type.upper()}] {action} | user={ctx.user_id} | client={ctx.client_id}")
 
 
+# === Process-wide Logger Registry ===
+
+_loggers: Dict[tuple, ActionLogger] = {}
+_loggers_lock = threading.Lock()
+_loggers_date = None
+
+
+def get_action_logger(user_id: str, role: str, module: str) -> ActionLogger:
+    """
+    Return the shared ActionLogger for (role, user, module, today).
+    The registry is reset when the date changes, so yesterday's loggers are released.
+    """
+    global _loggers_date
+    today = datetime.now().strftime("%Y-%m-%d")
+    key = (role, user_id, module, today)
+
+    logger = _loggers.get(key)
+    if logger is not None:
+        return logger
+
+    with _loggers_lock:
+        if _loggers_date != today:
+            _loggers.clear()
+            _loggers_date = today
+        logger = _loggers.get(key)
+        if logger is None:
+            logger = ActionLogger(user_id, role, module)
+            _loggers[key] = logger
+        return logger
+
+
 # === Unified Logging Helpers ===
 
 def record_user_action(ctx: RequestContext, module: str, action: str, payload: Optional[dict] = None):
@@ -110,7 +153,7 @@ def record_user_action(ctx: RequestContext, module: str, action: str, payload: O
         action (str): Label of the action (e.g., "submit_trade")
         payload (dict): Optional metadata for audit review
     """
-    logger = ActionLogger(ctx.user_id, ctx.role, module)
+    logger = get_action_logger(ctx.user_id, ctx.role, module)
     logger.log(ctx, action=action, payload=payload, event_type="action")
 
 
@@ -124,7 +167,7 @@ def record_user_view(ctx: RequestContext, module: str, action: str = "view", pay
         action (str): Optional view action label (defaults to "view")
         payload (dict): Optional metadata (e.g., asset symbol, section name)
     """
-    logger = ActionLogger(ctx.user_id, ctx.role, module)
+    logger = get_action_logger(ctx.user_id, ctx.role, module)
     logger.log(ctx, action=action, payload=payload, event_type="view")
 
 
@@ -143,5 +186,5 @@ def record_system_event(module: str, action: str, payload: Optional[dict] = None
     # Create a synthetic session context to represent the system
     dummy_ctx = RequestContext(user_id="system", role="system", client_id="global", source="engine")
 
-    logger = ActionLogger(user_id="system", role="system", module=module)
+    logger = get_action_logger(user_id="system", role="system", module=module)
     logger.log(dummy_ctx, action=action, payload=payload, status=status, event_type="system")
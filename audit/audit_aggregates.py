@@ -0,0 +1,315 @@
+# audit/audit_aggregates.py
+"""
+Materialized Audit Aggregates
+=============================
+
+Per-client daily rollups of audit events, maintained incrementally as
+`AuditLogger` writes them (stored in `clients/<client_id>/audit/aggregates.sqlite`).
+
+Tables
+------
+decision_daily   one row per (date, executor_type, symbol, reason_code, status)
+                 with counts, approvals and score / VaR / CVaR / volatility sums
+trigger_daily    one row per (date, category, event, symbol, reason_code, triggered_by)
+                 for cooling_off_logs and killswitch_logs
+
+Dashboards call `decision_rollup()` / `trigger_rollup()` to group these rows
+along any subset of dimensions (approval rates and averages are derived from
+the sums), instead of re-reading every JSONL file.
+
+An empty database is backfilled from the raw logs on first use. Otherwise
+counts are only as complete as the write path: after a crash (lines written
+but not yet aggregated), recompute with
+
+    python -m audit.audit_aggregates --rebuild [client_id ...]
+"""
+
+import os
+import sqlite3
+import argparse
+import threading
+from typing import Dict, List, Optional
+
+from audit.log_archive import iter_records, list_log_files, plain_name
+
+AGGREGATES_FILE = "aggregates.sqlite"
+
+DECISION_DIMS = ("date", "executor_type", "symbol", "reason_code", "status")
+TRIGGER_DIMS = ("date", "category", "event", "symbol", "reason_code", "triggered_by")
+TRIGGER_CATEGORIES = ("cooling_off_logs", "killswitch_logs")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS decision_daily (
+    date TEXT NOT NULL,
+    executor_type TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    reason_code TEXT NOT NULL,
+    status TEXT NOT NULL,
+    n INTEGER NOT NULL DEFAULT 0,
+    approved INTEGER NOT NULL DEFAULT 0,
+    score_sum REAL NOT NULL DEFAULT 0, score_n INTEGER NOT NULL DEFAULT 0,
+    var_sum REAL NOT NULL DEFAULT 0, var_n INTEGER NOT NULL DEFAULT 0,
+    cvar_sum REAL NOT NULL DEFAULT 0, cvar_n INTEGER NOT NULL DEFAULT 0,
+    vol_sum REAL NOT NULL DEFAULT 0, vol_n INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (date, executor_type, symbol, reason_code, status)
+);
+CREATE TABLE IF NOT EXISTS trigger_daily (
+    date TEXT NOT NULL,
+    category TEXT NOT NULL,
+    event TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    reason_code TEXT NOT NULL,
+    triggered_by TEXT NOT NULL,
+    n INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (date, category, event, symbol, reason_code, triggered_by)
+);
+"""
+
+_DECISION_UPSERT = """
+INSERT INTO decision_daily VALUES (?,?,?,?,?, 1,?, ?,?, ?,?, ?,?, ?,?)
+ON CONFLICT(date, executor_type, symbol, reason_code, status) DO UPDATE SET
+    n = n + 1,
+    approved = approved + excluded.approved,
+    score_sum = score_sum + excluded.score_sum, score_n = score_n + excluded.score_n,
+    var_sum = var_sum + excluded.var_sum, var_n = var_n + excluded.var_n,
+    cvar_sum = cvar_sum + excluded.cvar_sum, cvar_n = cvar_n + excluded.cvar_n,
+    vol_sum = vol_sum + excluded.vol_sum, vol_n = vol_n + excluded.vol_n
+"""
+
+_TRIGGER_UPSERT = """
+INSERT INTO trigger_daily VALUES (?,?,?,?,?,?, 1)
+ON CONFLICT(date, category, event, symbol, reason_code, triggered_by) DO UPDATE SET n = n + 1
+"""
+
+
+def _num(value):
+    """(value, 1) for finite numbers, (0.0, 0) otherwise."""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return 0.0, 0
+    return (value, 1) if value == value else (0.0, 0)
+
+
+def _decision_row(date: str, record: dict) -> tuple:
+    intent = record.get("intent", {}) or {}
+    approval = record.get("approval", {}) or {}
+    execution = record.get("execution", {}) or {}
+    signals = approval.get("signals", {}) or {}
+    return (
+        date,
+        record.get("executor_type") or "",
+        intent.get("symbol") or "",
+        approval.get("reason_code") or "",
+        execution.get("status") or "",
+        1 if approval.get("approved") else 0,
+        *_num(approval.get("score")),
+        *_num(signals.get("var")),
+        *_num(signals.get("cvar")),
+        *_num(signals.get("volatility"))
+    )
+
+
+def triggered_by(record: dict) -> str:
+    """Who (or what) caused a cooling-off / kill switch event."""
+    return record.get("user_id") or record.get("released_by") or record.get("trigger_source") or "system"
+
+
+def _trigger_row(date: str, category: str, record: dict) -> tuple:
+    return (
+        date,
+        category,
+        record.get("event") or "",
+        record.get("symbol") or "",
+        record.get("reason_code") or "",
+        triggered_by(record)
+    )
+
+
+def date_from_path(path: str) -> str:
+    return os.path.basename(plain_name(path))[:10]
+
+
+class AuditAggregates:
+    """
+    SQLite-backed daily aggregates for one client.
+    """
+
+    def __init__(self, client_id: str, audit_dir: Optional[str] = None):
+        self.client_id = client_id
+        self.audit_dir = audit_dir or os.path.join("clients", client_id, "audit")
+        os.makedirs(self.audit_dir, exist_ok=True)
+        self.db_path = os.path.join(self.audit_dir, AGGREGATES_FILE)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    # === Write path (called by AuditLogger once a line is written) ===
+
+    def record_decision(self, date: str, record: dict):
+        with self._lock:
+            self._conn.execute(_DECISION_UPSERT, _decision_row(date, record))
+            self._conn.commit()
+
+    def record_trigger(self, date: str, category: str, record: dict):
+        with self._lock:
+            self._conn.execute(_TRIGGER_UPSERT, _trigger_row(date, category, record))
+            self._conn.commit()
+
+    def rebuild(self) -> dict:
+        """
+        Recompute all aggregates from the raw (plain or archived) logs.
+
+        Returns:
+            dict: number of decision and trigger records aggregated
+        """
+        counts = {"decisions": 0, "triggers": 0}
+        with self._lock:
+            self._conn.execute("DELETE FROM decision_daily")
+            self._conn.execute("DELETE FROM trigger_daily")
+
+            for path in list_log_files(os.path.join(self.audit_dir, "decisions")):
+                date = date_from_path(path)
+                for record in iter_records(path):
+                    if isinstance(record, dict):
+                        self._conn.execute(_DECISION_UPSERT, _decision_row(date, record))
+                        counts["decisions"] += 1
+
+            for category in TRIGGER_CATEGORIES:
+                for path in list_log_files(os.path.join(self.audit_dir, category)):
+                    date = date_from_path(path)
+                    for record in iter_records(path):
+                        if isinstance(record, dict):
+                            self._conn.execute(_TRIGGER_UPSERT, _trigger_row(date, category, record))
+                            counts["triggers"] += 1
+
+            self._conn.commit()
+        return counts
+
+    # === Read path ===
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return not any(
+                self._conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone()
+                for table in ("decision_daily", "trigger_daily")
+            )
+
+    @staticmethod
+    def _where(filters: Dict[str, object], start_date: str, end_date: str):
+        clauses, params = [], []
+        for column, value in filters.items():
+            if value is None:
+                continue
+            if isinstance(value, (list, tuple, set)):
+                clauses.append(f"{column} IN ({','.join('?' * len(value))})")
+                params.extend(value)
+            else:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if start_date:
+            clauses.append("date >= ?")
+            params.append(start_date)
+        if end_date:
+            clauses.append("date <= ?")
+            params.append(end_date)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def decision_rollup(self, by: List[str] = ("symbol",), start_date: str = None, end_date: str = None,
+                        **filters) -> List[dict]:
+        """
+        Decision aggregates grouped by `by` (subset of DECISION_DIMS).
+
+        Each row has: <by dims>, n, approved, approval_rate, avg_score,
+        avg_var, avg_cvar, avg_volatility. Extra keyword args filter on
+        dimensions (value or list of values).
+        """
+        by = [d for d in by if d in DECISION_DIMS]
+        filters = {k: v for k, v in filters.items() if k in DECISION_DIMS}
+        where, params = self._where(filters, start_date, end_date)
+        select = ", ".join(by + [
+            "SUM(n) AS n", "SUM(approved) AS approved",
+            "SUM(score_sum) / NULLIF(SUM(score_n), 0) AS avg_score",
+            "SUM(var_sum) / NULLIF(SUM(var_n), 0) AS avg_var",
+            "SUM(cvar_sum) / NULLIF(SUM(cvar_n), 0) AS avg_cvar",
+            "SUM(vol_sum) / NULLIF(SUM(vol_n), 0) AS avg_volatility"
+        ])
+        sql = f"SELECT {select} FROM decision_daily{where}"
+        if by:
+            sql += f" GROUP BY {', '.join(by)} ORDER BY {', '.join(by)}"
+
+        with self._lock:
+            rows = [dict(r) for r in self._conn.execute(sql, params)]
+        for row in rows:
+            row["approval_rate"] = row["approved"] / row["n"] if row["n"] else None
+        return [r for r in rows if r["n"]]
+
+    def trigger_rollup(self, by: List[str] = ("category",), start_date: str = None, end_date: str = None,
+                       **filters) -> List[dict]:
+        """
+        Trigger counts grouped by `by` (subset of TRIGGER_DIMS).
+        """
+        by = [d for d in by if d in TRIGGER_DIMS]
+        filters = {k: v for k, v in filters.items() if k in TRIGGER_DIMS}
+        where, params = self._where(filters, start_date, end_date)
+        sql = f"SELECT {', '.join(by + ['SUM(n) AS n'])} FROM trigger_daily{where}"
+        if by:
+            sql += f" GROUP BY {', '.join(by)} ORDER BY {', '.join(by)}"
+        with self._lock:
+            return [dict(r) for r in self._conn.execute(sql, params) if r["n"]]
+
+    def distinct(self, table: str, column: str) -> List[str]:
+        """Distinct non-empty values of a dimension ("decision" or "trigger" table)."""
+        dims = DECISION_DIMS if table == "decision" else TRIGGER_DIMS
+        if column not in dims:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT DISTINCT {column} FROM {table}_daily WHERE {column} != '' ORDER BY {column}"
+            ).fetchall()
+        return [r[0] for r in rows]
+
+
+_aggregates: Dict[str, AuditAggregates] = {}
+_aggregates_lock = threading.Lock()
+
+
+def get_audit_aggregates(client_id: str) -> AuditAggregates:
+    """
+    Return the process-wide AuditAggregates for a client, backfilling
+    from existing logs the first time the database is created.
+    """
+    with _aggregates_lock:
+        if client_id not in _aggregates:
+            aggregates = AuditAggregates(client_id)
+            if aggregates.is_empty():
+                aggregates.rebuild()
+            _aggregates[client_id] = aggregates
+        return _aggregates[client_id]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild materialized audit aggregates from raw logs")
+    parser.add_argument("client_ids", nargs="*", help="Clients to rebuild (default: all registered)")
+    parser.add_argument("--rebuild", action="store_true", help="Required: drop and recompute aggregates")
+    args = parser.parse_args()
+    if not args.rebuild:
+        parser.error("nothing to do (pass --rebuild)")
+
+    client_ids = args.client_ids
+    if not client_ids:
+        from utils.config_loader import load_client_registry
+        client_ids = list(load_client_registry().keys())
+
+    for client_id in client_ids:
+        counts = get_audit_aggregates(client_id).rebuild()
+        print(f"✅ [{client_id}] Rebuilt audit aggregates — {counts['decisions']} decisions, {counts['triggers']} triggers")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,12 @@
 
 import os
 import json
-from utils.time_utils import get_timestamps
+from datetime import datetime
+from audit.audit_aggregates import get_audit_aggregates, date_from_path
+from audit.audit_writer import get_audit_writer, append_line_sync, flush_audit_writer
+from audit.decision_index import get_decision_index
+from audit.snapshot_store import get_snapshot_store
+from utils.time_utils import get_timestamps, MARKET_TZ
 from utils.trade_utils import simulate_slippage
 
 
@@ -43,6 +48,13 @@ class AuditLogger:
             "periodic_scan_logs"
         ])
 
+        # Open (and backfill, if new) the aggregates before any line is written,
+        # so the backfill never double-counts records aggregated at write time
+        try:
+            get_audit_aggregates(client_id)
+        except Exception as e:
+            print(f"[⚠️] Audit aggregates unavailable for {client_id} — {type(e).__name__}: {e}")
+
     def ensure_dirs(self, subfolders):
         """
         Create subdirectories under the audit root directory, if they don't exist.
@@ -51,20 +63,34 @@ class AuditLogger:
         for folder in subfolders:
             os.makedirs(os.path.join(self.root_dir, folder), exist_ok=True)
 
-    def _write_jsonl(self, subfolder: str, record: dict):
+    def _write_jsonl(self, subfolder: str, record: dict, on_written=None):
         """
         Append a dictionary record to a date-based JSONL file.
 
+        In buffered mode (default, see audit/audit_writer.py) the line is queued
+        to the background writer; otherwise it is appended synchronously.
+
         Args:
             subfolder (str): One of the predefined audit categories.
             record (dict): Structured event object to write.
+            on_written (callable): Optional callback(path, offset, length) invoked
+                once the line is in the file.
         """
-        today = get_timestamps()["date_str"]
+        today = datetime.now(MARKET_TZ).strftime("%Y-%m-%d")
         path = os.path.join(self.root_dir, subfolder, f"{today}.jsonl")
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        with open(path, "a") as f:
-            json.dump(record, f)
-            f.write("\n")
+        line = (json.dumps(record) + "\n").encode("utf-8")
+
+        writer = get_audit_writer()
+        if writer is not None:
+            writer.write(path, line, on_written)
+        else:
+            append_line_sync(path, line, on_written)
+
+    def flush(self) -> bool:
+        """
+        Block until all queued audit lines are written and fsynced.
+        """
+        return flush_audit_writer()
 
     def log_trade(self, context):
         """
@@ -79,6 +105,13 @@ class AuditLogger:
         approval = intent.approval or {}
         snapshot = context.client.portfolio.to_snapshot()
 
+        # Store the snapshot once per state version; the record keeps hash + delta
+        try:
+            snapshot_field = {"portfolio_snapshot_ref": get_snapshot_store(self.client_id).encode(snapshot)}
+        except Exception as e:
+            print(f"[⚠️] Snapshot store unavailable, embedding full snapshot — {type(e).__name__}: {e}")
+            snapshot_field = {"portfolio_snapshot": snapshot}
+
         record = {
             "intent": {
                 "intent_id": intent.intent_id,
@@ -120,7 +153,7 @@ class AuditLogger:
                 "broker": result.get("broker")
             },
             "executor_type": context.executor_type,
-            "portfolio_snapshot": snapshot,
+            **snapshot_field,
             "risk_event_flags": {
                 "cooling_off_triggered": getattr(context, "cooling_off_triggered", False),
                 "killswitch_triggered": getattr(context, "killswitch_triggered", False)
@@ -130,9 +163,38 @@ class AuditLogger:
         }
 
         context.audit_record = record
-        self._write_jsonl("decisions", record)
+        self._write_jsonl("decisions", record, on_written=self._index_decision(record))
         return record
 
+    def _index_decision(self, record: dict):
+        """
+        Build the on_written callback that adds a decision record to the index
+        and to the daily aggregates.
+        """
+        def on_written(path, offset, length):
+            try:
+                get_decision_index(self.client_id).add(record, path, offset, length)
+            except Exception as e:
+                # The JSONL line is the source of truth; the next refresh() picks it up
+                print(f"[⚠️] Failed to index decision {record['intent'].get('intent_id')} — {type(e).__name__}: {e}")
+            try:
+                get_audit_aggregates(self.client_id).record_decision(date_from_path(path), record)
+            except Exception as e:
+                print(f"[⚠️] Failed to aggregate decision {record['intent'].get('intent_id')} — {type(e).__name__}: {e}")
+        return on_written
+
+    def _aggregate_trigger(self, category: str, record: dict):
+        """
+        Build the on_written callback that counts a risk trigger event
+        in the daily aggregates (see audit/audit_aggregates.py).
+        """
+        def on_written(path, offset, length):
+            try:
+                get_audit_aggregates(self.client_id).record_trigger(date_from_path(path), category, record)
+            except Exception as e:
+                print(f"[⚠️] Failed to aggregate {category} event — {type(e).__name__}: {e}")
+        return on_written
+
     def log_silent_mode(self, level: str, symbol: str = None, reason: str = None,
                         user_id: str = None, strategy_id: str = None,
                         trigger_type: str = "manual", trigger_source: str = "admin_panel",
@@ -142,7 +204,7 @@ class AuditLogger:
         Record activation of silent mode (cooling off).
         Supports both symbol-level and account-level freezing.
         """
-        self._write_jsonl("cooling_off_logs", {
+        record = {
             "timestamp": get_timestamps()["now_ny"].isoformat(),
             "event": "silent_mode_triggered",
             "level": level,                         # "symbol" or "account"
@@ -155,7 +217,8 @@ class AuditLogger:
             "strategy_id": strategy_id,
             "expected_release": expected_release,
             "intent_id": intent_id
-        })
+        }
+        self._write_jsonl("cooling_off_logs", record, on_written=self._aggregate_trigger("cooling_off_logs", record))
 
     def log_release_silent(self, level: str, symbol: str = None, user_id: str = None,
                            release_type: str = "manual", released_by: str = None,
@@ -163,7 +226,7 @@ class AuditLogger:
         """
         Record a manual or automatic release of silent mode lock.
         """
-        self._write_jsonl("cooling_off_logs", {
+        record = {
             "timestamp": get_timestamps()["now_ny"].isoformat(),
             "event": "silent_mode_released",
             "level": level,
@@ -172,7 +235,8 @@ class AuditLogger:
             "released_by": released_by or user_id,
             "reason_code": reason_code,
             "duration_sec": duration_sec
-        })
+        }
+        self._write_jsonl("cooling_off_logs", record, on_written=self._aggregate_trigger("cooling_off_logs", record))
 
     def log_killswitch(self, level: str, reason: str, user_id: str = None,
                        trigger_source: str = "drawdown_monitor", reason_code: str = "TRAILING_MDD"):
@@ -180,7 +244,7 @@ class AuditLogger:
         Record a kill switch trigger (account-level block).
         Usually caused by severe risk breach.
         """
-        self._write_jsonl("killswitch_logs", {
+        record = {
             "timestamp": get_timestamps()["now_ny"].isoformat(),
             "event": "killswitch_triggered",
             "level": level,                        # "account" or "system"
@@ -188,7 +252,8 @@ class AuditLogger:
             "reason_code": reason_code,
             "user_id": user_id,
             "trigger_source": trigger_source
-        })
+        }
+        self._write_jsonl("killswitch_logs", record, on_written=self._aggregate_trigger("killswitch_logs", record))
 
     def log_release_killswitch(self, level: str, symbol: str = None, user_id: str = None,
                                 release_type: str = "manual", released_by: str = None,
@@ -197,7 +262,7 @@ class AuditLogger:
         Record a release event of the kill switch lock.
         Includes manual release audit trail.
         """
-        self._write_jsonl("killswitch_logs", {
+        record = {
             "timestamp": get_timestamps()["now_ny"].isoformat(),
             "event": "killswitch_released",
             "level": level,
@@ -206,7 +271,8 @@ class AuditLogger:
             "release_type": release_type,
             "released_by": released_by or user_id,
             "reason_code": reason_code
-        })
+        }
+        self._write_jsonl("killswitch_logs", record, on_written=self._aggregate_trigger("killswitch_logs", record))
 
     def log_daily_summary(self, summary_dict: dict):
         """
@@ -0,0 +1,184 @@
+# audit/audit_query.py
+"""
+Paginated Audit Query API
+=========================
+
+Shared read layer for the auditor / risker pages. Filters are pushed down as
+far as the storage allows, and results come back one page at a time, so a
+page only materializes the records it displays.
+
+Decisions   filtered in the decision index (audit/decision_index.py) by date,
+            symbol, status, reason_code, approved; only the requested page is
+            read from disk (one seek per record, archived days decompress one
+            block).
+Triggers    cooling_off_logs / killswitch_logs are pruned by file date first,
+            then streamed and filtered record by record.
+
+    records, total = decision_page("AllanM", page=0, symbol="AAPL", status="rejected")
+
+    for page in iter_triggers("AllanM", start_date="2025-06-01", symbol="AAPL"):
+        for category, record in page:
+            ...
+"""
+
+import os
+from itertools import islice
+from typing import Iterable, Iterator, List, Tuple
+
+from audit.audit_aggregates import TRIGGER_CATEGORIES, date_from_path, triggered_by
+from audit.decision_index import get_decision_index
+from audit.log_archive import iter_records, list_log_files
+
+AUDIT_PAGE_SIZE = int(os.getenv("AUDIT_PAGE_SIZE", 50))
+
+DECISION_FILTERS = ("intent_id", "symbol", "status", "reason_code", "approved", "start_date", "end_date")
+TRIGGER_FILTERS = ("symbol", "event", "reason_code", "triggered_by")
+
+
+def _paged(items: Iterable, page_size: int) -> Iterator[list]:
+    items = iter(items)
+    while True:
+        page = list(islice(items, page_size))
+        if not page:
+            return
+        yield page
+
+
+def _in_range(date: str, start_date: str = None, end_date: str = None) -> bool:
+    return (not start_date or date >= start_date) and (not end_date or date <= end_date)
+
+
+def _matches(value, wanted) -> bool:
+    if wanted is None:
+        return True
+    if isinstance(wanted, (list, tuple, set)):
+        return value in wanted
+    return value == wanted
+
+
+# === Decisions ===
+
+def _decision_matches(record: dict, filters: dict) -> bool:
+    intent = record.get("intent", {}) or {}
+    approval = record.get("approval", {}) or {}
+    fields = {
+        "intent_id": intent.get("intent_id"),
+        "symbol": intent.get("symbol"),
+        "status": (record.get("execution", {}) or {}).get("status"),
+        "reason_code": approval.get("reason_code"),
+    }
+    if not all(_matches(fields[k], filters.get(k)) for k in fields):
+        return False
+    approved = filters.get("approved")
+    return approved is None or bool(approval.get("approved")) == bool(approved)
+
+
+def _scan_decisions(client_id: str, newest_first: bool, filters: dict) -> Iterator[dict]:
+    """Index-less fallback: prune files by date, then filter records."""
+    base_path = os.path.join("clients", client_id, "audit", "decisions")
+    for path in list_log_files(base_path, reverse=newest_first):
+        if path.endswith(".json"):
+            continue
+        if not _in_range(date_from_path(path), filters.get("start_date"), filters.get("end_date")):
+            continue
+        records = [r for r in iter_records(path) if isinstance(r, dict) and _decision_matches(r, filters)]
+        yield from (reversed(records) if newest_first else records)
+
+
+def decision_page(client_id: str, page: int = 0, page_size: int = AUDIT_PAGE_SIZE,
+                  newest_first: bool = True, **filters) -> Tuple[List[dict], int]:
+    """
+    One page of decision records plus the total number of matches.
+
+    Filters: intent_id, symbol, status, reason_code (value or list),
+    approved (bool), start_date / end_date (inclusive "YYYY-MM-DD").
+    """
+    filters = {k: v for k, v in filters.items() if k in DECISION_FILTERS and v is not None}
+    try:
+        index = get_decision_index(client_id)
+        index.refresh()
+        total = index.count(**filters)
+        locations = index.locate(limit=page_size, offset=page * page_size, newest_first=newest_first, **filters)
+        return [record for _, record in index.read(locations)], total
+    except Exception as e:
+        print(f"[⚠️] Decision index unavailable for {client_id}, scanning logs — {type(e).__name__}: {e}")
+        matches = list(_scan_decisions(client_id, newest_first, filters))
+        return matches[page * page_size:(page + 1) * page_size], len(matches)
+
+
+def iter_decisions(client_id: str, page_size: int = AUDIT_PAGE_SIZE, newest_first: bool = True,
+                   **filters) -> Iterator[List[dict]]:
+    """
+    Yield pages of decision records matching `filters` (see decision_page).
+    """
+    filters = {k: v for k, v in filters.items() if k in DECISION_FILTERS and v is not None}
+    try:
+        index = get_decision_index(client_id)
+        index.refresh()
+    except Exception as e:
+        print(f"[⚠️] Decision index unavailable for {client_id}, scanning logs — {type(e).__name__}: {e}")
+        yield from _paged(_scan_decisions(client_id, newest_first, filters), page_size)
+        return
+
+    page = 0
+    while True:
+        locations = index.locate(limit=page_size, offset=page * page_size, newest_first=newest_first, **filters)
+        if not locations:
+            return
+        yield [record for _, record in index.read(locations)]
+        if len(locations) < page_size:
+            return
+        page += 1
+
+
+# === Risk triggers (cooling-off / kill switch) ===
+
+def _trigger_matches(record: dict, filters: dict) -> bool:
+    fields = {
+        "symbol": record.get("symbol") or record.get("asset"),
+        "event": record.get("event"),
+        "reason_code": record.get("reason_code"),
+        "triggered_by": triggered_by(record),
+    }
+    return all(_matches(fields[k], filters.get(k)) for k in fields)
+
+
+def _scan_triggers(client_id: str, categories, start_date, end_date, newest_first, filters) -> Iterator[tuple]:
+    audit_dir = os.path.join("clients", client_id, "audit")
+    files = []
+    for category in categories:
+        for path in list_log_files(os.path.join(audit_dir, category)):
+            date = date_from_path(path)
+            if _in_range(date, start_date, end_date):
+                files.append((date, category, path))
+    files.sort(key=lambda f: f[0], reverse=newest_first)
+
+    for _, category, path in files:
+        records = [r for r in iter_records(path) if isinstance(r, dict) and _trigger_matches(r, filters)]
+        for record in (reversed(records) if newest_first else records):
+            yield category, record
+
+
+def iter_triggers(client_id: str, categories: Iterable[str] = TRIGGER_CATEGORIES,
+                  start_date: str = None, end_date: str = None, page_size: int = AUDIT_PAGE_SIZE,
+                  newest_first: bool = True, **filters) -> Iterator[List[tuple]]:
+    """
+    Yield pages of (category, record) trigger events.
+
+    Filters: symbol, event, reason_code, triggered_by (value or list).
+    Files outside [start_date, end_date] are never opened.
+    """
+    filters = {k: v for k, v in filters.items() if k in TRIGGER_FILTERS and v is not None}
+    yield from _paged(
+        _scan_triggers(client_id, list(categories), start_date, end_date, newest_first, filters), page_size
+    )
+
+
+def trigger_page(client_id: str, page: int = 0, page_size: int = AUDIT_PAGE_SIZE,
+                 **kwargs) -> Tuple[List[tuple], bool]:
+    """
+    One page of (category, record) trigger events, and whether more pages follow.
+    """
+    pages = iter_triggers(client_id, page_size=page_size, **kwargs)
+    current = next(islice(pages, page, None), [])
+    return current, next(pages, None) is not None
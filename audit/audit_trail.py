@@ -5,47 +5,56 @@ Audit Trail Toolkit
 
 Utility module to read and parse structured audit logs from decisions/.
 Supports:
-- loading daily audit logs
+- loading daily audit logs (plain or archived .jsonl.gz)
 - searching by intent_id
-- aggregating by executor type or rejection reason
+- aggregating by executor type or rejection reason (from records, or from
+  the materialized daily aggregates in audit/audit_aggregates.py)
+- rehydrating delta-encoded portfolio snapshots
 """
 
 import os
-import json
-import glob
 from collections import defaultdict
 
+from audit.audit_aggregates import get_audit_aggregates
+from audit.decision_index import get_decision_index
+from audit.log_archive import iter_records, list_log_files, resolve_log_path
+from audit.snapshot_store import get_snapshot_store
+
 def load_decision_log(client_id: str, date_str: str = None):
     base_path = f"clients/{client_id}/audit/decisions/"
     if date_str:
-        path = os.path.join(base_path, f"{date_str}.jsonl")
+        path = resolve_log_path(os.path.join(base_path, f"{date_str}.jsonl"))
+        if path is None:
+            return []
     else:
-        files = sorted(glob.glob(base_path + "*.jsonl"))
+        files = [f for f in list_log_files(base_path) if not f.endswith(".json")]
         if not files:
             return []
         path = files[-1]  # latest log file
 
-    records = []
-    with open(path, "r") as f:
-        for line in f:
-            try:
-                records.append(json.loads(line.strip()))
-            except:
-                continue
-    return records
+    return list(iter_records(path))
 
 def find_by_intent_id(client_id: str, intent_id: str):
+    """
+    Look up decision records by intent_id via the decision index
+    (see audit/decision_index.py); falls back to a full scan if the
+    index is unavailable.
+    """
+    try:
+        index = get_decision_index(client_id)
+        index.refresh()
+        return index.query(intent_id=intent_id)
+    except Exception as e:
+        print(f"[⚠️] Decision index unavailable for {client_id}, scanning logs — {type(e).__name__}: {e}")
+        return _scan_for_intent_id(client_id, intent_id)
+
+def _scan_for_intent_id(client_id: str, intent_id: str):
     base_path = f"clients/{client_id}/audit/decisions/"
     matches = []
-    for file in sorted(glob.glob(base_path + "*.jsonl")):
-        with open(file) as f:
-            for line in f:
-                try:
-                    data = json.loads(line.strip())
-                    if data.get("intent", {}).get("intent_id") == intent_id:
-                        matches.append(data)
-                except:
-                    continue
+    for file in list_log_files(base_path):
+        for data in iter_records(file):
+            if data.get("intent", {}).get("intent_id") == intent_id:
+                matches.append(data)
     return matches
 
 def summarize_executor_usage(records):
@@ -63,5 +72,52 @@ def summarize_rejection_reasons(records):
             reasons[reason] += 1
     return dict(reasons)
 
+def executor_usage(client_id: str, start_date: str = None, end_date: str = None):
+    """
+    Same shape as summarize_executor_usage(), read from the daily aggregates.
+    """
+    rows = get_audit_aggregates(client_id).decision_rollup(
+        by=["executor_type"], start_date=start_date, end_date=end_date
+    )
+    return {(r["executor_type"] or "unknown"): r["n"] for r in rows}
+
+def rejection_reasons(client_id: str, start_date: str = None, end_date: str = None):
+    """
+    Same shape as summarize_rejection_reasons(), read from the daily aggregates.
+    """
+    rows = get_audit_aggregates(client_id).decision_rollup(
+        by=["reason_code"], start_date=start_date, end_date=end_date, status="rejected"
+    )
+    return {(r["reason_code"] or "UNKNOWN"): r["n"] for r in rows}
+
 def list_all_trade_ids(records):
-    return [(r.get("intent", {}).get("intent_id"), r.get("execution", {}).get("status")) for r in records]
\ No newline at end of file
+    return [(r.get("intent", {}).get("intent_id"), r.get("execution", {}).get("status")) for r in records]
+
+def load_portfolio_snapshot(record: dict, client_id: str = None):
+    """
+    Full portfolio snapshot for a decision record.
+
+    Records written before snapshot delta-encoding embed `portfolio_snapshot`
+    directly; newer ones carry `portfolio_snapshot_ref` (hash + delta).
+    """
+    if record.get("portfolio_snapshot"):
+        return record["portfolio_snapshot"]
+    ref = record.get("portfolio_snapshot_ref")
+    if not ref:
+        return None
+    client_id = client_id or record.get("intent", {}).get("client_id")
+    try:
+        return get_snapshot_store(client_id).decode(ref)
+    except Exception as e:
+        print(f"[⚠️] Failed to rehydrate portfolio snapshot {ref.get('hash')} — {type(e).__name__}: {e}")
+        return None
+
+def rehydrate_record(record: dict, client_id: str = None):
+    """
+    Copy of a decision record with `portfolio_snapshot` filled in.
+    """
+    if "portfolio_snapshot" in record or "portfolio_snapshot_ref" not in record:
+        return record
+    full = {k: v for k, v in record.items() if k != "portfolio_snapshot_ref"}
+    full["portfolio_snapshot"] = load_portfolio_snapshot(record, client_id)
+    return full
@@ -0,0 +1,313 @@
+# audit/audit_writer.py
+"""
+Buffered Audit Writer
+=====================
+
+Background writer for JSONL audit logs. Instead of open → write one line →
+close on every event, `AuditLogger` and `ActionLogger` hand lines to a dedicated thread that:
+
+- batch-appends queued lines per file
+- keeps file handles open for the day (rotated when the daily file changes,
+  all closed when the calendar date rolls over, and capped at
+  `AUDIT_MAX_OPEN_FILES` least-recently-used handles)
+- fsyncs every `AUDIT_FSYNC_INTERVAL_SEC` seconds, or on `flush()`
+
+Durability contract:
+- `flush()` blocks until everything queued before the call is written and fsynced
+- `TradeAuditFailSafe.check` calls it before verifying a trade's audit record
+- if the writer thread is unavailable, writes fall back to synchronous appends
+
+Offsets passed to `on_written` are taken from the file size after each
+append, under an exclusive lock (flock where available), so they stay correct
+when synchronous appends or other processes write to the same file.
+
+Mode is selected with `AUDIT_WRITER_MODE` ("buffered" | "sync", default buffered).
+"""
+
+import os
+import queue
+import atexit
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # non-POSIX: in-process locking only
+    fcntl = None
+
+AUDIT_WRITER_MODE = os.getenv("AUDIT_WRITER_MODE", "buffered").lower()
+AUDIT_FSYNC_INTERVAL_SEC = float(os.getenv("AUDIT_FSYNC_INTERVAL_SEC", 1.0))
+AUDIT_FLUSH_TIMEOUT_SEC = float(os.getenv("AUDIT_FLUSH_TIMEOUT_SEC", 10.0))
+AUDIT_MAX_OPEN_FILES = int(os.getenv("AUDIT_MAX_OPEN_FILES", 256))
+
+# on_written(path, offset, length) — called once the line is in the file
+WrittenCallback = Optional[Callable[[str, int, int], None]]
+
+_known_dirs = set()
+_append_lock = threading.Lock()
+
+
+def _today() -> str:
+    return time.strftime("%Y-%m-%d")
+
+
+def _append(f, data: bytes) -> int:
+    """
+    Append `data` through an "ab" handle and return the offset it landed at.
+
+    The offset comes from the file size after the write (not f.tell(), which
+    goes stale when anything else appends to the file), with the file locked so
+    no other append can slip in between the write and the stat.
+    """
+    with _append_lock:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            f.write(data)
+            f.flush()
+            return os.fstat(f.fileno()).st_size - len(data)
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def append_line_sync(path: str, line: bytes, on_written: WrittenCallback = None):
+    """
+    Synchronous append of one encoded JSONL line (the pre-buffering behavior).
+    """
+    directory = os.path.dirname(path)
+    if directory not in _known_dirs:
+        os.makedirs(directory, exist_ok=True)
+        _known_dirs.add(directory)
+    with open(path, "ab") as f:
+        offset = _append(f, line)
+    if on_written:
+        on_written(path, offset, len(line))
+
+
+class _Barrier:
+    def __init__(self):
+        self.done = threading.Event()
+        self.ok = True
+
+
+class BufferedAuditWriter:
+    """
+    Single background thread owning all audit file handles in the process.
+    """
+
+    def __init__(self, fsync_interval_sec: float = AUDIT_FSYNC_INTERVAL_SEC, max_batch: int = 1000,
+                 max_open_files: int = AUDIT_MAX_OPEN_FILES):
+        self.fsync_interval_sec = fsync_interval_sec
+        self.max_batch = max_batch
+        self.max_open_files = max_open_files
+
+        self._queue = queue.SimpleQueue()
+        self._handles = OrderedDict()            # path → open file (binary append), LRU order
+        self._by_dir: Dict[str, str] = {}        # directory → current daily path
+        self._handles_date = _today()            # date the open handles belong to
+        self._dirty = set()
+        self._last_fsync = time.monotonic()
+        self._stopped = False
+
+        self.metrics = {"lines": 0, "batches": 0, "fsyncs": 0, "sync_fallbacks": 0}
+
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def is_alive(self) -> bool:
+        return not self._stopped and self._thread.is_alive()
+
+    # === Producer API ===
+
+    def write(self, path: str, line: bytes, on_written: WrittenCallback = None):
+        """
+        Queue one encoded line for `path`. Falls back to a synchronous append
+        if the writer thread is not running.
+        """
+        if not self.is_alive():
+            self.metrics["sync_fallbacks"] += 1
+            append_line_sync(path, line, on_written)
+            return
+        self._queue.put((path, line, on_written))
+
+    def flush(self, timeout: float = AUDIT_FLUSH_TIMEOUT_SEC) -> bool:
+        """
+        Block until every line queued so far is written and fsynced.
+
+        Returns:
+            bool: True if the flush completed successfully within `timeout`
+        """
+        if not self.is_alive():
+            return True  # nothing can be pending: writes are synchronous
+        barrier = _Barrier()
+        self._queue.put(barrier)
+        return barrier.done.wait(timeout) and barrier.ok
+
+    def close(self):
+        """Flush, stop the thread and close all handles."""
+        if self._stopped:
+            return
+        self.flush()
+        self._stopped = True
+        self._queue.put(None)
+        self._thread.join(timeout=AUDIT_FLUSH_TIMEOUT_SEC)
+
+    # === Writer thread ===
+
+    def _handle(self, path: str):
+        f = self._handles.get(path)
+        if f is not None:
+            self._handles.move_to_end(path)
+            return f
+
+        today = _today()
+        if today != self._handles_date:
+            # Date rollover: per-date directories (action logs) never reuse
+            # yesterday's handles, so close them all instead of waiting for the cap
+            for open_path in list(self._handles):
+                self._close_handle(open_path)
+            self._by_dir.clear()
+            self._handles_date = today
+
+        directory = os.path.dirname(path)
+        previous = self._by_dir.get(directory)
+        if previous and previous in self._handles:
+            self._close_handle(previous)  # daily rotation
+
+        if directory not in _known_dirs:
+            os.makedirs(directory, exist_ok=True)
+            _known_dirs.add(directory)
+        f = open(path, "ab")
+        self._handles[path] = f
+        self._by_dir[directory] = path
+        while len(self._handles) > self.max_open_files:
+            self._close_handle(next(iter(self._handles)))
+        return f
+
+    def _close_handle(self, path: str):
+        f = self._handles.pop(path)
+        try:
+            f.flush()
+            os.fsync(f.fileno())
+        finally:
+            f.close()
+            self._dirty.discard(path)
+
+    def _fsync_all(self) -> bool:
+        ok = True
+        for path in list(self._dirty):
+            try:
+                f = self._handles[path]
+                f.flush()
+                os.fsync(f.fileno())
+            except Exception as e:
+                ok = False
+                print(f"[❌] Audit fsync failed for {path} — {type(e).__name__}: {e}")
+        self._dirty.clear()
+        self._last_fsync = time.monotonic()
+        self.metrics["fsyncs"] += 1
+        return ok
+
+    def _write_batch(self, items: list) -> bool:
+        ok = True
+        callbacks = []
+        grouped: Dict[str, list] = {}
+        for path, line, on_written in items:
+            grouped.setdefault(path, []).append((line, on_written))
+
+        for path, lines in grouped.items():
+            try:
+                f = self._handle(path)
+                offset = _append(f, b"".join(line for line, _ in lines))
+                self._dirty.add(path)
+                for line, on_written in lines:
+                    if on_written:
+                        callbacks.append((on_written, path, offset, len(line)))
+                    offset += len(line)
+            except Exception as e:
+                print(f"[⚠️] Buffered audit write failed for {path}, retrying synchronously — {type(e).__name__}: {e}")
+                self._handles.pop(path, None)
+                self._dirty.discard(path)
+                for line, on_written in lines:
+                    try:
+                        append_line_sync(path, line, on_written)
+                    except Exception as e2:
+                        ok = False
+                        print(f"[❌] Audit write lost for {path} — {type(e2).__name__}: {e2}")
+
+        for on_written, path, offset, length in callbacks:
+            try:
+                on_written(path, offset, length)
+            except Exception as e:
+                print(f"[⚠️] Audit write callback failed — {type(e).__name__}: {e}")
+
+        self.metrics["lines"] += len(items)
+        self.metrics["batches"] += 1
+        return ok
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=self.fsync_interval_sec)
+            except queue.Empty:
+                item = ()
+
+            batch, barriers, stop = [], [], False
+            while True:
+                if item is None:
+                    stop = True
+                elif isinstance(item, _Barrier):
+                    barriers.append(item)
+                elif item:
+                    batch.append(item)
+                if len(batch) >= self.max_batch:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            ok = self._write_batch(batch) if batch else True
+            if barriers or stop or time.monotonic() - self._last_fsync >= self.fsync_interval_sec:
+                ok = self._fsync_all() and ok
+            for barrier in barriers:
+                barrier.ok = ok
+                barrier.done.set()
+
+            if stop:
+                for path in list(self._handles):
+                    self._close_handle(path)
+                return
+
+
+_writer: Optional[BufferedAuditWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_audit_writer() -> Optional[BufferedAuditWriter]:
+    """
+    Return the process-wide buffered writer, or None in sync mode.
+    """
+    global _writer
+    if AUDIT_WRITER_MODE != "buffered":
+        return None
+    with _writer_lock:
+        if _writer is None or not _writer.is_alive():
+            try:
+                _writer = BufferedAuditWriter()
+                atexit.register(_writer.close)
+            except Exception as e:
+                print(f"[⚠️] Audit writer thread unavailable, using synchronous writes — {type(e).__name__}: {e}")
+                _writer = None
+        return _writer
+
+
+def flush_audit_writer(timeout: float = AUDIT_FLUSH_TIMEOUT_SEC) -> bool:
+    """
+    Hard durability barrier for all audit logs written by this process.
+    """
+    writer = _writer
+    return writer.flush(timeout) if writer is not None else True
@@ -0,0 +1,302 @@
+# audit/decision_index.py
+"""
+Decision Log Index
+==================
+
+Embedded SQLite index over `clients/<client_id>/audit/decisions/*.jsonl`.
+
+The JSONL files stay the source of truth. The index (WAL mode, stored next to
+them as `decisions/index.sqlite`) maps each record's intent_id, symbol,
+status, reason_code and date to its (file, byte offset, length), so:
+
+- intent lookups are a single indexed query + one seek/read
+- filtered queries never parse records that do not match
+
+`AuditLogger.log_trade` indexes each record as it is written. Records written
+by other processes (or before the index existed, or whose indexing failed)
+are picked up by `refresh()`, which only reads bytes beyond each file's
+contiguously indexed prefix.
+Offsets are raw (uncompressed) byte offsets, so they stay valid after a day is
+archived by audit/log_archive.py.
+
+Rebuild from scratch:
+
+    python -m audit.decision_index --rebuild            # all clients
+    python -m audit.decision_index --rebuild AllanM     # one client
+"""
+
+import os
+import json
+import glob
+import sqlite3
+import argparse
+import threading
+from typing import Dict, List, Optional
+
+from audit.log_archive import iter_raw_lines, list_log_files, plain_name, read_range, resolve_log_path
+
+INDEX_FILE = "index.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS decisions (
+    file TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    date TEXT,
+    intent_id TEXT,
+    symbol TEXT,
+    status TEXT,
+    reason_code TEXT,
+    approved INTEGER,
+    executor_type TEXT,
+    timestamp TEXT,
+    PRIMARY KEY (file, offset)
+);
+CREATE INDEX IF NOT EXISTS idx_decisions_intent ON decisions(intent_id);
+CREATE INDEX IF NOT EXISTS idx_decisions_date ON decisions(date);
+CREATE INDEX IF NOT EXISTS idx_decisions_symbol ON decisions(symbol, date);
+CREATE INDEX IF NOT EXISTS idx_decisions_status ON decisions(status, date);
+CREATE INDEX IF NOT EXISTS idx_decisions_reason ON decisions(reason_code, date);
+CREATE TABLE IF NOT EXISTS files (
+    file TEXT PRIMARY KEY,
+    indexed_bytes INTEGER NOT NULL
+);
+"""
+
+
+def _row_from_record(record: dict, file: str, offset: int, length: int) -> tuple:
+    intent = record.get("intent", {}) or {}
+    approval = record.get("approval", {}) or {}
+    execution = record.get("execution", {}) or {}
+    approved = approval.get("approved")
+    return (
+        file,
+        offset,
+        length,
+        os.path.splitext(file)[0],
+        intent.get("intent_id"),
+        intent.get("symbol"),
+        execution.get("status"),
+        approval.get("reason_code"),
+        None if approved is None else int(bool(approved)),
+        record.get("executor_type"),
+        intent.get("timestamp")
+    )
+
+
+class DecisionIndex:
+    """
+    SQLite index for one client's decision logs.
+    """
+
+    def __init__(self, client_id: str, decisions_dir: Optional[str] = None):
+        self.client_id = client_id
+        self.decisions_dir = decisions_dir or os.path.join("clients", client_id, "audit", "decisions")
+        os.makedirs(self.decisions_dir, exist_ok=True)
+        self.db_path = os.path.join(self.decisions_dir, INDEX_FILE)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # === Write path ===
+
+    def add(self, record: dict, path: str, offset: int, length: int):
+        """
+        Index one record that was just appended at `offset` in `path`.
+        """
+        file = os.path.basename(path)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO decisions VALUES (?,?,?,?,?,?,?,?,?,?,?)",
+                _row_from_record(record, file, offset, length)
+            )
+            # Advance the watermark only over contiguous records: if an earlier
+            # add() failed, refresh() must still re-read from the gap
+            self._conn.execute("INSERT OR IGNORE INTO files(file, indexed_bytes) VALUES (?, 0)", (file,))
+            self._conn.execute(
+                "UPDATE files SET indexed_bytes = ? WHERE file = ? AND indexed_bytes = ?",
+                (offset + length, file, offset)
+            )
+            self._conn.commit()
+
+    def _index_file(self, path: str, start: int) -> int:
+        """
+        Index records in `path` (plain or archived) from raw byte `start` to
+        the last complete line. Caller holds the lock. Returns the new indexed byte count.
+        """
+        file = plain_name(os.path.basename(path))
+        rows = []
+        offset = start
+        for offset, line in iter_raw_lines(path, start):
+            try:
+                rows.append(_row_from_record(json.loads(line), file, offset, len(line)))
+            except Exception:
+                pass
+            offset += len(line)
+
+        if rows:
+            self._conn.executemany("INSERT OR REPLACE INTO decisions VALUES (?,?,?,?,?,?,?,?,?,?,?)", rows)
+        self._conn.execute(
+            "INSERT INTO files(file, indexed_bytes) VALUES (?, ?) "
+            "ON CONFLICT(file) DO UPDATE SET indexed_bytes = excluded.indexed_bytes",
+            (file, offset)
+        )
+        return offset
+
+    def refresh(self) -> int:
+        """
+        Index any bytes appended since the last refresh (cheap: one stat per file).
+
+        Returns:
+            int: number of files that had new data
+        """
+        with self._lock:
+            known = dict(self._conn.execute("SELECT file, indexed_bytes FROM files"))
+            touched = 0
+            for path in sorted(glob.glob(os.path.join(self.decisions_dir, "*.jsonl"))):
+                size = os.path.getsize(path)
+                done = known.get(os.path.basename(path), 0)
+                if size > done:
+                    self._index_file(path, done)
+                    touched += 1
+            self._conn.commit()
+            return touched
+
+    def rebuild(self) -> int:
+        """
+        Drop and rebuild the whole index from the JSONL files.
+
+        Returns:
+            int: number of indexed records
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM decisions")
+            self._conn.execute("DELETE FROM files")
+            for path in list_log_files(self.decisions_dir):
+                if path.endswith(".json"):
+                    continue
+                self._index_file(path, 0)
+            self._conn.commit()
+            return self._conn.execute("SELECT COUNT(*) FROM decisions").fetchone()[0]
+
+    # === Read path ===
+
+    @staticmethod
+    def _where(intent_id=None, symbol=None, status=None, reason_code=None, approved=None,
+               start_date=None, end_date=None):
+        clauses, params = [], []
+        for column, value in (("intent_id", intent_id), ("symbol", symbol),
+                              ("status", status), ("reason_code", reason_code)):
+            if value is None:
+                continue
+            if isinstance(value, (list, tuple, set)):
+                value = list(value)
+                clauses.append(f"{column} IN ({','.join('?' * len(value))})")
+                params.extend(value)
+            else:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if approved is not None:
+            # "Not approved" includes records without an approval flag (NULL)
+            clauses.append("approved = 1" if approved else "approved IS NOT 1")
+        if start_date:
+            clauses.append("date >= ?")
+            params.append(start_date)
+        if end_date:
+            clauses.append("date <= ?")
+            params.append(end_date)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def locate(self, intent_id: str = None, symbol=None, status=None, reason_code=None,
+               approved: bool = None, start_date: str = None, end_date: str = None,
+               limit: int = None, offset: int = 0, newest_first: bool = False) -> List[tuple]:
+        """
+        Return (file, offset, length) for records matching all given filters.
+        Dates are inclusive "YYYY-MM-DD" strings; symbol / status / reason_code
+        accept a single value or a list.
+        """
+        where, params = self._where(intent_id, symbol, status, reason_code, approved, start_date, end_date)
+        sql = "SELECT file, offset, length FROM decisions" + where
+        sql += " ORDER BY date DESC, offset DESC" if newest_first else " ORDER BY date, offset"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params += [limit, offset]
+
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def count(self, **filters) -> int:
+        """Number of records matching the same filters as locate()."""
+        where, params = self._where(**filters)
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM decisions" + where, params).fetchone()[0]
+
+    def read(self, locations: List[tuple]) -> List[tuple]:
+        """
+        Seek-and-read records (archived days decompress only the covering block).
+        Returns a list of (path, record).
+        """
+        results = []
+        resolved: Dict[str, Optional[str]] = {}
+        for file, offset, length in locations:
+            if file not in resolved:
+                resolved[file] = resolve_log_path(os.path.join(self.decisions_dir, file))
+            path = resolved[file]
+            if path is None:
+                continue
+            try:
+                results.append((path, json.loads(read_range(path, offset, length))))
+            except Exception:
+                continue
+        return results
+
+    def query(self, **filters) -> List[dict]:
+        """Convenience: locate + read, returning records only."""
+        return [record for _, record in self.read(self.locate(**filters))]
+
+
+_indexes: Dict[str, DecisionIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_decision_index(client_id: str) -> DecisionIndex:
+    """
+    Return the process-wide DecisionIndex for a client.
+    """
+    with _indexes_lock:
+        if client_id not in _indexes:
+            _indexes[client_id] = DecisionIndex(client_id)
+        return _indexes[client_id]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or rebuild the decision log index")
+    parser.add_argument("client_ids", nargs="*", help="Clients to index (default: all registered)")
+    parser.add_argument("--rebuild", action="store_true", help="Drop and rebuild instead of incremental refresh")
+    args = parser.parse_args()
+
+    client_ids = args.client_ids
+    if not client_ids:
+        from utils.config_loader import load_client_registry
+        client_ids = list(load_client_registry().keys())
+
+    for client_id in client_ids:
+        index = get_decision_index(client_id)
+        if args.rebuild:
+            count = index.rebuild()
+            print(f"✅ [{client_id}] Rebuilt decision index — {count} records")
+        else:
+            touched = index.refresh()
+            print(f"✅ [{client_id}] Refreshed decision index — {touched} files updated")
+
+
+if __name__ == "__main__":
+    main()
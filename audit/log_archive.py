@@ -0,0 +1,383 @@
+# audit/log_archive.py
+"""
+Audit Log Archive
+=================
+
+Compressed, seekable storage for closed-day JSONL audit logs.
+
+`archive_file("…/2025-06-09.jsonl")` rewrites a day file as
+`2025-06-09.jsonl.gz`: a sequence of independent gzip members, each holding
+~ARCHIVE_BLOCK_BYTES of whole lines. That is still a valid .gz file (zcat,
+gzip.open and pandas can stream it). A hidden sidecar index
+`.2025-06-09.jsonl.gz.idx` records every block's compressed offset plus the
+raw byte and line range it covers, so readers can:
+
+- stream-decompress the whole day (`iter_records`)
+- decompress only the blocks covering a raw byte range (`read_range`, used by
+  the decision index) or a line range (`iter_records(start_line=…)`)
+
+Readers in audit_trail, the decision index and the auditor / risker pages go
+through `iter_records` / `list_log_files`, so they read plain and archived
+days the same way. zstd is not a dependency of this repo; gzip members give
+the same block-level random access with the standard library.
+"""
+
+import os
+import io
+import json
+import glob
+import gzip
+import zlib
+import time
+import hashlib
+from bisect import bisect_right
+from typing import Iterator, List, Optional
+
+ARCHIVE_SUFFIX = ".gz"
+ARCHIVE_BLOCK_BYTES = int(os.getenv("AUDIT_ARCHIVE_BLOCK_BYTES", 256 * 1024))
+ARCHIVE_MIN_AGE_SEC = 10 * 60   # never touch files written in the last 10 minutes
+
+LOG_EXTENSIONS = (".json", ".jsonl", ".jsonl" + ARCHIVE_SUFFIX)
+
+
+# === Paths ===
+
+def index_path(archive_path: str) -> str:
+    directory, name = os.path.split(archive_path)
+    return os.path.join(directory, f".{name}.idx")
+
+
+def is_log_file(name: str) -> bool:
+    return name.endswith(LOG_EXTENSIONS)
+
+
+def plain_name(name: str) -> str:
+    """'2025-06-09.jsonl.gz' → '2025-06-09.jsonl' (unchanged for plain files)."""
+    return name[:-len(ARCHIVE_SUFFIX)] if name.endswith(ARCHIVE_SUFFIX) else name
+
+
+def resolve_log_path(path: str) -> Optional[str]:
+    """
+    Return `path` if it exists, else its archived counterpart, else None.
+    """
+    if os.path.exists(path):
+        return path
+    archived = path + ARCHIVE_SUFFIX
+    return archived if os.path.exists(archived) else None
+
+
+def list_log_files(directory: str, reverse: bool = False) -> List[str]:
+    """
+    Plain and archived log files in a directory, sorted by logical (plain) name.
+    If both exist for a day, the plain file wins.
+    """
+    if not os.path.isdir(directory):
+        return []
+    chosen = {}
+    for name in os.listdir(directory):
+        if name.startswith(".") or not is_log_file(name):
+            continue
+        key = plain_name(name)
+        if key not in chosen or not name.endswith(ARCHIVE_SUFFIX):
+            chosen[key] = name
+    return [os.path.join(directory, chosen[k]) for k in sorted(chosen, reverse=reverse)]
+
+
+# === Writing ===
+
+def _gzip_member(data: bytes) -> bytes:
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+
+def archive_file(path: str, block_bytes: int = ARCHIVE_BLOCK_BYTES) -> Optional[str]:
+    """
+    Compress a closed JSONL file into block-indexed gzip and remove the original.
+
+    Returns:
+        str: archive path, or None if there was nothing to do
+    """
+    if not path.endswith(".jsonl") or not os.path.exists(path):
+        return None
+
+    archive = path + ARCHIVE_SUFFIX
+    tmp = archive + ".tmp"
+    blocks = []             # [comp_offset, comp_length, raw_offset, raw_length, first_line, n_lines]
+    digest = hashlib.sha256()
+    raw_offset = comp_offset = line_no = 0
+
+    with open(path, "rb") as src, open(tmp, "wb") as dst:
+        pending, pending_lines = [], 0
+        pending_bytes = 0
+
+        def flush_block():
+            nonlocal raw_offset, comp_offset, line_no, pending, pending_lines, pending_bytes
+            if not pending:
+                return
+            raw = b"".join(pending)
+            member = _gzip_member(raw)
+            dst.write(member)
+            blocks.append([comp_offset, len(member), raw_offset, len(raw), line_no, pending_lines])
+            comp_offset += len(member)
+            raw_offset += len(raw)
+            line_no += pending_lines
+            pending, pending_lines, pending_bytes = [], 0, 0
+
+        for line in src:
+            digest.update(line)
+            pending.append(line)
+            pending_lines += 1
+            pending_bytes += len(line)
+            if pending_bytes >= block_bytes:
+                flush_block()
+        flush_block()
+
+    # Verify before the plain file is removed
+    with gzip.open(tmp, "rb") as f:
+        if hashlib.sha256(f.read()).hexdigest() != digest.hexdigest():
+            os.remove(tmp)
+            raise IOError(f"Archive verification failed for {path}")
+
+    idx = {
+        "format": "gzip-blocks/1",
+        "source": os.path.basename(path),
+        "raw_size": raw_offset,
+        "lines": line_no,
+        "sha256": digest.hexdigest(),
+        "blocks": blocks
+    }
+    with open(index_path(archive) + ".tmp", "w") as f:
+        json.dump(idx, f)
+    os.replace(index_path(archive) + ".tmp", index_path(archive))
+    os.replace(tmp, archive)
+    os.remove(path)
+    return archive
+
+
+def _closed_day_files(root: str, cutoff: str) -> Iterator[str]:
+    """
+    JSONL files under `root` whose day (file name or parent dir) is before `cutoff`.
+    """
+    for path in glob.glob(os.path.join(root, "**", "*.jsonl"), recursive=True):
+        name = os.path.basename(path)
+        day = name[:10] if name[:10].count("-") == 2 else os.path.basename(os.path.dirname(path))[:10]
+        if day.count("-") == 2 and day < cutoff:
+            yield path
+
+
+def archive_closed_days(cutoff: str, roots: Optional[List[str]] = None, dry_run: bool = False) -> dict:
+    """
+    Archive every daily JSONL file dated before `cutoff` ("YYYY-MM-DD").
+
+    Args:
+        cutoff: First day that stays uncompressed
+        roots: Directories to scan (default: every client's audit/ and audit/user_action_logs)
+
+    Returns:
+        dict: files archived, bytes before/after, failures
+    """
+    if roots is None:
+        roots = sorted(glob.glob(os.path.join("clients", "*", "audit"))) + [os.path.join("audit", "user_action_logs")]
+
+    report = {"files": 0, "raw_bytes": 0, "archived_bytes": 0, "failed": []}
+    now = time.time()
+    for root in roots:
+        for path in _closed_day_files(root, cutoff):
+            if now - os.path.getmtime(path) < ARCHIVE_MIN_AGE_SEC:
+                continue
+            size = os.path.getsize(path)
+            if dry_run:
+                report["files"] += 1
+                report["raw_bytes"] += size
+                continue
+            try:
+                archive = archive_file(path)
+                if archive:
+                    report["files"] += 1
+                    report["raw_bytes"] += size
+                    report["archived_bytes"] += os.path.getsize(archive)
+            except Exception as e:
+                print(f"[⚠️] Failed to archive {path} — {type(e).__name__}: {e}")
+                report["failed"].append(path)
+    return report
+
+
+# === Reading ===
+
+def load_index(archive_path: str) -> Optional[dict]:
+    try:
+        with open(index_path(archive_path), "r") as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def _read_block(f, block) -> bytes:
+    comp_offset, comp_length = block[0], block[1]
+    f.seek(comp_offset)
+    return zlib.decompress(f.read(comp_length), wbits=31)
+
+
+def iter_raw_lines(path: str, start: int = 0) -> Iterator[tuple]:
+    """
+    Yield (raw_offset, line_bytes) for complete lines from raw byte `start`,
+    for plain and archived files alike.
+    """
+    if not path.endswith(ARCHIVE_SUFFIX):
+        with open(path, "rb") as f:
+            f.seek(start)
+            offset = start
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                yield offset, line
+                offset += len(line)
+        return
+
+    idx = load_index(path)
+    if idx is None:
+        offset = 0
+        with gzip.open(path, "rb") as f:
+            for line in f:
+                if offset >= start:
+                    yield offset, line
+                offset += len(line)
+        return
+
+    with open(path, "rb") as f:
+        for block in idx["blocks"]:
+            raw_offset, raw_length = block[2], block[3]
+            if raw_offset + raw_length <= start:
+                continue
+            offset = raw_offset
+            for line in io.BytesIO(_read_block(f, block)):
+                if offset >= start:
+                    yield offset, line
+                offset += len(line)
+
+
+def read_range(path: str, offset: int, length: int) -> bytes:
+    """
+    Raw bytes [offset, offset + length) of a log file, decompressing only the
+    blocks that cover the range when the file is archived.
+    """
+    if not path.endswith(ARCHIVE_SUFFIX):
+        with open(path, "rb") as f:
+            f.seek(offset)
+            return f.read(length)
+
+    idx = load_index(path)
+    if idx is None:
+        with gzip.open(path, "rb") as f:
+            f.seek(offset)
+            return f.read(length)
+
+    starts = [block[2] for block in idx["blocks"]]
+    i = max(bisect_right(starts, offset) - 1, 0)
+    chunks, end = [], offset + length
+    with open(path, "rb") as f:
+        while i < len(idx["blocks"]) and idx["blocks"][i][2] < end:
+            block = idx["blocks"][i]
+            data = _read_block(f, block)
+            lo = max(offset - block[2], 0)
+            hi = min(end - block[2], len(data))
+            chunks.append(data[lo:hi])
+            i += 1
+    return b"".join(chunks)
+
+
+def iter_records(path: str, start_line: int = 0, stop_line: Optional[int] = None) -> Iterator[dict]:
+    """
+    Yield JSON records from a .jsonl, .jsonl.gz or single-record .json file.
+    For archived files with an index, blocks outside [start_line, stop_line)
+    are never decompressed. Malformed lines are skipped.
+    """
+    if path.endswith(".json"):
+        if start_line == 0:
+            try:
+                with open(path, "r") as f:
+                    yield json.load(f)
+            except Exception as e:
+                print(f"[⚠️] Failed to load {path}: {e}")
+        return
+
+    idx = load_index(path) if path.endswith(ARCHIVE_SUFFIX) else None
+    if idx is not None:
+        def block_lines():
+            with open(path, "rb") as f:
+                for block in idx["blocks"]:
+                    first, count = block[4], block[5]
+                    if first + count <= start_line:
+                        continue
+                    if stop_line is not None and first >= stop_line:
+                        return
+                    for n, line in enumerate(io.BytesIO(_read_block(f, block)), start=first):
+                        yield n, line
+        lines = block_lines()
+    else:
+        opener = gzip.open if path.endswith(ARCHIVE_SUFFIX) else open
+        def plain_lines():
+            with opener(path, "rb") as f:
+                yield from enumerate(f)
+        lines = plain_lines()
+
+    for n, line in lines:
+        if n < start_line:
+            continue
+        if stop_line is not None and n >= stop_line:
+            break
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except Exception:
+            continue
+
+
+def read_records(path: str) -> list:
+    """List form of `iter_records` (whole file)."""
+    try:
+        return list(iter_records(path))
+    except Exception as e:
+        print(f"[⚠️] Failed to load {path}: {e}")
+        return []
+
+
+def open_log(path: str):
+    """
+    Text-mode handle for a plain or archived log (archives are stream-decompressed).
+    """
+    if path.endswith(ARCHIVE_SUFFIX):
+        return gzip.open(path, "rt")
+    return open(path, "r")
+
+
+def read_last_record(path: str) -> Optional[dict]:
+    """
+    Last well-formed record of a log file. Archived files only decompress
+    their final block.
+    """
+    if path.endswith(ARCHIVE_SUFFIX):
+        idx = load_index(path)
+        start = idx["blocks"][-1][4] if idx and idx["blocks"] else 0
+    else:
+        start = 0
+    last = None
+    for record in iter_records(path, start_line=start):
+        last = record
+    return last
+
+
+def count_lines(path: str) -> int:
+    """
+    Number of lines in a log file (free for indexed archives).
+    """
+    if path.endswith(ARCHIVE_SUFFIX):
+        idx = load_index(path)
+        if idx is not None:
+            return idx["lines"]
+    if path.endswith(".json"):
+        return 1
+    opener = gzip.open if path.endswith(ARCHIVE_SUFFIX) else open
+    with opener(path, "rb") as f:
+        return sum(1 for _ in f)
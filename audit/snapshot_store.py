@@ -0,0 +1,185 @@
+# audit/snapshot_store.py
+"""
+Portfolio Snapshot Store
+========================
+
+Content-addressed storage for the portfolio snapshots embedded in trade
+decision records.
+
+Instead of a full `portfolio.to_snapshot()` per decision, `AuditLogger.log_trade`
+writes:
+
+    "portfolio_snapshot_ref": {
+        "hash": "<sha256 of a stored base snapshot>",
+        "timestamp": "...",
+        "delta": {"fields": {<changed top-level keys, e.g. capital, exposure>},
+                  "dropped": [<top-level keys no longer present>],
+                  "assets": {<changed or new symbols>}, "removed": [...]}
+    }
+
+Every top-level key except `timestamp` round-trips, so fields added to
+`to_snapshot()` later need no change here.
+
+Base snapshots live once per state version under
+`clients/<client_id>/audit/snapshots/<hh>/<hash>.json`. A new base is stored
+when the delta grows past SNAPSHOT_KEYFRAME_MAX_CHANGED assets, so deltas stay
+small. `audit.audit_trail.load_portfolio_snapshot` rehydrates the full snapshot.
+"""
+
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+SNAPSHOT_KEYFRAME_MAX_CHANGED = int(os.getenv("SNAPSHOT_KEYFRAME_MAX_CHANGED", 8))
+SNAPSHOT_CACHE_SIZE = 64
+
+
+def _canonical(snapshot: dict) -> bytes:
+    return json.dumps(snapshot, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+def diff_snapshot(base: dict, snapshot: dict) -> dict:
+    """
+    Delta that turns `base` into `snapshot` (timestamp excluded).
+    """
+    base_assets = base.get("assets", {})
+    assets = snapshot.get("assets", {})
+    skip = ("timestamp", "assets")
+    return {
+        "fields": {
+            key: value for key, value in snapshot.items()
+            if key not in skip and (key not in base or base[key] != value)
+        },
+        "dropped": [key for key in base if key not in skip and key not in snapshot],
+        "assets": {
+            symbol: info for symbol, info in assets.items()
+            if base_assets.get(symbol) != info
+        },
+        "removed": [symbol for symbol in base_assets if symbol not in assets],
+    }
+
+
+def apply_delta(base: dict, delta: dict) -> dict:
+    """
+    Inverse of `diff_snapshot`: returns a new full snapshot.
+    """
+    snapshot = {key: value for key, value in base.items() if key != "timestamp"}
+    snapshot.update(delta.get("fields", {}))
+    for key in delta.get("dropped", []):
+        snapshot.pop(key, None)
+
+    snapshot["assets"] = dict(base.get("assets", {}))
+    snapshot["assets"].update(delta.get("assets", {}))
+    for symbol in delta.get("removed", []):
+        snapshot["assets"].pop(symbol, None)
+    return snapshot
+
+
+class SnapshotStore:
+    """
+    Per-client content-addressed snapshot store with a small read cache.
+    """
+
+    def __init__(self, client_id: str, root_dir: Optional[str] = None):
+        self.client_id = client_id
+        self.root_dir = root_dir or os.path.join("clients", client_id, "audit", "snapshots")
+        self._cache = OrderedDict()   # hash → base snapshot
+        self._lock = threading.Lock()
+
+        # Current keyframe used by the writer side
+        self._base_hash = None
+        self._base = None
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root_dir, digest[:2], f"{digest}.json")
+
+    def _remember(self, digest: str, snapshot: dict):
+        self._cache[digest] = snapshot
+        self._cache.move_to_end(digest)
+        while len(self._cache) > SNAPSHOT_CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+    def put(self, snapshot: dict) -> str:
+        """
+        Store a base snapshot (timestamp stripped) and return its hash.
+        Identical states map to the same file and are written only once.
+        """
+        base = {k: v for k, v in snapshot.items() if k != "timestamp"}
+        data = _canonical(base)
+        digest = hashlib.sha256(data).hexdigest()
+
+        path = self._path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+                f.flush()
+                # Durable before any (fsynced) decision record can reference it
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+
+        with self._lock:
+            self._remember(digest, base)
+        return digest
+
+    def get(self, digest: str) -> Optional[dict]:
+        with self._lock:
+            if digest in self._cache:
+                self._cache.move_to_end(digest)
+                return self._cache[digest]
+
+        path = self._path(digest)
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            base = json.loads(f.read())
+
+        with self._lock:
+            self._remember(digest, base)
+        return base
+
+    def encode(self, snapshot: dict) -> dict:
+        """
+        Turn a full snapshot into a `portfolio_snapshot_ref` (hash + delta),
+        storing a new keyframe when the delta would get too large.
+        """
+        with self._lock:
+            base_hash, base = self._base_hash, self._base
+
+        delta = diff_snapshot(base, snapshot) if base is not None else None
+        if delta is None or len(delta["assets"]) + len(delta["removed"]) > SNAPSHOT_KEYFRAME_MAX_CHANGED:
+            base_hash = self.put(snapshot)
+            base = self.get(base_hash)
+            with self._lock:
+                self._base_hash, self._base = base_hash, base
+            delta = diff_snapshot(base, snapshot)
+
+        return {"hash": base_hash, "timestamp": snapshot.get("timestamp"), "delta": delta}
+
+    def decode(self, ref: dict) -> Optional[dict]:
+        """
+        Rehydrate a full snapshot from a `portfolio_snapshot_ref`.
+        """
+        base = self.get(ref.get("hash", ""))
+        if base is None:
+            return None
+        snapshot = apply_delta(base, ref.get("delta", {}))
+        return {"timestamp": ref.get("timestamp"), **snapshot}
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_snapshot_store(client_id: str) -> SnapshotStore:
+    """
+    Return the process-wide SnapshotStore for a client.
+    """
+    with _stores_lock:
+        if client_id not in _stores:
+            _stores[client_id] = SnapshotStore(client_id)
+        return _stores[client_id]
@@ -0,0 +1,238 @@
+# core/async_market_data.py
+
+"""
+AsyncMarketDataFetcher — Non-Blocking Market Data Access
+========================================================
+
+Async counterpart of `core.market_data.MarketDataFetcher` for the intraday
+scan path, where many clients request overlapping symbols at the same time.
+
+- One shared aiohttp session for all requests
+- Per-provider cap on in-flight requests (asyncio.Semaphore)
+- Every request first takes a token from the provider's process-wide
+  ProviderRequestScheduler bucket, so async and synchronous callers share
+  one rate limit
+- Single-flight coalescing: concurrent requests for the same key share one
+  future, so 50 clients asking for AAPL history trigger one HTTP call
+- Shares the process-wide HistoryCache and the on-disk PriceStore with the
+  synchronous fetcher; PriceStore reads/writes run in worker threads
+  (asyncio.to_thread) so disk I/O never stalls the event loop
+
+Endpoints are configurable so the fetcher can be pointed at a local stub
+server (see dev_tools/benchmark_async_scan.py).
+"""
+
+import os
+import asyncio
+from typing import Dict, Optional
+
+import aiohttp
+import pandas as pd
+from dotenv import load_dotenv
+
+from core.history_cache import get_history_cache
+from core.price_store import PriceStore
+from core.request_scheduler import ProviderRequestScheduler, get_provider_scheduler
+from utils.time_utils import get_timestamps
+
+load_dotenv()
+
+ALPHA_VANTAGE_URL = os.getenv("ALPHA_VANTAGE_URL", "https://www.alphavantage.co/query")
+ALPACA_DATA_URL = os.getenv("APCA_DATA_URL", "https://data.alpaca.markets")
+
+# Default in-flight request caps per provider
+DEFAULT_MAX_IN_FLIGHT = {"alpaca": 8, "alphavantage": 2}
+
+HISTORY_LOOKBACK = 100
+
+
+class AsyncMarketDataFetcher:
+    """
+    Async market data client. Use as an async context manager:
+
+        async with AsyncMarketDataFetcher() as market:
+            prices = await market.get_prices(["AAPL", "SPY"])
+    """
+
+    def __init__(self, alpaca_data_url: str = ALPACA_DATA_URL, alpha_vantage_url: str = ALPHA_VANTAGE_URL,
+                 max_in_flight: Optional[Dict[str, int]] = None, session: Optional[aiohttp.ClientSession] = None,
+                 store: Optional[PriceStore] = None,
+                 schedulers: Optional[Dict[str, ProviderRequestScheduler]] = None):
+        self.alpaca_data_url = alpaca_data_url.rstrip("/")
+        self.alpha_vantage_url = alpha_vantage_url
+        self.alpaca_headers = {
+            "APCA-API-KEY-ID": os.getenv("APCA_API_KEY_ID", ""),
+            "APCA-API-SECRET-KEY": os.getenv("APCA_API_SECRET_KEY", "")
+        }
+        self.alpha_vantage_key = os.getenv("ALPHA_VANTAGE_API_KEY", "")
+
+        caps = {**DEFAULT_MAX_IN_FLIGHT, **(max_in_flight or {})}
+        self._semaphores = {name: asyncio.Semaphore(cap) for name, cap in caps.items()}
+        self._schedulers = {name: get_provider_scheduler(name) for name in caps}
+        self._schedulers.update(schedulers or {})
+        self._in_flight: Dict[tuple, asyncio.Future] = {}
+
+        self._session = session
+        self._owns_session = session is None
+
+        self.store = store or PriceStore()
+        self.history_cache = get_history_cache()
+
+        self.timestamps = get_timestamps()
+        self.now_ny = self.timestamps["now_ny"]
+        self.today_str = self.timestamps["date_str"]
+
+        # Counters for benchmarking / monitoring
+        self.http_requests = 0
+        self.coalesced = 0
+
+    async def __aenter__(self):
+        if self._session is None:
+            self._session = aiohttp.ClientSession()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    # === Plumbing ===
+
+    async def _get_json(self, provider: str, url: str, params: dict = None, headers: dict = None) -> dict:
+        if self._session is None:
+            self._session = aiohttp.ClientSession()
+        async with self._semaphores[provider]:
+            await self._schedulers[provider].acquire_async()
+            self.http_requests += 1
+            async with self._session.get(url, params=params, headers=headers) as resp:
+                resp.raise_for_status()
+                return await resp.json()
+
+    async def _single_flight(self, key: tuple, factory):
+        """
+        Run `factory()` once for all concurrent callers sharing `key`.
+        """
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending)
+
+        task = asyncio.ensure_future(factory())
+        self._in_flight[key] = task
+        task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(task)
+
+    # === Latest prices ===
+
+    async def get_prices(self, symbols: list) -> dict:
+        """
+        Latest price for many symbols in one snapshot request.
+
+        Returns:
+            dict: symbol → {'price': float or None, 'timestamp': ISO timestamp or None}
+        """
+        results = {symbol: {"price": None, "timestamp": None} for symbol in symbols}
+        if not symbols:
+            return results
+
+        key = ("prices", tuple(sorted(s.upper() for s in symbols)))
+        try:
+            snapshots = await self._single_flight(key, lambda: self._get_json(
+                "alpaca",
+                f"{self.alpaca_data_url}/v2/stocks/snapshots",
+                params={"symbols": ",".join(key[1]), "feed": "iex"},
+                headers=self.alpaca_headers
+            ))
+        except Exception as e:
+            print(f"Failed to fetch real-time prices for {len(symbols)} symbols: {e}")
+            return results
+
+        for symbol in results:
+            trade = (snapshots.get(symbol.upper()) or {}).get("latestTrade")
+            if not trade:
+                continue
+            ts_ny = pd.to_datetime(trade["t"]).tz_convert(self.now_ny.tzinfo).isoformat()
+            results[symbol] = {"price": round(float(trade["p"]), 2), "timestamp": ts_ny}
+        return results
+
+    async def get_price(self, symbol: str) -> dict:
+        return (await self.get_prices([symbol]))[symbol]
+
+    # === Daily history ===
+
+    async def get_price_history_100d(self, symbol: str) -> pd.DataFrame:
+        """
+        Async equivalent of `MarketDataFetcher.get_price_history_100d`.
+        """
+        cached = self.history_cache.get(symbol, self.today_str, HISTORY_LOOKBACK)
+        if cached is not None:
+            return cached
+
+        df, fresh = await self._single_flight(("history", symbol.upper()), lambda: self._load_history(symbol))
+        if fresh:
+            self.history_cache.put(symbol, self.today_str, HISTORY_LOOKBACK, df)
+        return df.copy()
+
+    def _fresh_history(self, symbol: str) -> Optional[pd.DataFrame]:
+        """Stored bars if already fetched today (blocking; run in a worker thread)."""
+        if self.store.get_last_fetch_date(symbol) == self.today_str:
+            df = self.store.to_frame(symbol, HISTORY_LOOKBACK)
+            if not df.empty:
+                return df
+        return None
+
+    def _save_history(self, symbol: str, df: pd.DataFrame) -> pd.DataFrame:
+        """Upsert fetched bars and return the stored window (blocking; run in a worker thread)."""
+        self.store.append(symbol, df)
+        self.store.set_last_fetch_date(symbol, self.today_str)
+        return self.store.to_frame(symbol, HISTORY_LOOKBACK)
+
+    async def _load_history(self, symbol: str) -> tuple:
+        """
+        Returns:
+            (DataFrame, bool): history window, and whether it is today's fetch
+        """
+        df = await asyncio.to_thread(self._fresh_history, symbol)
+        if df is not None:
+            return df, True
+
+        try:
+            payload = await self._get_json("alphavantage", self.alpha_vantage_url, params={
+                "function": "TIME_SERIES_DAILY",
+                "symbol": symbol,
+                "outputsize": "compact",
+                "apikey": self.alpha_vantage_key
+            })
+            series = payload.get("Time Series (Daily)")
+            if not series:
+                raise ValueError(payload.get("Note") or payload.get("Information") or "empty time series")
+
+            df = pd.DataFrame.from_dict(series, orient="index").rename(columns={
+                "1. open": "open",
+                "2. high": "high",
+                "3. low": "low",
+                "4. close": "close",
+                "5. volume": "volume"
+            }).astype(float)
+            df.index = pd.to_datetime(df.index).tz_localize("UTC").tz_convert(self.now_ny.tzinfo)
+            df.index.name = "date"
+            df = df.sort_index().reset_index()
+
+            return await asyncio.to_thread(self._save_history, symbol, df), True
+
+        except Exception as e:
+            print(f"API error fetching data for {symbol}: {e}")
+            return await asyncio.to_thread(self.store.to_frame, symbol, HISTORY_LOOKBACK), False
+
+    async def get_price_history_multi(self, symbols: list) -> dict:
+        """
+        Fetch 100-day history for many symbols concurrently.
+
+        Returns:
+            dict: symbol → DataFrame (symbols without data are omitted)
+        """
+        frames = await asyncio.gather(*(self.get_price_history_100d(s) for s in symbols))
+        return {s: df for s, df in zip(symbols, frames) if df is not None and not df.empty}
@@ -11,7 +11,7 @@ def get_client_context_selector(ctx: "RequestContext") -> ClientContext:
     - Admin users can view all clients
     - Other users are restricted to their assigned_clients only
     """
-    registry = load_client_registry()
+    registry = load_client_registry(frozen=True)
     all_clients = list(registry.keys())
 
     if ctx.role == "admin":
@@ -22,9 +22,14 @@ class SystemGuard:
         self.heartbeat_key = "system_guard_last_check"
 
     def check_price_feed(self) -> bool:
+        """
+        Heartbeat the price feed with one batch request over the client's
+        held symbols (AAPL if nothing is held). Healthy if any price returns.
+        """
+        symbols = list(self.ctx.portfolio_state.get("assets", {}).keys()) or ["AAPL"]
         try:
-            result = self.fetcher.get_price("AAPL")
-            return result["price"] is not None
+            results = self.fetcher.get_prices(symbols)
+            return any(r["price"] is not None for r in results.values())
         except Exception as e:
             logger.warning(f"[SystemGuard] Price feed failure: {e}")
             return False
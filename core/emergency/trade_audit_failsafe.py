@@ -1,5 +1,6 @@
 # core/emergency/trade_audit_failsafe.py
 
+from audit.audit_writer import flush_audit_writer
 from core.client_context import ClientContext
 
 class TradeAuditFailSafe:
@@ -18,6 +19,10 @@ class TradeAuditFailSafe:
         Checks whether the audit record was properly written.
         Returns (allowed: bool, reason: str)
         """
+        # Audit lines may still be queued in the buffered writer — make them durable first
+        if not flush_audit_writer():
+            return False, "❌ Audit log could not be flushed to disk. Trade blocked by TradeAuditFailSafe."
+
         record = getattr(self.ctx, "latest_audit_record", None)
 
         if not record:
@@ -27,7 +27,8 @@ class DryRunExecutor(BaseExecutor):
             - Identify as DryRunExecutor in the context
 
         Step 2. 📈 Fetch market price  
-            - Get current price and timestamp from market provider
+            - Get current price and timestamp from market provider  
+            - Via market.get_prices(), the same batch quote path used by live_updater
 
         Step 3. 💸 Simulate slippage  
             - Apply ±0.1% price adjustment based on buy/sell direction  
@@ -0,0 +1,118 @@
+# core/history_cache.py
+
+"""
+HistoryCache — Process-Wide Price History Cache
+===============================================
+
+Every ClientContext, strategy module, rebalancer and signal factory builds its
+own MarketDataFetcher. This cache sits behind all of them so a symbol's daily
+history is loaded once per process per day, no matter how many components ask.
+
+- Keyed by (symbol, date_str, lookback)
+- Thread-safe (intraday scans run in a thread pool)
+- Bounded by total DataFrame bytes, evicting least-recently-used entries
+- Entries expire after a TTL
+- Hit / miss / eviction counters for monitoring
+"""
+
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import pandas as pd
+
+DEFAULT_MAX_BYTES = int(os.getenv("HISTORY_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+DEFAULT_TTL_SEC = int(os.getenv("HISTORY_CACHE_TTL_SEC", 6 * 3600))
+
+
+class HistoryCache:
+    """
+    Thread-safe LRU cache of price history DataFrames with a byte-size cap.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, ttl_sec: int = DEFAULT_TTL_SEC):
+        self.max_bytes = max_bytes
+        self.ttl_sec = ttl_sec
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()  # key → (df, nbytes, stored_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, symbol: str, date_str: str, lookback: int) -> Optional[pd.DataFrame]:
+        """
+        Return a private copy of the cached frame, or None on miss / expiry.
+        A copy is returned because callers add indicator columns in place.
+        """
+        key = (symbol, date_str, lookback)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[2] > self.ttl_sec:
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            df = entry[0]
+        return df.copy()
+
+    def put(self, symbol: str, date_str: str, lookback: int, df: pd.DataFrame):
+        """
+        Store a copy of `df`. Empty frames and frames larger than the cap are skipped.
+        """
+        if df is None or df.empty:
+            return
+        stored = df.copy()
+        nbytes = int(stored.memory_usage(deep=True).sum())
+        if nbytes > self.max_bytes:
+            return
+
+        key = (symbol, date_str, lookback)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (stored, nbytes, time.monotonic())
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes and self._entries:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def _drop(self, key: tuple):
+        # Caller must hold the lock
+        _, nbytes, _ = self._entries.pop(key)
+        self._bytes -= nbytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        """Return counters and current footprint."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes
+            }
+
+
+_history_cache = HistoryCache()
+
+
+def get_history_cache() -> HistoryCache:
+    """
+    Return the process-wide HistoryCache shared by every MarketDataFetcher.
+    """
+    return _history_cache
@@ -11,7 +11,10 @@ from alpha_vantage.timeseries import TimeSeries
 from alpaca_trade_api.rest import REST
 
 # Internal utility modules
-from utils.asset_utils import get_asset_category
+from core.history_cache import get_history_cache
+from core.price_store import PriceStore
+from core.quote_providers import AlpacaSnapshotProvider
+from core.request_scheduler import get_provider_scheduler
 from utils.time_utils import get_timestamps
 
 # Load API keys from .env file for external services
@@ -27,6 +30,9 @@ ALPACA_SECRET_KEY = os.getenv("APCA_API_SECRET_KEY")
 BASE_URL = os.getenv("APCA_API_BASE_URL", "https://paper-api.alpaca.markets")
 alpaca_api = REST(ALPACA_API_KEY, ALPACA_SECRET_KEY, base_url=BASE_URL)
 
+# Number of daily bars served by get_price_history_100d
+HISTORY_LOOKBACK = 100
+
 
 class MarketDataFetcher:
     """
@@ -35,10 +41,22 @@ class MarketDataFetcher:
     intraday bars, and 100-day daily history with local caching and fallback logic.
     """
 
-    def __init__(self, provider="alphavantage"):
+    def __init__(self, provider="alphavantage", quote_provider=None):
         # Default provider is Alpha Vantage (used for daily price history)
         self.provider = provider
 
+        # Latest-price source (Alpaca snapshots by default; swap in a fake for tests)
+        self.quote_provider = quote_provider or AlpacaSnapshotProvider(alpaca_api)
+
+        # Local bar store (one memory-mapped file per symbol)
+        self.store = PriceStore()
+
+        # Process-wide history cache shared by every fetcher instance
+        self.history_cache = get_history_cache()
+
+        # Process-wide rate-limited queue for Alpha Vantage history requests
+        self.history_scheduler = get_provider_scheduler("alphavantage")
+
         # Capture current timestamp info for use in data requests
         self.timestamps = get_timestamps()
         self.now_ny = self.timestamps["now_ny"]
@@ -46,7 +64,7 @@ class MarketDataFetcher:
 
     def get_price(self, symbol: str) -> dict:
         """
-        Fetch the latest market price for a given symbol using Alpaca's live API.
+        Fetch the latest market price for a given symbol.
 
         Args:
             symbol (str): Ticker symbol (e.g., 'AAPL')
@@ -54,15 +72,40 @@ class MarketDataFetcher:
         Returns:
             dict: {'price': float or None, 'timestamp': ISO timestamp or None}
         """
+        return self.get_prices([symbol])[symbol]
+
+    def get_prices(self, symbols: list) -> dict:
+        """
+        Fetch the latest market price for many symbols in one provider round-trip.
+
+        Args:
+            symbols (list): Ticker symbols
+
+        Returns:
+            dict: symbol → {'price': float or None, 'timestamp': ISO timestamp or None}
+                  (every requested symbol is present; unpriced ones carry None)
+        """
+        results = {symbol: {"price": None, "timestamp": None} for symbol in symbols}
+        if not symbols:
+            return results
+
         try:
-            trade = alpaca_api.get_latest_trade(symbol)
-            price = round(trade.price, 2)
-            ts_ny = pd.to_datetime(trade.timestamp).tz_convert(self.now_ny.tzinfo).isoformat()
-            print(f"{symbol} latest price: {price} @ {ts_ny}")
-            return {"price": price, "timestamp": ts_ny}
+            trades = self.quote_provider.get_latest_trades(list(results.keys()))
         except Exception as e:
-            print(f"Failed to fetch real-time price for {symbol}: {e}")
-            return {"price": None, "timestamp": None}
+            print(f"Failed to fetch real-time prices for {len(symbols)} symbols: {e}")
+            return results
+
+        for symbol in results:
+            trade = trades.get(symbol.upper())
+            if trade is None:
+                print(f"No real-time price returned for {symbol}")
+                continue
+            price, timestamp = trade
+            ts_ny = pd.to_datetime(timestamp).tz_convert(self.now_ny.tzinfo).isoformat()
+            results[symbol] = {"price": round(price, 2), "timestamp": ts_ny}
+
+        print(f"Fetched latest prices for {sum(r['price'] is not None for r in results.values())}/{len(results)} symbols")
+        return results
 
     def get_intraday(self, symbol: str) -> pd.DataFrame:
         """
@@ -111,8 +154,10 @@ class MarketDataFetcher:
         """
         Fetch 100-day daily price history for a given symbol.
 
-        Uses locally cached data if available. Falls back to Alpha Vantage otherwise,
-        and saves the result for future use.
+        Checks the process-wide HistoryCache first, so every fetcher instance
+        in the process shares one load per symbol per day. On a miss, serves
+        the PriceStore if it was refreshed today, otherwise fetches from
+        Alpha Vantage through the rate-limited request scheduler.
 
         Args:
             symbol (str): Ticker symbol
@@ -120,57 +165,94 @@ class MarketDataFetcher:
         Returns:
             pd.DataFrame: DataFrame with daily OHLCV values or empty on failure
         """
-        category = get_asset_category(symbol)
-        save_dir = os.path.join("market_data", category.lower(), self.today_str)
-        file_name = f"{symbol}_last_100_days.csv"
-        save_path = os.path.join(save_dir, file_name)
-
-        if os.path.exists(save_path):
-            try:
-                print(f"Loading local data for {symbol} from {save_path}")
-                return pd.read_csv(save_path)
-            except Exception as e:
-                print(f"Failed to load local file for {symbol}: {e}, falling back to API")
-
-        try:
-            print(f"Fetching daily price data for {symbol} from Alpha Vantage...")
-            data, meta = ts.get_daily(symbol=symbol, outputsize='compact')
-            df = data.rename(columns={
-                "1. open": "open",
-                "2. high": "high",
-                "3. low": "low",
-                "4. close": "close",
-                "5. volume": "volume"
-            })
-            df.index.name = "date"
-            df = df.sort_index()
-            df.index = pd.to_datetime(df.index)
-            df.index = df.index.tz_localize("UTC").tz_convert(self.now_ny.tzinfo)
-            df_reset = df.reset_index()
-
-            os.makedirs(save_dir, exist_ok=True)
-            df_reset.to_csv(save_path, index=False)
-            print(f"{symbol} history saved to {save_path}")
-            return df_reset
+        return self.get_price_history_multi([symbol]).get(symbol, pd.DataFrame())
 
-        except Exception as e:
-            print(f"API error fetching data for {symbol}: {e}")
-            return pd.DataFrame()
+    def _get_local_history(self, symbol: str) -> pd.DataFrame:
+        """
+        Return today's history from the in-process cache or the PriceStore,
+        or None if the symbol still needs an API refresh.
+        """
+        cached = self.history_cache.get(symbol, self.today_str, HISTORY_LOOKBACK)
+        if cached is not None:
+            return cached
+
+        if self.store.get_last_fetch_date(symbol) == self.today_str:
+            df = self.store.to_frame(symbol, HISTORY_LOOKBACK)
+            if not df.empty:
+                self.history_cache.put(symbol, self.today_str, HISTORY_LOOKBACK, df)
+                return df
+        return None
+
+    def _fetch_history(self, symbol: str) -> pd.DataFrame:
+        """
+        Fetch compact daily history from Alpha Vantage, upsert it into the
+        PriceStore (new and revised bars) and return the trailing window.
 
-    def get_price_history_multi(self, symbols: list) -> dict:
+        Raises on API errors or throttling; the scheduler retries the
+        transient ones (see request_scheduler.is_transient).
+        """
+        print(f"Fetching daily price data for {symbol} from Alpha Vantage...")
+        data, meta = ts.get_daily(symbol=symbol, outputsize='compact')
+        df = data.rename(columns={
+            "1. open": "open",
+            "2. high": "high",
+            "3. low": "low",
+            "4. close": "close",
+            "5. volume": "volume"
+        })
+        if df.empty:
+            raise ValueError("empty time series")
+        df.index.name = "date"
+        df = df.sort_index()
+        df.index = pd.to_datetime(df.index)
+        df.index = df.index.tz_localize("UTC").tz_convert(self.now_ny.tzinfo)
+        df_reset = df.reset_index()
+
+        appended = self.store.append(symbol, df_reset)
+        self.store.set_last_fetch_date(symbol, self.today_str)
+        print(f"{symbol} history: {appended} new or revised bars written to price store")
+        return self.store.to_frame(symbol, HISTORY_LOOKBACK)
+
+    def get_price_history_multi(self, symbols: list, priority_symbols: list = None) -> dict:
         """
         Fetch 100-day historical price data for multiple symbols.
 
+        Symbols not already fresh locally are queued on the Alpha Vantage
+        scheduler, which respects the provider rate limit, serves
+        `priority_symbols` (e.g. open positions) first and retries with
+        backoff. Symbols that still fail fall back to the last stored bars.
+
         Args:
             symbols (list): List of ticker symbols
+            priority_symbols (list): Symbols to fetch first
 
         Returns:
             dict: Mapping of symbol → DataFrame
         """
+        frames = {}
+        pending = []
+        for symbol in symbols:
+            df = self._get_local_history(symbol)
+            if df is None:
+                pending.append(symbol)
+            else:
+                frames[symbol] = df
+
+        if pending:
+            fetched = self.history_scheduler.run(pending, self._fetch_history, priority_symbols)
+            for symbol in pending:
+                df = fetched.get(symbol)
+                if df is not None and not df.empty:
+                    self.history_cache.put(symbol, self.today_str, HISTORY_LOOKBACK, df)
+                else:
+                    df = self.store.to_frame(symbol, HISTORY_LOOKBACK)
+                    if not df.empty:
+                        print(f"Serving last stored history for {symbol}")
+                frames[symbol] = df
+
         results = {}
         for symbol in symbols:
-            df = self.get_price_history_100d(symbol)
+            df = frames.get(symbol)
             if df is not None and not df.empty:
                 results[symbol] = df
         return results
-
@@ -1,7 +1,8 @@
 # core/passive/portfolio_delta.py
 
 from dataclasses import dataclass
-from typing import Dict, List
+from typing import Dict, List, Optional
+from core.portfolio.portfolio import Portfolio
 from utils.config_loader import ConfigLoader
 
 
@@ -42,7 +43,8 @@ class ExposureDelta:
         return self.action in ["buy", "sell"] and self.quantity > 0
 
 
-def compute_portfolio_delta(client_id: str, target_weights: Dict[str, float]) -> List[ExposureDelta]:
+def compute_portfolio_delta(client_id: str, target_weights: Dict[str, float],
+                            portfolio: Optional[Portfolio] = None) -> List[ExposureDelta]:
     """
     Passive rebalancing engine.
 
@@ -52,24 +54,18 @@ def compute_portfolio_delta(client_id: str, target_weights: Dict[str, float]) ->
     Args:
         client_id (str): Unique identifier for the client
         target_weights (dict): Mapping of asset symbols to target portfolio weights (0.0–1.0)
+        portfolio (Portfolio): Live portfolio to read running totals from
+            (default: load the client's persisted state)
 
     Returns:
         List[ExposureDelta]: Rebalancing actions for each relevant asset
     """
-    loader = ConfigLoader(client_id)
-    assets = loader.portfolio_state.get("assets", {})
-    capital = loader.portfolio_state.get("capital", 0.0)
+    if portfolio is None:
+        portfolio = Portfolio(ConfigLoader(client_id).portfolio_state)
+    assets = portfolio.assets
 
-    current_value_map = {}
-    net_value = capital  # Start with cash; will add asset values next
-
-    # Step 1: Calculate current market value of each held asset
-    for symbol, info in assets.items():
-        pos = info.get("position", 0)
-        price = info.get("current_price", 0)
-        value = pos * price
-        current_value_map[symbol] = {"position": pos, "price": price, "value": value}
-        net_value += value
+    # Step 1: Net value from the portfolio's running totals (cash + market value)
+    net_value = portfolio.estimate_net_value()
 
     deltas = []
 
@@ -77,9 +73,9 @@ def compute_portfolio_delta(client_id: str, target_weights: Dict[str, float]) ->
     for symbol, target_weight in target_weights.items():
         target_value = target_weight * net_value
 
-        current = current_value_map.get(symbol, {"position": 0, "price": 0.0, "value": 0.0})
-        current_value = current["value"]
-        current_price = current["price"]
+        info = assets.get(symbol)
+        current_price = info.get("current_price", 0) if info is not None else 0.0
+        current_value = portfolio.exposure.values.get(symbol, 0.0)
 
         delta_value = target_value - current_value
         quantity = int(abs(delta_value) // current_price) if current_price > 0 else 0
@@ -66,7 +66,7 @@ class PassiveRebalancer:
         - Risk score below a defensive threshold
         """
         log = NetValueLogger(self.client_id)
-        records = log.read_recent(10)
+        records = log.read_daily(10)  # one (EOD) record per day
 
         if len(records) < 5:
             return False
@@ -114,7 +114,7 @@ class PassiveRebalancer:
         """
         Compare current holdings with target weights to compute deltas.
         """
-        self.deltas = compute_portfolio_delta(self.client_id, self.target_weights)
+        self.deltas = compute_portfolio_delta(self.client_id, self.target_weights, self.ctx.portfolio)
 
     def build_trade_intents(self):
         """
@@ -23,6 +23,11 @@ class RiskSignalFactory:
         self.client = ClientContext(client_id)
         self.state = self.client.portfolio_state
 
+        # confidence → (VaR, CVaR) for the net value window in _tail_window,
+        # shared by estimate_var / estimate_cvar
+        self._tail_window = None
+        self._tail_cache = {}
+
     def estimate_volatility(self) -> float:
         """
         Estimate annualized volatility from recent 10-day net value series.
@@ -36,30 +41,43 @@ class RiskSignalFactory:
         daily_vol = np.std(returns)
         return round(daily_vol * np.sqrt(252), 4)
 
+    def _tail_risk(self, confidence: float) -> tuple:
+        """
+        Compute (VaR, CVaR) together from the 20-day net value window.
+        The percentile is taken once per confidence level and window, so a
+        new net value bar invalidates the memoized result.
+        """
+        net_values = self.state.get("historical_net_value", [])[-20:]
+        window = tuple(net_values)
+        if window != self._tail_window:
+            self._tail_window = window
+            self._tail_cache = {}
+        elif confidence in self._tail_cache:
+            return self._tail_cache[confidence]
+
+        if len(net_values) < 2:
+            result = (-0.02, -0.03)
+        else:
+            returns = np.diff(net_values) / net_values[:-1]
+            threshold = np.percentile(returns, (1 - confidence) * 100)
+            result = (round(threshold, 4), round(returns[returns <= threshold].mean(), 4))
+
+        self._tail_cache[confidence] = result
+        return result
+
     def estimate_var(self, confidence=0.95) -> float:
         """
         Estimate Value-at-Risk (VaR) from recent net value changes.
         Returns the 5th percentile of 20-day return distribution by default.
         """
-        net_values = self.state.get("historical_net_value", [])[-20:]
-        if len(net_values) < 2:
-            return -0.02
-        returns = np.diff(net_values) / net_values[:-1]
-        var = np.percentile(returns, (1 - confidence) * 100)
-        return round(var, 4)
+        return self._tail_risk(confidence)[0]
 
     def estimate_cvar(self, confidence=0.95) -> float:
         """
         Estimate Conditional VaR (CVaR) from recent net value history.
         Computes average of returns worse than the VaR threshold.
         """
-        net_values = self.state.get("historical_net_value", [])[-20:]
-        if len(net_values) < 2:
-            return -0.03
-        returns = np.diff(net_values) / net_values[:-1]
-        threshold = np.percentile(returns, (1 - confidence) * 100)
-        cvar = returns[returns <= threshold].mean()
-        return round(cvar, 4)
+        return self._tail_risk(confidence)[1]
 
     def build_signal(self, regime: Optional[str] = "Neutral") -> RiskSignalSet:
         """
@@ -0,0 +1,251 @@
+# core/portfolio/exposure.py
+
+import os
+from typing import Callable, Dict, Mapping, Optional
+
+# Re-verify running totals against a full recomputation after every update
+PORTFOLIO_DEBUG_TOTALS = os.getenv("PORTFOLIO_DEBUG_TOTALS", "0") == "1"
+
+# Absolute tolerance (in account currency) for the debug consistency check
+TOTALS_TOLERANCE = 0.01
+
+UNCATEGORIZED = "Uncategorized"
+
+# Asset fields that feed the running totals
+VALUE_FIELDS = ("position", "current_price")
+
+
+class TrackedAsset(dict):
+    """
+    Plain asset dict that reports every write to the owning Portfolio as
+    on_change(symbol, field) (field None: several fields), so running totals
+    and the state journal follow direct `state["assets"][symbol][...] = ...`
+    edits. Copies and pickles are plain dicts.
+    """
+
+    __slots__ = ("symbol", "on_change")
+
+    def __init__(self, symbol: str, values, on_change: Callable[[str, Optional[str]], None]):
+        super().__init__(values)
+        self.symbol = symbol
+        self.on_change = on_change
+
+    def __reduce__(self):
+        return dict, (dict(self),)
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.on_change(self.symbol, key)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.on_change(self.symbol, key)
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def pop(self, key, *default):
+        present = key in self
+        value = super().pop(key, *default)
+        if present:
+            self.on_change(self.symbol, key)
+        return value
+
+    def popitem(self):
+        key, value = super().popitem()
+        self.on_change(self.symbol, key)
+        return key, value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self.on_change(self.symbol, None)
+
+    def clear(self):
+        super().clear()
+        self.on_change(self.symbol, None)
+
+
+class TrackedAssets(dict):
+    """
+    symbol → TrackedAsset mapping for state["assets"] (dict book). Adding,
+    replacing or removing an asset reports on_change(symbol, None) to the
+    owning Portfolio.
+    """
+
+    __slots__ = ("on_change",)
+
+    def __init__(self, assets: Mapping, on_change: Callable[[str, Optional[str]], None]):
+        super().__init__()
+        self.on_change = on_change
+        for symbol, info in assets.items():
+            super().__setitem__(symbol, self._wrap(symbol, info))
+
+    def __reduce__(self):
+        return dict, ({symbol: dict(info) for symbol, info in self.items()},)
+
+    def _wrap(self, symbol: str, info):
+        if isinstance(info, TrackedAsset) and info.symbol == symbol and info.on_change == self.on_change:
+            return info
+        return TrackedAsset(symbol, info, self.on_change)
+
+    def __setitem__(self, symbol, info):
+        super().__setitem__(symbol, self._wrap(symbol, info))
+        self.on_change(symbol, None)
+
+    def __delitem__(self, symbol):
+        super().__delitem__(symbol)
+        self.on_change(symbol, None)
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def pop(self, symbol, *default):
+        present = symbol in self
+        value = super().pop(symbol, *default)
+        if present:
+            self.on_change(symbol, None)
+        return value
+
+    def popitem(self):
+        symbol, info = super().popitem()
+        self.on_change(symbol, None)
+        return symbol, info
+
+    def setdefault(self, symbol, default=None):
+        if symbol not in self:
+            self[symbol] = {} if default is None else default
+        return self[symbol]
+
+    def update(self, *args, **kwargs):
+        for symbol, info in dict(*args, **kwargs).items():
+            self[symbol] = info
+
+    def clear(self):
+        symbols = list(self)
+        super().clear()
+        for symbol in symbols:
+            self.on_change(symbol, None)
+
+
+class ExposureTracker:
+    """
+    ExposureTracker
+    ===============
+    Running market-value totals for a portfolio, updated in O(1) per
+    position or price change:
+
+    - market_value      Σ position × price
+    - long / short      Σ of positive / |negative| position values
+    - category_value    category → Σ value of its held assets
+    - holdings          category → {symbol: value} (held assets only)
+
+    Portfolio calls `update()` whenever an asset's position or price is
+    written (TrackedAsset / PositionBook change hooks); `rebuild()` recomputes
+    everything from the asset dicts (initial load, or after state["assets"]
+    was replaced wholesale).
+    """
+
+    def __init__(self, category_map: Optional[Mapping[str, str]] = None):
+        self.category_map = category_map or {}
+        self._categories: Dict[str, str] = {}
+        self.values: Dict[str, float] = {}
+        self.market_value = 0.0
+        self.long_value = 0.0
+        self.short_value = 0.0
+        self.category_value: Dict[str, float] = {}
+        self.holdings: Dict[str, Dict[str, float]] = {}
+
+    def category(self, symbol: str) -> str:
+        category = self._categories.get(symbol)
+        if category is None:
+            category = self._categories[symbol] = self.category_map.get(symbol.upper(), UNCATEGORIZED)
+        return category
+
+    def update(self, symbol: str, position: float, price: float):
+        """Replace a symbol's contribution with position × price."""
+        new = (position or 0) * (price or 0.0)
+        old = self.values.get(symbol, 0.0)
+        if new == old:
+            return
+
+        self.market_value += new - old
+        if old >= 0 and new >= 0:
+            self.long_value += new - old
+        else:
+            self.long_value += max(new, 0.0) - max(old, 0.0)
+            self.short_value += max(-new, 0.0) - max(-old, 0.0)
+
+        category = self.category(symbol)
+        held = self.holdings.get(category)
+        if old > 0:
+            self.category_value[category] -= old
+            del held[symbol]
+        if new > 0:
+            if held is None:
+                held = self.holdings[category] = {}
+            self.category_value[category] = self.category_value.get(category, 0.0) + new
+            held[symbol] = new
+        if held is not None and not held:
+            del self.holdings[category]
+            self.category_value.pop(category, None)
+
+        if new:
+            self.values[symbol] = new
+        else:
+            del self.values[symbol]
+
+    def remove(self, symbol: str):
+        self.update(symbol, 0, 0.0)
+
+    def rebuild(self, assets: Mapping[str, Mapping]):
+        categories = self._categories
+        self.__init__(self.category_map)
+        self._categories = categories
+        for symbol, info in assets.items():
+            self.update(symbol, info.get("position", 0), info.get("current_price", 0.0))
+
+    def totals(self, cash: float) -> dict:
+        """
+        Account-level view: cash, market/net value, exposure and per-category value.
+        Exposures are fractions of net value.
+        """
+        net_value = cash + self.market_value
+        gross = self.long_value + self.short_value
+        return {
+            "cash": round(cash, 2),
+            "market_value": round(self.market_value, 2),
+            "net_value": round(net_value, 2),
+            "long_value": round(self.long_value, 2),
+            "short_value": round(self.short_value, 2),
+            "gross_exposure": round(gross / net_value, 6) if net_value > 0 else 0.0,
+            "net_exposure": round(self.market_value / net_value, 6) if net_value > 0 else 0.0,
+            "category_value": {k: round(v, 2) for k, v in self.category_value.items()},
+        }
+
+    def mismatches(self, assets: Mapping[str, Mapping]) -> list:
+        """
+        Compare running totals with a full recomputation (debug check).
+
+        Returns:
+            list[str]: human-readable differences (empty if consistent)
+        """
+        fresh = ExposureTracker(self.category_map)
+        fresh.rebuild(assets)
+
+        problems = []
+        for name in ("market_value", "long_value", "short_value"):
+            if abs(getattr(self, name) - getattr(fresh, name)) > TOTALS_TOLERANCE:
+                problems.append(f"{name}: running={getattr(self, name):.4f} actual={getattr(fresh, name):.4f}")
+        for category in set(self.category_value) | set(fresh.category_value):
+            running = self.category_value.get(category, 0.0)
+            actual = fresh.category_value.get(category, 0.0)
+            if abs(running - actual) > TOTALS_TOLERANCE:
+                problems.append(f"category {category}: running={running:.4f} actual={actual:.4f}")
+        return problems
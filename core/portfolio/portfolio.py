@@ -1,6 +1,9 @@
 # core/portfolio/portfolio.py
 
 from core.portfolio.asset_position import AssetPosition
+from core.portfolio.exposure import PORTFOLIO_DEBUG_TOTALS, VALUE_FIELDS, ExposureTracker, TrackedAssets
+from core.portfolio.position_book import PORTFOLIO_BOOK, PositionBook, PositionBookView
+from utils.config_loader import load_symbol_category_map
 from utils.time_utils import get_timestamps
 
 
@@ -15,18 +18,45 @@ class Portfolio:
 
     Provides a unified interface for trade updates and generating snapshots
     for UI display, logging, or auditing.
+
+    With book="columnar" (or PORTFOLIO_BOOK=columnar) positions are held in a
+    PositionBook (NumPy columns) and state["assets"] becomes its dict-compatible
+    view, so valuation and mark-to-market are vectorized for large books.
+
+    Market value, long/short exposure and per-category value are kept as
+    running totals (ExposureTracker). state["assets"] reports every position /
+    price write back to this object (TrackedAssets, or the PositionBook change
+    hook), so direct edits such as a live price refresh keep the totals
+    current; a wholesale replacement of state["assets"] is detected and
+    re-indexed. PORTFOLIO_DEBUG_TOTALS=1 re-verifies after every update.
+
+    When state is a JournaledState (utils/state_journal.py), Portfolio claims
+    state["assets"] and marks each written asset dirty, so saving the state
+    diffs only those assets.
     """
 
-    def __init__(self, state: dict):
+    def __init__(self, state: dict, book: str = PORTFOLIO_BOOK, category_map: dict = None):
         # Mutable reference to portfolio_state (shared across system)
         self.state = state
 
-        # Asset positions dictionary: symbol → asset state dict
-        self.assets = state.get("assets", {})
+        # State journal dirty tracking (JournaledState), if available
+        self._mark_dirty = getattr(state, "mark_dirty", None)
+        if self._mark_dirty is not None:
+            state.track("assets")
 
         # Available capital (updated after each trade)
         self.cash = state.get("capital", 0.0)
 
+        # Running market value / exposure totals
+        if category_map is None:
+            category_map = load_symbol_category_map()
+        self.exposure = ExposureTracker(category_map)
+
+        # Asset positions: symbol → asset state dict (or PositionBook view)
+        self.book_type = book
+        self.book = None
+        self._bind_assets(state.get("assets", {}))
+
         # Aggregated slippage statistics
         self.slippage_stats = {
             "total_slippage_pct": 0.0,
@@ -50,6 +80,8 @@ class Portfolio:
         - Updates asset state via AssetPosition
         - Records slippage and commission stats
         """
+        self._sync_assets()
+
         # Initialize asset if not present
         if symbol not in self.assets:
             self.assets[symbol] = {
@@ -91,7 +123,7 @@ class Portfolio:
         self.assets[symbol]["last_slippage_pct"] = round(slippage_pct * 100, 4)
 
         self.state["capital"] = round(self.cash, 2)
-        self.state["assets"] = self.assets
+        self._check_totals()
 
         # Accumulate slippage stats
         self.slippage_stats["total_slippage_pct"] += abs(slippage_pct * 100)
@@ -109,347 +141,136 @@ class Portfolio:
         print(f"        Asset Commission: ${self.assets[symbol]['total_commission']} | Account Total Commission: ${perf['total_commission']}")
         print("-" * 60)
 
-    def to_snapshot(self) -> dict:
-        """
-        Return a standardized snapshot of the portfolio state.
-
-        Includes:
-        - Timestamp
-        - Capital and net value
-        - Per-asset metrics
-        - Slippage and commission stats
+    def mark_to_market(self, prices: dict, timestamp: str = None) -> int:
         """
-        avg_slip = (
-            self.slippage_stats["total_slippage_pct"] / self.slippage_stats["trade_count"]
-            if self.slippage_stats["trade_count"] > 0 else 0.0
-        )
-
-        snapshot = {
-            "timestamp": get_timestamps()["now_ny"].isoformat(),
-            "capital": round(self.cash, 2),
-            "assets": {},
-            "net_value": round(
-                self.cash + sum(
-                    info["position"] * info.get("current_price", 0.0)
-                    for info in self.assets.values()
-                ), 2),
-            "performance": {
-                "total_commission": round(self.state.get("performance", {}).get("total_commission", 0.0), 4),
-                "slippage": {
-                    "total_pct": round(self.slippage_stats["total_slippage_pct"], 4),
-                    "avg_pct": round(avg_slip, 4),
-                    "trades": self.slippage_stats["trade_count"]
-                }
-            }
-        }
-
-        # Add per-asset stats
-        for symbol, info in self.assets.items():
-            snapshot["assets"][symbol] = {
-                "position": info.get("position", 0),
-                "avg_price": info.get("avg_price", 0.0),
-                "current_price": info.get("current_price", 0.0),
-                "drawdown_pct": info.get("drawdown_pct", 0.0),
-                "holding_days": info.get("holding_days", 0),
-                "killswitch": info.get("killswitch", False),
-                "silent_days_left": info.get("silent_days_left", 0),
-                "last_slippage_pct": info.get("last_slippage_pct", 0.0),
-                "entry_time": info.get("entry_time", None),
-                "last_trade_time": info.get("last_trade_time", None),
-                "total_realized_pnl": info.get("total_realized_pnl", 0.0),
-                "last_realized_pnl": info.get("last_realized_pnl", 0.0),
-                "total_commission": info.get("total_commission", 0.0)
-            }
+        Apply new market prices (symbol → price) to held assets.
 
-        return snapshot
+        Updates prev_price, current_price, lowest_price_since_entry and
+        drawdown_pct (one vectorized pass with a columnar book).
 
-    def to_dict(self):
+        Returns:
+            int: number of assets whose price changed
         """
-        Return the raw portfolio state dictionary.
-        Used for saving state to disk or integration with other modules.
+        self._sync_assets()
+        if self.book is not None:
+            changed = self.book.mark_to_market(prices, timestamp)
+            self._check_totals()
+            return len(changed)
+
+        changed = 0
+        for symbol, price in prices.items():
+            info = self.assets.get(symbol)
+            if info is None or price is None or info.get("current_price") == price:
+                continue
+            info["prev_price"] = info.get("current_price", price)
+            info["current_price"] = price
+            if info.get("position", 0) > 0:
+                info["lowest_price_since_entry"] = min(info.get("lowest_price_since_entry") or price, price)
+            AssetPosition(info)._update_drawdown()
+            if timestamp is not None:
+                info["last_price_time"] = timestamp
+            changed += 1
+        self._check_totals()
+        return changed
+
+    # === Running totals ===
+
+    def _bind_assets(self, assets):
         """
-        return self.state
-# core/portfolio/portfolio.py
-
-from core.portfolio.asset_position import AssetPosition
-from utils.time_utils import get_timestamps
-
-
-class Portfolio:
-    """
-    Portfolio
-    =========
-    Represents a full account portfolio, including:
-    - Asset-level positions and state
-    - Cash balance and execution slippage
-    - Trade handling and portfolio-level statistics
-
-    Provides a unified interface for trade updates and generating snapshots
-    for UI display, logging, or auditing.
-    """
-
-    def __init__(self, state: dict):
-        # Mutable reference to portfolio_state (shared across system)
-        self.state = state
-
-        # Asset positions dictionary: symbol → asset state dict
-        self.assets = state.get("assets", {})
-
-        # Available capital (updated after each trade)
-        self.cash = state.get("capital", 0.0)
-
-        # Aggregated slippage statistics
-        self.slippage_stats = {
-            "total_slippage_pct": 0.0,
-            "trade_count": 0
-        }
-
-    def add_trade(
-        self,
-        symbol: str,
-        action: str,
-        quantity: int,
-        price: float,
-        slippage_pct: float = 0.001,
-        commission: float = 0.0
-    ):
+        Attach to state["assets"] so that every position / price write reaches
+        the running totals, then rebuild them.
         """
-        Apply a trade to the portfolio.
-
-        - Creates asset record if missing
-        - Adjusts cash balance
-        - Updates asset state via AssetPosition
-        - Records slippage and commission stats
+        if isinstance(assets, PositionBookView):
+            self.book = assets.book
+        elif self.book_type == "columnar":
+            self.book = PositionBook(assets)
+            assets = self.book.view()
+        else:
+            self.book = None
+            assets = TrackedAssets(assets, self._on_asset_change)
+
+        if self.book is not None:
+            self.book.on_change = self._on_book_change
+            self.book.on_write = self._on_book_write
+        self.state["assets"] = self.assets = assets
+        self.exposure.rebuild(self.assets)
+
+    def _sync_assets(self):
+        """Re-bind if state["assets"] was replaced by another object."""
+        if self.state.get("assets") is not self.assets:
+            self._bind_assets(self.state.get("assets", {}))
+
+    def _on_asset_change(self, symbol: str, field: str = None):
+        if self._mark_dirty is not None:
+            self._mark_dirty("assets", symbol)
+        if field is not None and field not in VALUE_FIELDS:
+            return
+        info = dict.get(self.assets, symbol)
+        if info is None:
+            self.exposure.remove(symbol)
+        else:
+            self.exposure.update(symbol, dict.get(info, "position", 0), dict.get(info, "current_price", 0.0))
+
+    def _on_book_change(self, symbols: list):
+        book = self.book
+        rows = [book.index.get(symbol, -1) for symbol in symbols]
+        held = [row for row in rows if row >= 0]
+        positions = book.columns["position"][held].tolist()
+        prices = book.columns["current_price"][held].tolist()
+        values = iter(zip(positions, prices))
+        for symbol, row in zip(symbols, rows):
+            if row < 0:
+                self.exposure.remove(symbol)
+            else:
+                self.exposure.update(symbol, *next(values))
+
+    def _on_book_write(self, symbols: list):
+        if self._mark_dirty is not None:
+            for symbol in symbols:
+                self._mark_dirty("assets", symbol)
+
+    def _check_totals(self):
+        if PORTFOLIO_DEBUG_TOTALS:
+            self.verify_totals()
+
+    def verify_totals(self) -> bool:
         """
-        # Initialize asset if not present
-        if symbol not in self.assets:
-            self.assets[symbol] = {
-                "position": 0,
-                "avg_price": 0.0,
-                "lowest_price_since_entry": price,
-                "current_price": price,
-                "drawdown_pct": 0.0,
-                "drawdown_3d": 0.0,
-                "holding_days": 0,
-                "killswitch": False,
-                "silent_days_left": 0,
-                "silent_trigger_reason": "",
-                "total_realized_pnl": 0.0,
-                "last_realized_pnl": 0.0,
-                "total_commission": 0.0,
-                "entry_time": None,
-                "last_trade_time": None,
-                "last_slippage_pct": 0.0,
-                "prev_price": price,
-                "last_price_time": None
-            }
-
-        asset = AssetPosition(self.assets[symbol])
-        slip = price * slippage_pct
-        exec_price = price + slip if action == "buy" else price - slip
-
-        # Update asset position
-        asset.record_trade(action, quantity, exec_price)
-
-        # Adjust account cash
-        if action == "buy":
-            self.cash -= quantity * exec_price + commission
-        elif action == "sell":
-            self.cash += quantity * exec_price - commission
+        Debug check: compare running totals with a full recomputation and
+        resynchronize on mismatch.
 
-        # Update asset-level stats
-        self.assets[symbol]["current_price"] = exec_price
-        self.assets[symbol]["last_slippage_pct"] = round(slippage_pct * 100, 4)
-
-        self.state["capital"] = round(self.cash, 2)
-        self.state["assets"] = self.assets
-
-        # Accumulate slippage stats
-        self.slippage_stats["total_slippage_pct"] += abs(slippage_pct * 100)
-        self.slippage_stats["trade_count"] += 1
-
-        # Accumulate commission stats
-        perf = self.state.setdefault("performance", {})
-        perf["total_commission"] = perf.get("total_commission", 0.0) + round(commission, 4)
-        self.assets[symbol]["total_commission"] = self.assets[symbol].get("total_commission", 0.0) + round(commission, 4)
-
-        # Debug log (optional for audit)
-        print(f"[TRADE] {action.upper()} {quantity} {symbol} @ {exec_price:.2f} (slip: {slippage_pct:.2%})")
-        print(f"        Cash: ${self.cash:.2f} | Position: {self.assets[symbol]['position']} | Avg Price: {self.assets[symbol]['avg_price']}")
-        print(f"        Realized PnL: {self.assets[symbol]['last_realized_pnl']} | Total: {self.assets[symbol]['total_realized_pnl']}")
-        print(f"        Asset Commission: ${self.assets[symbol]['total_commission']} | Account Total Commission: ${perf['total_commission']}")
-        print("-" * 60)
-
-    def to_snapshot(self) -> dict:
+        Returns:
+            bool: True if the running totals were consistent
         """
-        Return a standardized snapshot of the portfolio state.
-
-        Includes:
-        - Timestamp
-        - Capital and net value
-        - Per-asset metrics
-        - Slippage and commission stats
+        self._sync_assets()
+        problems = self.exposure.mismatches(self.assets)
+        if problems:
+            print(f"[⚠️] Portfolio running totals drifted — {'; '.join(problems)}")
+            self.refresh_totals()
+        return not problems
+
+    def refresh_totals(self):
         """
-        avg_slip = (
-            self.slippage_stats["total_slippage_pct"] / self.slippage_stats["trade_count"]
-            if self.slippage_stats["trade_count"] > 0 else 0.0
-        )
-
-        snapshot = {
-            "timestamp": get_timestamps()["now_ny"].isoformat(),
-            "capital": round(self.cash, 2),
-            "assets": {},
-            "net_value": round(
-                self.cash + sum(
-                    info["position"] * info.get("current_price", 0.0)
-                    for info in self.assets.values()
-                ), 2),
-            "performance": {
-                "total_commission": round(self.state.get("performance", {}).get("total_commission", 0.0), 4),
-                "slippage": {
-                    "total_pct": round(self.slippage_stats["total_slippage_pct"], 4),
-                    "avg_pct": round(avg_slip, 4),
-                    "trades": self.slippage_stats["trade_count"]
-                }
-            }
-        }
-
-        # Add per-asset stats
-        for symbol, info in self.assets.items():
-            snapshot["assets"][symbol] = {
-                "position": info.get("position", 0),
-                "avg_price": info.get("avg_price", 0.0),
-                "current_price": info.get("current_price", 0.0),
-                "drawdown_pct": info.get("drawdown_pct", 0.0),
-                "holding_days": info.get("holding_days", 0),
-                "killswitch": info.get("killswitch", False),
-                "silent_days_left": info.get("silent_days_left", 0),
-                "last_slippage_pct": info.get("last_slippage_pct", 0.0),
-                "entry_time": info.get("entry_time", None),
-                "last_trade_time": info.get("last_trade_time", None),
-                "total_realized_pnl": info.get("total_realized_pnl", 0.0),
-                "last_realized_pnl": info.get("last_realized_pnl", 0.0),
-                "total_commission": info.get("total_commission", 0.0)
-            }
-
-        return snapshot
+        Recompute running totals from state (e.g. after capital was changed
+        outside this class).
+        """
+        self.cash = self.state.get("capital", self.cash)
+        self._sync_assets()
+        self.exposure.rebuild(self.assets)
 
-    def to_dict(self):
+    def exposure_summary(self) -> dict:
         """
-        Return the raw portfolio state dictionary.
-        Used for saving state to disk or integration with other modules.
+        Cash, market value, net value, long/short value, gross/net exposure
+        and per-category value — read from running totals.
         """
-        return self.state
-# core/portfolio/portfolio.py
-
-from core.portfolio.asset_position import AssetPosition
-from utils.time_utils import get_timestamps
-
-
-class Portfolio:
-    """
-    Portfolio
-    =========
-    Represents a full account portfolio, including:
-    - Asset-level positions and state
-    - Cash balance and execution slippage
-    - Trade handling and portfolio-level statistics
-
-    Provides a unified interface for trade updates and generating snapshots
-    for UI display, logging, or auditing.
-    """
-
-    def __init__(self, state: dict):
-        # Mutable reference to portfolio_state (shared across system)
-        self.state = state
-
-        # Asset positions dictionary: symbol → asset state dict
-        self.assets = state.get("assets", {})
-
-        # Available capital (updated after each trade)
-        self.cash = state.get("capital", 0.0)
-
-        # Aggregated slippage statistics
-        self.slippage_stats = {
-            "total_slippage_pct": 0.0,
-            "trade_count": 0
-        }
+        self._sync_assets()
+        return self.exposure.totals(self.cash)
 
-    def add_trade(
-        self,
-        symbol: str,
-        action: str,
-        quantity: int,
-        price: float,
-        slippage_pct: float = 0.001,
-        commission: float = 0.0
-    ):
+    def estimate_net_value(self) -> float:
         """
-        Apply a trade to the portfolio.
-
-        - Creates asset record if missing
-        - Adjusts cash balance
-        - Updates asset state via AssetPosition
-        - Records slippage and commission stats
+        Cash plus all positions marked at their current price.
         """
-        # Initialize asset if not present
-        if symbol not in self.assets:
-            self.assets[symbol] = {
-                "position": 0,
-                "avg_price": 0.0,
-                "lowest_price_since_entry": price,
-                "current_price": price,
-                "drawdown_pct": 0.0,
-                "drawdown_3d": 0.0,
-                "holding_days": 0,
-                "killswitch": False,
-                "silent_days_left": 0,
-                "silent_trigger_reason": "",
-                "total_realized_pnl": 0.0,
-                "last_realized_pnl": 0.0,
-                "total_commission": 0.0,
-                "entry_time": None,
-                "last_trade_time": None,
-                "last_slippage_pct": 0.0,
-                "prev_price": price,
-                "last_price_time": None
-            }
-
-        asset = AssetPosition(self.assets[symbol])
-        slip = price * slippage_pct
-        exec_price = price + slip if action == "buy" else price - slip
-
-        # Update asset position
-        asset.record_trade(action, quantity, exec_price)
-
-        # Adjust account cash
-        if action == "buy":
-            self.cash -= quantity * exec_price + commission
-        elif action == "sell":
-            self.cash += quantity * exec_price - commission
-
-        # Update asset-level stats
-        self.assets[symbol]["current_price"] = exec_price
-        self.assets[symbol]["last_slippage_pct"] = round(slippage_pct * 100, 4)
-
-        self.state["capital"] = round(self.cash, 2)
-        self.state["assets"] = self.assets
-
-        # Accumulate slippage stats
-        self.slippage_stats["total_slippage_pct"] += abs(slippage_pct * 100)
-        self.slippage_stats["trade_count"] += 1
-
-        # Accumulate commission stats
-        perf = self.state.setdefault("performance", {})
-        perf["total_commission"] = perf.get("total_commission", 0.0) + round(commission, 4)
-        self.assets[symbol]["total_commission"] = self.assets[symbol].get("total_commission", 0.0) + round(commission, 4)
-
-        # Debug log (optional for audit)
-        print(f"[TRADE] {action.upper()} {quantity} {symbol} @ {exec_price:.2f} (slip: {slippage_pct:.2%})")
-        print(f"        Cash: ${self.cash:.2f} | Position: {self.assets[symbol]['position']} | Avg Price: {self.assets[symbol]['avg_price']}")
-        print(f"        Realized PnL: {self.assets[symbol]['last_realized_pnl']} | Total: {self.assets[symbol]['total_realized_pnl']}")
-        print(f"        Asset Commission: ${self.assets[symbol]['total_commission']} | Account Total Commission: ${perf['total_commission']}")
-        print("-" * 60)
+        self._sync_assets()
+        return round(self.cash + self.exposure.market_value, 2)
 
     def to_snapshot(self) -> dict:
         """
@@ -458,6 +279,7 @@ class Portfolio:
         Includes:
         - Timestamp
         - Capital and net value
+        - Exposure totals (gross / net / per category)
         - Per-asset metrics
         - Slippage and commission stats
         """
@@ -470,11 +292,8 @@ class Portfolio:
             "timestamp": get_timestamps()["now_ny"].isoformat(),
             "capital": round(self.cash, 2),
             "assets": {},
-            "net_value": round(
-                self.cash + sum(
-                    info["position"] * info.get("current_price", 0.0)
-                    for info in self.assets.values()
-                ), 2),
+            "net_value": self.estimate_net_value(),
+            "exposure": self.exposure_summary(),
             "performance": {
                 "total_commission": round(self.state.get("performance", {}).get("total_commission", 0.0), 4),
                 "slippage": {
@@ -486,6 +305,10 @@ class Portfolio:
         }
 
         # Add per-asset stats
+        if self.book is not None:
+            snapshot["assets"] = self.book.snapshot_assets()
+            return snapshot
+
         for symbol, info in self.assets.items():
             snapshot["assets"][symbol] = {
                 "position": info.get("position", 0),
@@ -511,5 +334,3 @@ class Portfolio:
         Used for saving state to disk or integration with other modules.
         """
         return self.state
-
-
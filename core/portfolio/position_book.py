@@ -0,0 +1,378 @@
+# core/portfolio/position_book.py
+
+import os
+from collections.abc import Mapping, MutableMapping
+from typing import Callable, Dict, Iterator, Optional
+
+import numpy as np
+
+# Which Portfolio position store to use: "dict" (plain dict of dicts) or
+# "columnar" (PositionBook below)
+PORTFOLIO_BOOK = os.getenv("PORTFOLIO_BOOK", "dict")
+
+# Numeric per-asset fields held in NumPy columns: name → (dtype, default)
+NUMERIC_FIELDS = {
+    "position": (np.float64, 0),
+    "avg_price": (np.float64, 0.0),
+    "lowest_price_since_entry": (np.float64, 0.0),
+    "current_price": (np.float64, 0.0),
+    "prev_price": (np.float64, 0.0),
+    "drawdown_pct": (np.float64, 0.0),
+    "drawdown_3d": (np.float64, 0.0),
+    "holding_days": (np.int64, 0),
+    "killswitch": (np.bool_, False),
+    "silent_days_left": (np.int64, 0),
+    "total_realized_pnl": (np.float64, 0.0),
+    "last_realized_pnl": (np.float64, 0.0),
+    "total_commission": (np.float64, 0.0),
+    "last_slippage_pct": (np.float64, 0.0),
+}
+
+# Non-numeric per-asset fields held in Python lists: name → default
+OBJECT_FIELDS = {
+    "silent_trigger_reason": "",
+    "entry_time": None,
+    "last_trade_time": None,
+    "last_price_time": None,
+}
+
+# Per-asset fields exposed in Portfolio.to_snapshot()
+SNAPSHOT_FIELDS = (
+    "position", "avg_price", "current_price", "drawdown_pct", "holding_days",
+    "killswitch", "silent_days_left", "last_slippage_pct", "entry_time",
+    "last_trade_time", "total_realized_pnl", "last_realized_pnl", "total_commission",
+)
+
+
+def _to_python(field: str, value):
+    """NumPy scalar → plain Python value (keeps JSON output identical to the dict book)."""
+    if field == "position":
+        value = float(value)
+        return int(value) if value.is_integer() else value
+    return value.item()
+
+
+def _column_values(field: str, column: np.ndarray) -> list:
+    """Vectorized _to_python over a column slice."""
+    values = column.tolist()
+    if field == "position":
+        return [int(v) if v.is_integer() else v for v in values]
+    return values
+
+
+class PositionBook:
+    """
+    PositionBook
+    ============
+    Columnar store for a portfolio's asset positions.
+
+    Numeric fields (position, prices, avg_price, PnL, drawdown, ...) live in
+    NumPy arrays indexed by a symbol → row map, so valuation and
+    mark-to-market are vectorized. `view()` returns a dict-compatible
+    (MutableMapping) view for existing callers: `state["assets"][symbol]["position"]`
+    reads and writes straight through to the arrays. Fields the book does
+    not know are kept per row in a plain dict.
+
+    Per-asset snapshot dicts are cached and rebuilt only for rows that
+    changed since the last `snapshot_assets()` call.
+
+    `on_change(symbols)`, if set, is called with the list of symbols whose
+    position or current price changed (or that were added / removed);
+    `on_write(symbols)` with the symbols whose row was written at all.
+    """
+
+    def __init__(self, assets: Optional[Mapping] = None, capacity: int = 64):
+        self.symbols = []
+        self.index: Dict[str, int] = {}
+        self._capacity = max(capacity, len(assets or {}))
+        self.columns = {
+            name: np.full(self._capacity, default, dtype=dtype)
+            for name, (dtype, default) in NUMERIC_FIELDS.items()
+        }
+        self.objects = {name: [] for name in OBJECT_FIELDS}
+        self.extras = []
+
+        # Cached snapshot dicts; _dirty flags rows to rebuild
+        self._snapshot_rows: Dict[str, dict] = {}
+        self._dirty = np.zeros(self._capacity, dtype=bool)
+
+        # Value-change hook (Portfolio running totals) and any-write hook (state journal)
+        self.on_change: Optional[Callable[[list], None]] = None
+        self.on_write: Optional[Callable[[list], None]] = None
+
+        for symbol, info in (assets or {}).items():
+            self.add(symbol, info)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def __contains__(self, symbol) -> bool:
+        return symbol in self.index
+
+    # === Rows ===
+
+    def _grow(self):
+        self._capacity *= 2
+        for name, (dtype, default) in NUMERIC_FIELDS.items():
+            column = np.full(self._capacity, default, dtype=dtype)
+            column[:len(self.symbols)] = self.columns[name][:len(self.symbols)]
+            self.columns[name] = column
+        self._dirty = np.concatenate([self._dirty, np.zeros(self._capacity - len(self._dirty), dtype=bool)])
+
+    def add(self, symbol: str, values: Optional[Mapping] = None) -> int:
+        """Insert (or overwrite) a symbol's row from a plain asset dict."""
+        values = dict(values or {})
+        row = self.index.get(symbol)
+        if row is None:
+            if len(self.symbols) == self._capacity:
+                self._grow()
+            row = len(self.symbols)
+            self.symbols.append(symbol)
+            self.index[symbol] = row
+            for name, default in OBJECT_FIELDS.items():
+                self.objects[name].append(default)
+            self.extras.append({})
+
+        for name, (dtype, default) in NUMERIC_FIELDS.items():
+            value = values.pop(name, default)
+            self.columns[name][row] = default if value is None else value
+        for name, default in OBJECT_FIELDS.items():
+            self.objects[name][row] = values.pop(name, default)
+        self.extras[row] = values
+        self._dirty[row] = True
+        self._written([symbol])
+        if self.on_change is not None:
+            self.on_change([symbol])
+        return row
+
+    def remove(self, symbol: str):
+        """Delete a symbol's row (the last row moves into its slot)."""
+        row = self.index.pop(symbol)
+        last = len(self.symbols) - 1
+        if row != last:
+            moved = self.symbols[last]
+            self.symbols[row] = moved
+            self.index[moved] = row
+            for column in self.columns.values():
+                column[row] = column[last]
+            for values in self.objects.values():
+                values[row] = values[last]
+            self.extras[row] = self.extras[last]
+            self._dirty[row] = self._dirty[last]
+        self.symbols.pop()
+        for name, (dtype, default) in NUMERIC_FIELDS.items():
+            self.columns[name][last] = default
+        for values in self.objects.values():
+            values.pop()
+        self.extras.pop()
+        self._dirty[last] = False
+        self._snapshot_rows.pop(symbol, None)
+        self._written([symbol])
+        if self.on_change is not None:
+            self.on_change([symbol])
+
+    def _written(self, symbols: list):
+        if self.on_write is not None:
+            self.on_write(symbols)
+
+    def get(self, symbol: str, field: str, default=None):
+        row = self.index[symbol]
+        if field in self.columns:
+            return _to_python(field, self.columns[field][row])
+        if field in self.objects:
+            return self.objects[field][row]
+        return self.extras[row].get(field, default)
+
+    def set(self, symbol: str, field: str, value):
+        row = self.index[symbol]
+        if field in self.columns:
+            self.columns[field][row] = NUMERIC_FIELDS[field][1] if value is None else value
+        elif field in self.objects:
+            self.objects[field][row] = value
+        else:
+            self.extras[row][field] = value
+        self._dirty[row] = True
+        self._written([symbol])
+        if self.on_change is not None and field in ("position", "current_price"):
+            self.on_change([symbol])
+
+    def fields(self, symbol: str):
+        return list(NUMERIC_FIELDS) + list(OBJECT_FIELDS) + list(self.extras[self.index[symbol]])
+
+    def asset_dict(self, symbol: str) -> dict:
+        """Plain dict of all fields for one asset (persistence / debugging)."""
+        row = self.index[symbol]
+        out = {name: _to_python(name, column[row]) for name, column in self.columns.items()}
+        out.update({name: values[row] for name, values in self.objects.items()})
+        out.update(self.extras[row])
+        return out
+
+    def to_assets(self) -> dict:
+        return {symbol: self.asset_dict(symbol) for symbol in self.symbols}
+
+    def view(self) -> "PositionBookView":
+        return PositionBookView(self)
+
+    # === Vectorized valuation ===
+
+    def market_value(self) -> float:
+        n = len(self.symbols)
+        return float(np.dot(self.columns["position"][:n], self.columns["current_price"][:n]))
+
+    def mark_to_market(self, prices: Mapping, timestamp: Optional[str] = None) -> list:
+        """
+        Apply new prices (symbol → price) in one vectorized pass: prev_price,
+        current_price, lowest_price_since_entry and drawdown_pct.
+
+        Returns:
+            list[str]: symbols whose price changed
+        """
+        if not prices:
+            return []
+        index = self.index
+        rows = np.fromiter((index.get(s, -1) for s in prices), dtype=np.int64, count=len(prices))
+        new = np.array(list(prices.values()), dtype=np.float64)    # None → nan
+
+        current = self.columns["current_price"]
+        known = (rows >= 0) & ~np.isnan(new)
+        rows, new = rows[known], new[known]
+        moved = current[rows] != new
+        changed, new_changed = rows[moved], new[moved]
+        if not len(changed):
+            return []
+
+        self.columns["prev_price"][changed] = current[changed]
+        current[changed] = new_changed
+
+        held = self.columns["position"][changed] > 0
+        lowest = self.columns["lowest_price_since_entry"]
+        lowest[changed] = np.where(held, np.minimum(lowest[changed], new_changed), lowest[changed])
+
+        avg = self.columns["avg_price"][changed]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            drawdown = np.where(avg > 0, (new_changed - avg) / avg, 0.0)
+        self.columns["drawdown_pct"][changed] = np.round(drawdown, 6)
+
+        if timestamp is not None:
+            last_price_time = self.objects["last_price_time"]
+            for row in changed.tolist():
+                last_price_time[row] = timestamp
+        self._dirty[changed] = True
+        symbols = [self.symbols[row] for row in changed.tolist()]
+        self._written(symbols)
+        if self.on_change is not None:
+            self.on_change(symbols)
+        return symbols
+
+    # === Snapshot ===
+
+    def snapshot_assets(self) -> dict:
+        """
+        symbol → snapshot dict (SNAPSHOT_FIELDS). Only rows changed since the
+        previous call are rebuilt; callers get fresh copies of the cached
+        dicts, so mutating a snapshot never leaks into later ones.
+        """
+        n = len(self.symbols)
+        rows = np.flatnonzero(self._dirty[:n])
+        if len(rows):
+            if len(rows) == n:
+                rows = slice(0, n)
+            values = []
+            for name in SNAPSHOT_FIELDS:
+                if name in self.columns:
+                    values.append(_column_values(name, self.columns[name][rows]))
+                else:
+                    column = self.objects[name]
+                    values.append(column[:n] if isinstance(rows, slice) else [column[r] for r in rows.tolist()])
+            symbols = self.symbols if isinstance(rows, slice) else [self.symbols[r] for r in rows.tolist()]
+            for symbol, row_values in zip(symbols, zip(*values)):
+                self._snapshot_rows[symbol] = dict(zip(SNAPSHOT_FIELDS, row_values))
+            self._dirty[:n] = False
+        return {symbol: dict(row) for symbol, row in self._snapshot_rows.items()}
+
+
+class AssetView(MutableMapping):
+    """Dict-compatible view of one asset row in a PositionBook."""
+
+    __slots__ = ("book", "symbol")
+
+    def __init__(self, book: PositionBook, symbol: str):
+        self.book = book
+        self.symbol = symbol
+
+    def __reduce__(self):
+        # Copies / pickles are plain dicts, detached from the book
+        return dict, (self.book.asset_dict(self.symbol),)
+
+    def __getitem__(self, field):
+        book = self.book
+        if field in book.columns or field in book.objects:
+            return book.get(self.symbol, field)
+        extras = book.extras[book.index[self.symbol]]
+        if field not in extras:
+            raise KeyError(field)
+        return extras[field]
+
+    def __setitem__(self, field, value):
+        self.book.set(self.symbol, field, value)
+
+    def __delitem__(self, field):
+        book = self.book
+        if field in NUMERIC_FIELDS:
+            book.set(self.symbol, field, NUMERIC_FIELDS[field][1])
+        elif field in OBJECT_FIELDS:
+            book.set(self.symbol, field, OBJECT_FIELDS[field])
+        else:
+            row = book.index[self.symbol]
+            del book.extras[row][field]
+            book._dirty[row] = True
+            book._written([self.symbol])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.book.fields(self.symbol))
+
+    def __len__(self) -> int:
+        return len(self.book.fields(self.symbol))
+
+    def __repr__(self) -> str:
+        return f"AssetView({self.symbol!r}, {self.book.asset_dict(self.symbol)!r})"
+
+
+class PositionBookView(MutableMapping):
+    """Dict-compatible symbol → AssetView mapping over a PositionBook."""
+
+    __slots__ = ("book",)
+
+    def __init__(self, book: PositionBook):
+        self.book = book
+
+    def __reduce__(self):
+        return dict, (self.book.to_assets(),)
+
+    def __getitem__(self, symbol) -> AssetView:
+        if symbol not in self.book.index:
+            raise KeyError(symbol)
+        return AssetView(self.book, symbol)
+
+    def __setitem__(self, symbol, values: Mapping):
+        if isinstance(values, AssetView):
+            values = values.book.asset_dict(values.symbol)
+        self.book.add(symbol, values)
+
+    def __delitem__(self, symbol):
+        if symbol not in self.book.index:
+            raise KeyError(symbol)
+        self.book.remove(symbol)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self.book.symbols))
+
+    def __len__(self) -> int:
+        return len(self.book.symbols)
+
+    def __contains__(self, symbol) -> bool:
+        return symbol in self.book.index
+
+    def __repr__(self) -> str:
+        return f"PositionBookView({len(self)} assets)"
+
@@ -0,0 +1,247 @@
+# core/price_store.py
+
+"""
+PriceStore — Columnar Daily Bar Store
+=====================================
+
+Replaces the per-day CSV cache (`market_data/<category>/<date>/<SYMBOL>_last_100_days.csv`)
+with one binary file per symbol holding fixed-width daily bars:
+
+    market_data/store/<SYMBOL>.bars        ← packed records (BAR_DTYPE)
+    market_data/store/<SYMBOL>.meta.json   ← {"last_fetch_date": "YYYY-MM-DD", "rows": N}
+
+Each fetch upserts its bars: stored rows from the earliest incoming date on are
+replaced (so revised or partial bars get corrected) and newer dates appended.
+Rows are rewritten in place from the first one that actually changed. Reads
+memory-map the file, so any lookback window is a zero-copy slice.
+
+Crash safety: bars are fsynced before the metadata, and the metadata is
+replaced atomically, so "rows" is the committed length. Readers never map past
+it (or past the last whole record), and the next append truncates anything a
+crashed write left beyond it.
+"""
+
+import os
+import re
+import json
+import glob
+import threading
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import pytz
+
+MARKET_TZ = pytz.timezone("America/New_York")
+STORE_DIR = os.path.join("market_data", "store")
+
+# Dates are UTC epoch nanoseconds; prices/volume are float64
+BAR_DTYPE = np.dtype([
+    ("date", "<i8"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<f8"),
+])
+BAR_FIELDS = ["open", "high", "low", "close", "volume"]
+
+_CSV_NAME = re.compile(r"^(?P<symbol>.+)_last_100_days\.csv$")
+
+
+def _row_bytes(records: np.ndarray) -> np.ndarray:
+    """Raw bytes of each bar as a (rows, itemsize) uint8 array (NaN-safe comparison)."""
+    return np.ascontiguousarray(records).view(np.uint8).reshape(len(records), BAR_DTYPE.itemsize)
+
+
+class PriceStore:
+    """
+    Per-symbol store of daily OHLCV bars backed by np.memmap.
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self, root: str = STORE_DIR):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    def _bars_path(self, symbol: str) -> str:
+        return os.path.join(self.root, f"{symbol.upper()}.bars")
+
+    def _meta_path(self, symbol: str) -> str:
+        return os.path.join(self.root, f"{symbol.upper()}.meta.json")
+
+    def _read_meta(self, symbol: str) -> dict:
+        path = self._meta_path(symbol)
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, "r") as f:
+                meta = json.load(f)
+            return meta if isinstance(meta, dict) else {}
+        except Exception:
+            return {}
+
+    def _write_meta(self, symbol: str, meta: dict):
+        """Write metadata via temp file + fsync + rename."""
+        path = self._meta_path(symbol)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _committed_rows(self, symbol: str) -> int:
+        """
+        Number of bars that are safe to read: the shorter of the committed
+        length in the metadata and the whole records in the file. Files written
+        before "rows" was tracked are trusted up to their last whole record.
+        """
+        path = self._bars_path(symbol)
+        file_rows = os.path.getsize(path) // BAR_DTYPE.itemsize if os.path.exists(path) else 0
+        rows = self._read_meta(symbol).get("rows")
+        return file_rows if rows is None else max(0, min(int(rows), file_rows))
+
+    # === Read ===
+
+    def bars(self, symbol: str, lookback: Optional[int] = None) -> np.ndarray:
+        """
+        Return the trailing `lookback` bars (all bars if None) as a read-only
+        memory-mapped structured array. No data is copied.
+        """
+        rows = self._committed_rows(symbol)
+        if not rows:
+            return np.empty(0, dtype=BAR_DTYPE)
+        data = np.memmap(self._bars_path(symbol), dtype=BAR_DTYPE, mode="r", shape=(rows,))
+        return data if lookback is None else data[-lookback:]
+
+    def closes(self, symbol: str, lookback: Optional[int] = None) -> np.ndarray:
+        """Zero-copy view of the close column for the trailing window."""
+        return self.bars(symbol, lookback)["close"]
+
+    def last_date(self, symbol: str) -> Optional[int]:
+        """Epoch-ns date of the most recent stored bar, or None."""
+        data = self.bars(symbol, 1)
+        return int(data["date"][0]) if len(data) else None
+
+    def to_frame(self, symbol: str, lookback: Optional[int] = None) -> pd.DataFrame:
+        """
+        Return bars in the same layout `MarketDataFetcher.get_price_history_100d`
+        has always returned: date (NY tz), open, high, low, close, volume.
+        """
+        data = self.bars(symbol, lookback)
+        if not len(data):
+            return pd.DataFrame()
+        df = pd.DataFrame({field: data[field] for field in BAR_FIELDS})
+        df.insert(0, "date", pd.to_datetime(data["date"], utc=True).tz_convert(MARKET_TZ))
+        return df
+
+    # === Write ===
+
+    def append(self, symbol: str, df: pd.DataFrame) -> int:
+        """
+        Upsert bars from `df`: stored bars dated on or after the earliest
+        incoming bar are replaced by the incoming ones (stored dates missing
+        from `df` are kept), newer bars are appended.
+
+        Args:
+            symbol (str): Ticker symbol
+            df (pd.DataFrame): Frame with a "date" column (or DatetimeIndex) and OHLCV columns
+
+        Returns:
+            int: Number of bars written (new or revised)
+        """
+        if df is None or df.empty:
+            return 0
+
+        frame = df.reset_index() if "date" not in df.columns else df
+        dates = pd.DatetimeIndex(pd.to_datetime(frame["date"], utc=True)).tz_convert(None)
+        ns = dates.values.astype("datetime64[ns]").astype("int64")
+
+        # Collapse duplicate dates within the incoming frame (keep last)
+        _, unique_idx = np.unique(ns[::-1], return_index=True)
+        rows = len(ns) - 1 - unique_idx
+
+        records = np.empty(len(rows), dtype=BAR_DTYPE)
+        records["date"] = ns[rows]
+        for field in BAR_FIELDS:
+            values = frame[field].to_numpy(dtype=float) if field in frame.columns else np.full(len(frame), np.nan)
+            records[field] = values[rows]
+
+        with self._lock:
+            stored = self.bars(symbol)
+            committed = len(stored)
+            start = int(np.searchsorted(stored["date"], records["date"][0], side="left"))
+            tail = np.array(stored[start:])
+            del stored
+
+            # Stored tail overlaid with the incoming bars, in date order
+            kept = tail[~np.isin(tail["date"], records["date"])]
+            merged = np.concatenate([kept, records])
+            merged = merged[np.argsort(merged["date"], kind="stable")]
+
+            # Skip the leading rows that are byte-identical to what is stored
+            n = len(tail)
+            same = (_row_bytes(tail) == _row_bytes(merged[:n])).all(axis=1)
+            changed = np.flatnonzero(~same)
+            skip = int(changed[0]) if len(changed) else n
+            if skip == len(merged):
+                return 0
+
+            path = self._bars_path(symbol)
+            with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+                f.truncate(committed * BAR_DTYPE.itemsize)  # drop bytes left by a crashed write
+                f.seek((start + skip) * BAR_DTYPE.itemsize)
+                f.write(merged[skip:].tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+            # Commit the new length only once the bars are on disk
+            meta = self._read_meta(symbol)
+            meta["rows"] = start + len(merged)
+            self._write_meta(symbol, meta)
+
+        return len(changed) + len(merged) - n
+
+    def get_last_fetch_date(self, symbol: str) -> Optional[str]:
+        return self._read_meta(symbol).get("last_fetch_date")
+
+    def set_last_fetch_date(self, symbol: str, date_str: str):
+        with self._lock:
+            meta = self._read_meta(symbol)
+            meta["last_fetch_date"] = date_str
+            self._write_meta(symbol, meta)
+
+    # === Migration ===
+
+    def ingest_csv_tree(self, root: str = "market_data") -> dict:
+        """
+        Ingest the legacy `<root>/<category>/<YYYY-MM-DD>/<SYMBOL>_last_100_days.csv`
+        tree, oldest day first, so each symbol's file ends up with the union of
+        all historical bars in date order.
+
+        Returns:
+            dict: symbol → number of bars written
+        """
+        pattern = os.path.join(root, "*", "*", "*_last_100_days.csv")
+        files = sorted(glob.glob(pattern), key=lambda p: os.path.basename(os.path.dirname(p)))
+        appended = {}
+
+        for path in files:
+            match = _CSV_NAME.match(os.path.basename(path))
+            if not match:
+                continue
+            symbol = match.group("symbol")
+            day = os.path.basename(os.path.dirname(path))
+            try:
+                df = pd.read_csv(path)
+            except Exception as e:
+                print(f"⚠️ Skipping unreadable {path}: {e}")
+                continue
+
+            appended[symbol] = appended.get(symbol, 0) + self.append(symbol, df)
+            if (self.get_last_fetch_date(symbol) or "") < day:
+                self.set_last_fetch_date(symbol, day)
+
+        return appended
@@ -0,0 +1,73 @@
+# core/quote_providers.py
+
+"""
+Quote Providers — Pluggable Latest-Price Sources
+================================================
+
+MarketDataFetcher.get_prices() delegates to a quote provider so the batch
+latest-price path can run against live Alpaca or a local fake.
+
+A provider implements:
+
+    get_latest_trades(symbols: list) -> dict
+        symbol → (price: float, timestamp: pd.Timestamp)
+        Symbols the provider cannot price are omitted.
+"""
+
+from typing import Dict, Iterable, Tuple
+
+import pandas as pd
+
+
+class QuoteProvider:
+    """
+    Base interface for latest-trade providers.
+    """
+
+    def get_latest_trades(self, symbols: Iterable[str]) -> Dict[str, Tuple[float, pd.Timestamp]]:
+        raise NotImplementedError
+
+
+class AlpacaSnapshotProvider(QuoteProvider):
+    """
+    Latest trades for many symbols via one Alpaca multi-symbol snapshot request.
+    """
+
+    def __init__(self, api):
+        self.api = api  # alpaca_trade_api.rest.REST
+
+    def get_latest_trades(self, symbols):
+        symbols = [s.upper() for s in symbols]
+        if not symbols:
+            return {}
+
+        snapshots = self.api.get_snapshots(symbols)
+        trades = {}
+        for symbol, snapshot in (snapshots or {}).items():
+            trade = getattr(snapshot, "latest_trade", None) if snapshot else None
+            if trade is None:
+                continue
+            trades[symbol] = (float(trade.price), pd.to_datetime(trade.timestamp))
+        return trades
+
+
+class StaticQuoteProvider(QuoteProvider):
+    """
+    In-memory provider for tests, dry-run sandboxes and offline development.
+
+    Args:
+        prices (dict): symbol → price
+        timestamp: Optional fixed timestamp (defaults to now, UTC)
+    """
+
+    def __init__(self, prices: dict, timestamp=None):
+        self.prices = dict(prices)
+        self.timestamp = timestamp
+        self.calls = 0  # number of round-trips served, for assertions
+
+    def get_latest_trades(self, symbols):
+        self.calls += 1
+        ts = pd.Timestamp(self.timestamp) if self.timestamp else pd.Timestamp.now(tz="UTC")
+        if ts.tzinfo is None:
+            ts = ts.tz_localize("UTC")
+        return {s.upper(): (float(self.prices[s.upper()]), ts) for s in symbols if s.upper() in self.prices}
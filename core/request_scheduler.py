@@ -0,0 +1,292 @@
+# core/request_scheduler.py
+
+"""
+ProviderRequestScheduler — Rate-Limit Aware Request Queue
+=========================================================
+
+Market data providers throttle aggressively (Alpha Vantage's free tier allows
+only a handful of calls per minute). Firing history requests back-to-back makes
+later symbols fail silently and reach the risk engine as NaNs.
+
+This module provides:
+- TokenBucket: thread-safe token bucket shared by everything calling one provider
+- ProviderRequestScheduler: a priority queue on top of the bucket that
+  • serves symbols with open positions first
+  • retries transient failures (HTTP 429/5xx, throttling notices, timeouts,
+    connection errors) with exponential backoff (plus jitter) and fails fast
+    on everything else (bad symbol, bad key, parse errors)
+  • exposes queue depth, wait-time and retry metrics
+  • lets async callers (core/async_market_data.py) take tokens from the same
+    bucket without blocking the event loop (`acquire_async`)
+
+One scheduler exists per provider per process (see `get_provider_scheduler`).
+"""
+
+import os
+import time
+import heapq
+import asyncio
+import random
+import threading
+from typing import Callable, Dict, Iterable, Optional
+
+try:
+    import requests
+except ImportError:  # only needed to recognise requests' network errors
+    requests = None
+
+try:
+    import aiohttp
+except ImportError:  # only needed to recognise aiohttp's network errors
+    aiohttp = None
+
+# Calls per minute and burst size per provider (override via env)
+PROVIDER_LIMITS = {
+    "alphavantage": {
+        "per_min": float(os.getenv("ALPHA_VANTAGE_CALLS_PER_MIN", 5)),
+        "burst": int(os.getenv("ALPHA_VANTAGE_BURST", 1))
+    },
+    "alpaca": {
+        "per_min": float(os.getenv("ALPACA_CALLS_PER_MIN", 200)),
+        "burst": int(os.getenv("ALPACA_BURST", 10))
+    }
+}
+
+# Retryable HTTP statuses: throttled, or a server-side failure
+TRANSIENT_HTTP_STATUS = {429, 500, 502, 503, 504}
+
+# Throttling notices returned with HTTP 200 (Alpha Vantage "Note" / "Information")
+THROTTLE_MARKERS = ("call frequency", "rate limit", "requests per", "thank you for using alpha vantage")
+
+# Daily-quota / plan notices: same wording as throttling, but the cap does not
+# reset for hours, so retrying only burns the backoff budget
+QUOTA_MARKERS = ("requests per day", "daily rate limit", "premium endpoint")
+
+
+def _http_status(exc: Exception) -> Optional[int]:
+    """HTTP status carried by an aiohttp / requests error, if any."""
+    status = getattr(exc, "status", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_transient(exc: Exception) -> bool:
+    """
+    True if a failed request is worth retrying: timeouts, connection errors,
+    HTTP 429/5xx and provider throttling notices (but not daily-quota notices).
+    """
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    if requests is not None and isinstance(exc, (requests.exceptions.Timeout, requests.exceptions.ConnectionError)):
+        return True
+    if aiohttp is not None and isinstance(exc, aiohttp.ClientConnectionError):
+        return True
+    status = _http_status(exc)
+    if status is not None:
+        return status in TRANSIENT_HTTP_STATUS
+    message = str(exc).lower()
+    if "per minute" not in message and any(marker in message for marker in QUOTA_MARKERS):
+        return False
+    return any(marker in message for marker in THROTTLE_MARKERS)
+
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate_per_min` tokens refill continuously up to `burst`.
+    """
+
+    def __init__(self, rate_per_min: float, burst: int = 1):
+        self.rate = rate_per_min / 60.0
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self) -> float:
+        """
+        Take a token if one is available.
+
+        Returns:
+            float: 0.0 if a token was taken, else seconds until the next one
+        """
+        with self._lock:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self) -> float:
+        """
+        Block until a token is available. Returns seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            delay = self.try_acquire()
+            if not delay:
+                return waited
+            time.sleep(delay)
+            waited += delay
+
+    async def acquire_async(self) -> float:
+        """
+        `acquire()` for coroutines: waits with asyncio.sleep instead of blocking.
+        """
+        waited = 0.0
+        while True:
+            delay = self.try_acquire()
+            if not delay:
+                return waited
+            await asyncio.sleep(delay)
+            waited += delay
+
+
+class ProviderRequestScheduler:
+    """
+    Priority + retry queue in front of one provider's TokenBucket.
+    """
+
+    def __init__(self, provider: str, bucket: TokenBucket, max_retries: int = 3,
+                 backoff_base_sec: float = 2.0, backoff_max_sec: float = 60.0,
+                 retry_on: Callable[[Exception], bool] = is_transient):
+        self.provider = provider
+        self.bucket = bucket
+        self.max_retries = max_retries
+        self.retry_on = retry_on
+        self.backoff_base_sec = backoff_base_sec
+        self.backoff_max_sec = backoff_max_sec
+
+        self._lock = threading.Lock()
+        self._queued = 0
+        self.metrics = {
+            "requests": 0,
+            "succeeded": 0,
+            "retries": 0,
+            "failures": 0,
+            "max_queue_depth": 0,
+            "total_wait_sec": 0.0
+        }
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(self.backoff_max_sec, self.backoff_base_sec * (2 ** attempt))
+        return delay * (0.5 + random.random() / 2)
+
+    def _track_queue(self, delta: int):
+        with self._lock:
+            self._queued += delta
+            self.metrics["max_queue_depth"] = max(self.metrics["max_queue_depth"], self._queued)
+
+    def _count(self, key: str, value=1):
+        with self._lock:
+            self.metrics[key] += value
+
+    def run(self, symbols: Iterable[str], fetch: Callable[[str], object],
+            priority_symbols: Optional[Iterable[str]] = None) -> Dict[str, object]:
+        """
+        Fetch every symbol through the rate limiter.
+
+        Args:
+            symbols: Symbols to fetch (duplicates are ignored)
+            fetch: Callable(symbol) → result; must raise on failure / throttling
+                (only errors accepted by `retry_on` are retried)
+            priority_symbols: Symbols served first (e.g. those with open positions)
+
+        Returns:
+            dict: symbol → result for every symbol that eventually succeeded
+        """
+        priority = set(priority_symbols or [])
+        ready = []      # heap of (priority, seq, symbol, attempt)
+        deferred = []   # heap of (ready_at, priority, seq, symbol, attempt)
+        seen = set()
+
+        for seq, symbol in enumerate(symbols):
+            if symbol in seen:
+                continue
+            seen.add(symbol)
+            heapq.heappush(ready, (0 if symbol in priority else 1, seq, symbol, 0))
+        self._track_queue(len(ready))
+
+        results = {}
+        while ready or deferred:
+            now = time.monotonic()
+            while deferred and deferred[0][0] <= now:
+                _, prio, seq, symbol, attempt = heapq.heappop(deferred)
+                heapq.heappush(ready, (prio, seq, symbol, attempt))
+
+            if not ready:
+                pause = deferred[0][0] - now
+                self._count("total_wait_sec", pause)
+                time.sleep(pause)
+                continue
+
+            prio, seq, symbol, attempt = heapq.heappop(ready)
+            self._count("total_wait_sec", self.bucket.acquire())
+            self._count("requests")
+
+            try:
+                results[symbol] = fetch(symbol)
+                self._count("succeeded")
+                self._track_queue(-1)
+            except Exception as e:
+                if not self.retry_on(e):
+                    print(f"[{self.provider}] {symbol} failed, not retrying: {type(e).__name__}: {e}")
+                    self._count("failures")
+                    self._track_queue(-1)
+                elif attempt < self.max_retries:
+                    delay = self._backoff(attempt)
+                    print(f"[{self.provider}] {symbol} failed ({e}); retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+                    self._count("retries")
+                    heapq.heappush(deferred, (time.monotonic() + delay, prio, seq, symbol, attempt + 1))
+                else:
+                    print(f"[{self.provider}] {symbol} failed after {attempt + 1} attempts: {e}")
+                    self._count("failures")
+                    self._track_queue(-1)
+
+        return results
+
+    async def acquire_async(self) -> float:
+        """
+        Take one token for a request the (async) caller sends itself, without
+        blocking the event loop. Counted in the request and wait metrics.
+
+        Returns:
+            float: seconds spent waiting
+        """
+        waited = await self.bucket.acquire_async()
+        self._count("total_wait_sec", waited)
+        self._count("requests")
+        return waited
+
+    def stats(self) -> dict:
+        """Current queue depth plus cumulative counters."""
+        with self._lock:
+            requests = self.metrics["requests"]
+            return {
+                "provider": self.provider,
+                "queue_depth": self._queued,
+                **self.metrics,
+                "total_wait_sec": round(self.metrics["total_wait_sec"], 3),
+                "avg_wait_sec": round(self.metrics["total_wait_sec"] / requests, 3) if requests else 0.0
+            }
+
+
+_schedulers: Dict[str, ProviderRequestScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_provider_scheduler(provider: str) -> ProviderRequestScheduler:
+    """
+    Return the process-wide scheduler for a provider ("alphavantage", "alpaca").
+    """
+    with _schedulers_lock:
+        if provider not in _schedulers:
+            limits = PROVIDER_LIMITS.get(provider, {"per_min": 60, "burst": 1})
+            bucket = TokenBucket(limits["per_min"], limits["burst"])
+            _schedulers[provider] = ProviderRequestScheduler(provider, bucket)
+        return _schedulers[provider]
@@ -1,6 +1,10 @@
 # core/trade_manager.py
 
-import pandas as pd
+import os
+import json
+from datetime import datetime
+from typing import Dict, Iterator, List, Set
+
 from utils.time_utils import get_timestamps
 from utils.trade_utils import simulate_slippage
 
@@ -13,17 +17,68 @@ class TradeManager:
     - Lifecycle tracking of all trades (open/closed)
     - Post-trade analytics (slippage, drawdown, PnL)
     - Backtest replays, compliance logs, and reporting
-    - Stored under portfolio_state["trades"]
+
+    Storage:
+    - Open trades: portfolio_state["trades"] (unordered), indexed in memory by
+      symbol, oldest entry_time first
+    - Closed trades: moved at close time to an append-only monthly ledger,
+      clients/<client_id>/snapshots/trades/closed_trades_YYYY-MM.jsonl
+      (kept in portfolio_state["trades"] when no client_id is given)
+    - Monthly aggregates: portfolio_state["monthly_trade_summary"], updated
+      incrementally on close
+
+    The ledger is the source of truth for closed trades. Appends are
+    deduplicated on (intent_id, symbol, entry_time), and each month's
+    aggregates record the ledger size they cover; a month whose file size
+    differs on load (crash before the state was saved, another process) is
+    re-aggregated from its file.
+
+    With a JournaledState (utils/state_journal.py) the manager claims
+    "trades" and "monthly_trade_summary" and marks what it changes, so
+    saving the state diffs only those trades and months.
     """
 
     def __init__(self, portfolio_state, client_id=None):
         # Reference to client's portfolio state dict (mutable)
         self.portfolio_state = portfolio_state
         self.client_id = client_id
+        self.ledger_dir = (
+            os.path.join("clients", client_id, "snapshots", "trades") if client_id else None
+        )
 
-        # In-memory trade list, persisted in portfolio_state["trades"]
+        # Open trades, persisted in portfolio_state["trades"]
         self.trades = self.portfolio_state.setdefault("trades", [])
 
+        # symbol → open trades (oldest first); id(trade) → slot in self.trades
+        self.open_trades: Dict[str, List[dict]] = {}
+        self._slots: Dict[int, int] = {}
+        for slot, trade in enumerate(self.trades):
+            self._slots[id(trade)] = slot
+            if trade.get("status") == "open":
+                self.open_trades.setdefault(trade["symbol"], []).append(trade)
+        for queue in self.open_trades.values():
+            # self.trades is not kept in entry order (O(1) removal)
+            queue.sort(key=self._entry_order)
+
+        # month → running aggregates of closed trades; month → ledger keys (lazy)
+        missing = "monthly_trade_summary" not in self.portfolio_state
+        self.monthly_totals = self.portfolio_state.setdefault("monthly_trade_summary", {})
+        self._ledger_keys: Dict[str, Set[str]] = {}
+
+        # State journal dirty tracking (JournaledState), if available
+        self._mark_dirty = getattr(self.portfolio_state, "mark_dirty", None)
+        if self._mark_dirty is not None:
+            self.portfolio_state.track("trades")
+            self.portfolio_state.track("monthly_trade_summary")
+
+        if self.ledger_dir:
+            self._reconcile_monthly_totals()
+            self._archive_closed_trades()
+        elif missing:
+            for trade in self.trades:
+                if trade.get("status") == "closed":
+                    self._add_to_monthly_totals(trade)
+
     def add_trade(
         self,
         symbol: str,
@@ -68,7 +123,10 @@ class TradeManager:
             "intent_id": intent_id
         }
 
+        self._slots[id(trade)] = len(self.trades)
         self.trades.append(trade)
+        self._changed("trades")
+        self.open_trades.setdefault(symbol, []).append(trade)
         print(f"[TradeManager] Added {action.upper()} {position_size} {symbol} @ {executed_price:.2f}")
 
     def update_trade(self, symbol: str, current_price: float):
@@ -77,14 +135,15 @@ class TradeManager:
 
         This is typically called during live valuation or rolling audits.
         """
-        for trade in self.trades:
-            if trade["symbol"] == symbol and trade["status"] == "open":
-                trade["current_price"] = current_price
-                if current_price < trade["lowest_price_since_entry"]:
-                    trade["lowest_price_since_entry"] = current_price
-                drawdown = (trade["lowest_price_since_entry"] - trade["entry_price"]) / trade["entry_price"]
-                trade["max_drawdown_pct"] = round(drawdown * 100, 4)
-                break
+        trade = self._open_trade(symbol)
+        if trade is None:
+            return
+        trade["current_price"] = current_price
+        if current_price < trade["lowest_price_since_entry"]:
+            trade["lowest_price_since_entry"] = current_price
+        drawdown = (trade["lowest_price_since_entry"] - trade["entry_price"]) / trade["entry_price"]
+        trade["max_drawdown_pct"] = round(drawdown * 100, 4)
+        self._changed("trades", self._slots[id(trade)])
 
     def check_trade_max_loss(self, symbol: str, account_capital: float, max_loss_pct: float = 1.0) -> bool:
         """
@@ -92,12 +151,12 @@ class TradeManager:
 
         Returns True if drawdown surpasses the allowed percentage of account capital.
         """
-        for trade in self.trades:
-            if trade["symbol"] == symbol and trade["status"] == "open":
-                loss_amount = (trade["entry_price"] - trade["lowest_price_since_entry"]) * trade["position_size"]
-                max_loss_amount = account_capital * max_loss_pct / 100
-                return loss_amount >= max_loss_amount
-        return False
+        trade = self._open_trade(symbol)
+        if trade is None:
+            return False
+        loss_amount = (trade["entry_price"] - trade["lowest_price_since_entry"]) * trade["position_size"]
+        max_loss_amount = account_capital * max_loss_pct / 100
+        return loss_amount >= max_loss_amount
 
     def close_trade(self, symbol: str, exit_price: float):
         """
@@ -105,12 +164,23 @@ class TradeManager:
 
         This does not update positions — only the trade ledger.
         """
-        for trade in self.trades:
-            if trade["symbol"] == symbol and trade["status"] == "open":
-                trade["exit_price"] = exit_price
-                trade["exit_time"] = self._now()
-                trade["status"] = "closed"
-                break
+        queue = self.open_trades.get(symbol)
+        if not queue:
+            return
+        trade = queue.pop(0)
+        if not queue:
+            del self.open_trades[symbol]
+
+        trade["exit_price"] = exit_price
+        trade["exit_time"] = self._now()
+        trade["status"] = "closed"
+
+        if self.ledger_dir:
+            self._archive(trade)
+            self._remove_slot(trade)
+        else:
+            self._changed("trades", self._slots[id(trade)])
+            self._add_to_monthly_totals(trade)
 
     def get_monthly_summary(self) -> dict:
         """
@@ -119,31 +189,200 @@ class TradeManager:
         Returns a dictionary keyed by 'YYYY-MM' with metrics such as:
         - trade count, win rate, total PnL, drawdown, slippage, commission
         """
-        if not self.trades:
-            return {}
-
-        df = pd.DataFrame(self.trades)
-        if df.empty or "exit_price" not in df.columns:
-            return {}
-
-        df["exit_time"] = pd.to_datetime(df["exit_time"])
-        df["month"] = df["exit_time"].dt.to_period("M").astype(str)
-        df["pnl"] = (df["exit_price"] - df["entry_price"]) * df["position_size"]
-        df["win"] = df["pnl"] > 0
-
-        summary = df.groupby("month").agg(
-            total_trades=("symbol", "count"),
-            wins=("win", "sum"),
-            losses=("win", lambda x: (~x).sum()),
-            win_rate=("win", lambda x: round(100 * x.sum() / len(x), 1)),
-            total_pnl=("pnl", "sum"),
-            max_drawdown_pct=("max_drawdown_pct", "max"),
-            avg_slippage_pct=("slippage_pct", "mean"),
-            avg_commission=("commission", "mean")
-        ).to_dict(orient="index")
-
+        summary = {}
+        for month, t in sorted(self.monthly_totals.items()):
+            count = t["total_trades"]
+            if not count:
+                continue
+            summary[month] = {
+                "total_trades": count,
+                "wins": t["wins"],
+                "losses": count - t["wins"],
+                "win_rate": round(100 * t["wins"] / count, 1),
+                "total_pnl": t["total_pnl"],
+                "max_drawdown_pct": t["max_drawdown_pct"],
+                "avg_slippage_pct": t["slippage_pct_sum"] / count,
+                "avg_commission": t["commission_sum"] / count,
+            }
         return summary
 
+    def iter_closed_trades(self, month: str = None) -> Iterator[dict]:
+        """
+        Stream closed trades from the monthly ledger files (oldest first),
+        optionally for a single 'YYYY-MM' month.
+        """
+        for path in self._ledger_files(month):
+            with open(path, "r") as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        print(f"[⚠️] Skipping malformed trade ledger line in {path}")
+        for trade in self.trades:
+            if trade.get("status") == "closed" and (month is None or self._month(trade) == month):
+                yield trade
+
+    def _changed(self, *path):
+        """Report a changed subtree of portfolio_state to the state journal."""
+        if self._mark_dirty is not None:
+            self._mark_dirty(*path)
+
+    # === Open-trade index ===
+
+    @staticmethod
+    def _entry_order(trade: dict):
+        try:
+            return 0, datetime.fromisoformat(trade["entry_time"]).timestamp()
+        except (KeyError, TypeError, ValueError):
+            return 1, 0.0
+
+    def _open_trade(self, symbol: str):
+        queue = self.open_trades.get(symbol)
+        return queue[0] if queue else None
+
+    def _remove_slot(self, trade: dict):
+        """Drop a trade from self.trades in O(1) (the last trade takes its slot)."""
+        slot = self._slots.pop(id(trade))
+        last = self.trades.pop()
+        if last is not trade:
+            self.trades[slot] = last
+            self._slots[id(last)] = slot
+        self._changed("trades")
+
+    # === Closed-trade ledger ===
+
+    @staticmethod
+    def _month(trade: dict) -> str:
+        return str(trade.get("exit_time") or "")[:7]
+
+    @staticmethod
+    def _ledger_key(trade: dict) -> str:
+        return f"{trade.get('intent_id')}|{trade.get('symbol')}|{trade.get('entry_time')}"
+
+    def _ledger_path(self, month: str) -> str:
+        return os.path.join(self.ledger_dir, f"closed_trades_{month}.jsonl")
+
+    def _ledger_files(self, month: str = None) -> List[str]:
+        if not self.ledger_dir or not os.path.isdir(self.ledger_dir):
+            return []
+        if month is not None:
+            path = self._ledger_path(month)
+            return [path] if os.path.exists(path) else []
+        return [
+            os.path.join(self.ledger_dir, name)
+            for name in sorted(os.listdir(self.ledger_dir))
+            if name.startswith("closed_trades_") and name.endswith(".jsonl")
+        ]
+
+    def _read_month(self, month: str):
+        """Ledger keys and aggregates of one month file (duplicates skipped)."""
+        keys, totals = set(), {}
+        path = self._ledger_path(month)
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                for line in f:
+                    try:
+                        trade = json.loads(line)
+                    except json.JSONDecodeError:
+                        print(f"[⚠️] Skipping malformed trade ledger line in {path}")
+                        continue
+                    key = self._ledger_key(trade)
+                    if key not in keys:
+                        keys.add(key)
+                        self._add_to_monthly_totals(trade, totals)
+            totals.setdefault(month, self._empty_totals())["ledger_bytes"] = os.path.getsize(path)
+        return keys, totals.get(month)
+
+    def _archive(self, trade: dict) -> bool:
+        """
+        Append a closed trade to its monthly ledger and aggregates, unless the
+        ledger already holds it. Returns True if it was appended.
+        """
+        month = self._month(trade)
+        if month not in self._ledger_keys:
+            keys, totals = self._read_month(month)
+            self._ledger_keys[month] = keys
+            if totals is not None:
+                self.monthly_totals[month] = totals
+                self._changed("monthly_trade_summary", month)
+        keys = self._ledger_keys[month]
+        key = self._ledger_key(trade)
+        if key in keys:
+            return False
+
+        os.makedirs(self.ledger_dir, exist_ok=True)
+        with open(self._ledger_path(month), "a") as f:
+            f.write(json.dumps(trade) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+            size = os.fstat(f.fileno()).st_size
+        keys.add(key)
+        self._add_to_monthly_totals(trade)
+        self.monthly_totals[month]["ledger_bytes"] = size
+        self._changed("monthly_trade_summary", month)
+        return True
+
+    def _archive_closed_trades(self):
+        """
+        Move closed trades still held in portfolio_state["trades"] (older state
+        files) to the ledger, folding them into the monthly aggregates.
+        """
+        if not self.ledger_dir:
+            return
+        closed = [t for t in self.trades if t.get("status") == "closed"]
+        if not closed:
+            return
+        archived = sum(self._archive(trade) for trade in closed)
+        self.trades[:] = [t for t in self.trades if t.get("status") != "closed"]
+        self._slots = {id(t): slot for slot, t in enumerate(self.trades)}
+        print(f"[TradeManager] Archived {archived} closed trades to {self.ledger_dir} "
+              f"({len(closed) - archived} already in the ledger)")
+
+    def _reconcile_monthly_totals(self):
+        """
+        Re-aggregate any month whose ledger file changed size since its
+        aggregates were saved (or that has no aggregates yet).
+        """
+        for path in self._ledger_files():
+            month = os.path.basename(path)[len("closed_trades_"):-len(".jsonl")]
+            saved = self.monthly_totals.get(month, {})
+            if saved.get("ledger_bytes") == os.path.getsize(path):
+                continue
+            keys, totals = self._read_month(month)
+            self._ledger_keys[month] = keys
+            self.monthly_totals[month] = totals
+            self._changed("monthly_trade_summary", month)
+
+    # === Monthly aggregates ===
+
+    @staticmethod
+    def _empty_totals() -> dict:
+        return {
+            "total_trades": 0,
+            "wins": 0,
+            "total_pnl": 0.0,
+            "max_drawdown_pct": None,
+            "slippage_pct_sum": 0.0,
+            "commission_sum": 0.0,
+        }
+
+    def _add_to_monthly_totals(self, trade: dict, totals: dict = None):
+        if trade.get("exit_price") is None or not trade.get("exit_time"):
+            return
+        if totals is None:
+            totals = self.monthly_totals
+            self._changed("monthly_trade_summary", self._month(trade))
+        pnl = (trade["exit_price"] - trade["entry_price"]) * trade["position_size"]
+        t = totals.setdefault(self._month(trade), self._empty_totals())
+        if t["max_drawdown_pct"] is None:
+            t["max_drawdown_pct"] = trade.get("max_drawdown_pct", 0.0)
+        t["total_trades"] += 1
+        t["wins"] += int(pnl > 0)
+        t["total_pnl"] += pnl
+        t["max_drawdown_pct"] = max(t["max_drawdown_pct"], trade.get("max_drawdown_pct", 0.0))
+        t["slippage_pct_sum"] += trade.get("slippage_pct", 0.0)
+        t["commission_sum"] += trade.get("commission", 0.0)
+
     @staticmethod
     def _now():
         """
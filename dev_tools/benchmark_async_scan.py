@@ -0,0 +1,98 @@
+# dev_tools/benchmark_async_scan.py
+
+# Measure intraday scan-cycle wall time against a local stub market-data
+# server (no API keys, no network). Each simulated client fetches latest
+# prices for its holdings plus 100-day history for each held symbol.
+#
+#   python dev_tools/benchmark_async_scan.py --clients 50 --latency-ms 80
+
+import sys
+import os
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from aiohttp import web
+
+from core.async_market_data import AsyncMarketDataFetcher
+from core.history_cache import get_history_cache
+from core.price_store import PriceStore
+from core.request_scheduler import ProviderRequestScheduler, TokenBucket
+
+UNIVERSE = ["AAPL", "MSFT", "NVDA", "AMZN", "GOOGL", "META", "JPM", "XOM",
+            "SPY", "QQQ", "TLT", "IEF", "BND", "XLK", "XLF", "XLE"]
+
+
+def build_stub_app(latency_ms: int) -> web.Application:
+    async def snapshots(request):
+        await asyncio.sleep(latency_ms / 1000)
+        symbols = request.query.get("symbols", "").split(",")
+        return web.json_response({
+            s: {"latestTrade": {"t": "2025-06-02T15:30:00Z", "p": 100 + random.random()}}
+            for s in symbols if s
+        })
+
+    async def daily(request):
+        await asyncio.sleep(latency_ms / 1000)
+        days = [f"2025-{m:02d}-{d:02d}" for m in range(1, 6) for d in range(1, 21)]
+        return web.json_response({"Time Series (Daily)": {
+            day: {"1. open": "100", "2. high": "101", "3. low": "99",
+                  "4. close": str(100 + random.random()), "5. volume": "1000"}
+            for day in days
+        }})
+
+    app = web.Application()
+    app.router.add_get("/v2/stocks/snapshots", snapshots)
+    app.router.add_get("/query", daily)
+    return app
+
+
+async def scan_client(market: AsyncMarketDataFetcher, holdings: list):
+    await market.get_prices(holdings)
+    await market.get_price_history_multi(holdings)
+
+
+async def run(clients: int, latency_ms: int, port: int):
+    runner = web.AppRunner(build_stub_app(latency_ms))
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    base = f"http://127.0.0.1:{port}"
+
+    rng = random.Random(42)
+    books = [rng.sample(UNIVERSE, 5) for _ in range(clients)]
+
+    get_history_cache().clear()
+    store = PriceStore(root=tempfile.mkdtemp())
+    # The stub has no rate limit; don't throttle against the real providers' quotas
+    schedulers = {name: ProviderRequestScheduler(name, TokenBucket(1e9, 1000)) for name in ("alpaca", "alphavantage")}
+    async with AsyncMarketDataFetcher(alpaca_data_url=base, alpha_vantage_url=f"{base}/query",
+                                      max_in_flight={"alpaca": 8, "alphavantage": 4}, store=store,
+                                      schedulers=schedulers) as market:
+        t0 = time.perf_counter()
+        await asyncio.gather(*(scan_client(market, book) for book in books))
+        elapsed = time.perf_counter() - t0
+
+    await runner.cleanup()
+
+    naive_requests = clients * 6
+    print(f"clients={clients} latency={latency_ms}ms")
+    print(f"  wall time          : {elapsed:.3f}s")
+    print(f"  HTTP requests      : {market.http_requests} (serial baseline: {naive_requests})")
+    print(f"  coalesced callers  : {market.coalesced}")
+    print(f"  serial estimate    : {naive_requests * latency_ms / 1000:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Async scan-cycle benchmark against a local stub")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--latency-ms", type=int, default=80)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    asyncio.run(run(args.clients, args.latency_ms, args.port))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+# dev_tools/migrate_csv_to_price_store.py
+
+# One-off migration: ingest the legacy per-day CSV cache
+# (market_data/<category>/<YYYY-MM-DD>/<SYMBOL>_last_100_days.csv)
+# into the columnar PriceStore (market_data/store/).
+# Safe to re-run: only bars newer than the stored tail are appended.
+
+import sys
+import os
+import argparse
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.price_store import PriceStore, STORE_DIR
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate CSV price cache into PriceStore")
+    parser.add_argument("--source", default="market_data", help="Root of the legacy CSV tree")
+    parser.add_argument("--store", default=STORE_DIR, help="PriceStore directory")
+    args = parser.parse_args()
+
+    store = PriceStore(root=args.store)
+    appended = store.ingest_csv_tree(root=args.source)
+
+    for symbol, count in sorted(appended.items()):
+        print(f"  {symbol:<6} +{count} bars (total {len(store.bars(symbol))})")
+    print(f"✅ Migrated {len(appended)} symbols into {args.store}")
+
+
+if __name__ == "__main__":
+    main()
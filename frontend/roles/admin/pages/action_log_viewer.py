@@ -11,6 +11,7 @@ import io
 from core.request_context import RequestContext
 from utils.user_action import UserAction
 from audit.action_logger import record_user_action, record_user_view
+from audit.log_archive import open_log, resolve_log_path
 
 LOG_BASE_PATH = "audit/user_action_logs"
 
@@ -41,14 +42,14 @@ def render(ctx: RequestContext):
     dates = sorted([d for d in os.listdir(date_base) if os.path.isdir(os.path.join(date_base, d))])
     selected_date = st.selectbox("Select Date", dates)
 
-    log_path = os.path.join(date_base, selected_date, "events.jsonl")
-    st.code(log_path, language="bash")
+    log_path = resolve_log_path(os.path.join(date_base, selected_date, "events.jsonl"))
+    st.code(log_path or os.path.join(date_base, selected_date, "events.jsonl"), language="bash")
 
-    if not os.path.exists(log_path):
+    if log_path is None:
         st.warning("No log file found.")
         return
 
-    with open(log_path, "r") as f:
+    with open_log(log_path) as f:
         lines = f.readlines()
 
     if not lines:
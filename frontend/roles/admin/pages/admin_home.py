@@ -32,7 +32,7 @@ def render(ctx: RequestContext):
 
     # === System Metrics Summary Table ===
     users = load_user_registry()
-    clients = load_client_registry()
+    clients = load_client_registry(frozen=True)
     risk_rules_count = 6  # Placeholder
 
     summary_data = {
@@ -14,24 +14,22 @@ from utils.config_loader import load_client_registry, save_client_registry
 from utils.time_utils import get_timestamps
 from utils.user_action import UserAction
 from audit.action_logger import record_user_view, record_user_action  # ✅ 双轨日志
+from audit.log_archive import list_log_files, read_last_record
 
 def get_last_scan_timestamp(client_id: str) -> str:
     scan_dir = os.path.join("clients", client_id, "audit", "periodic_scan_logs")
     if not os.path.exists(scan_dir):
         return "—"
-    logs = sorted(glob(os.path.join(scan_dir, "*.jsonl")), reverse=True)
+    logs = list_log_files(scan_dir, reverse=True)
     for fpath in logs:
-        with open(fpath, "r") as f:
-            lines = [line.strip() for line in f if line.strip()]
-            if lines:
-                try:
-                    data = json.loads(lines[-1])
-                    ts_str = data.get("timestamp")
-                    if ts_str:
-                        dt = datetime.fromisoformat(ts_str)
-                        return dt.strftime("%b %d, %Y @ %H:%M:%S")
-                except Exception:
-                    continue
+        try:
+            data = read_last_record(fpath)
+            ts_str = data.get("timestamp") if data else None
+            if ts_str:
+                dt = datetime.fromisoformat(ts_str)
+                return dt.strftime("%b %d, %Y @ %H:%M:%S")
+        except Exception:
+            continue
     return "—"
 
 def render(ctx: RequestContext):
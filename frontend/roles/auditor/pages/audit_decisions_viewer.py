@@ -10,6 +10,9 @@ import plotly.express as px
 
 from utils.time_utils import get_timestamps
 from audit.action_logger import record_user_view, record_user_action
+from audit.audit_aggregates import get_audit_aggregates
+from audit.audit_query import AUDIT_PAGE_SIZE, iter_decisions
+from audit.log_archive import read_records
 from core.client_context import ClientContext
 from core.request_context import RequestContext
 from utils.user_action import UserAction
@@ -17,16 +20,8 @@ from utils.user_action import UserAction
 DECISION_PATH = "audit/decisions"
 
 def load_json_or_jsonl(filepath):
-    try:
-        if filepath.endswith(".jsonl"):
-            with open(filepath, "r") as f:
-                return [json.loads(line.strip()) for line in f if line.strip()]
-        elif filepath.endswith(".json"):
-            with open(filepath, "r") as f:
-                return [json.load(f)]
-    except Exception as e:
-        print(f"[⚠️] Failed to load {filepath}: {e}")
-    return []
+    # Handles .json, .jsonl and archived .jsonl.gz (see audit/log_archive.py)
+    return read_records(filepath)
 
 def summarize_record(r):
     intent = r.get("intent", {})
@@ -60,25 +55,21 @@ def render(ctx: RequestContext, client: ClientContext):
         st.warning("No audit/decisions directory found.")
         return
 
-    # === Load records ===
-    all_records = []
-    for fname in sorted(os.listdir(base_path), reverse=True):
-        if fname.endswith((".json", ".jsonl")):
-            all_records.extend(load_json_or_jsonl(os.path.join(base_path, fname)))
-
-    if not all_records:
+    # === Symbol list and per-symbol metrics from the daily aggregates ===
+    aggregates = get_audit_aggregates(client.client_id)
+    symbols = aggregates.distinct("decision", "symbol")
+    if not symbols:
         st.info("No decision audit records found.")
         return
 
-    rows = [summarize_record(r) for r in all_records if isinstance(r, dict)]
-    df = pd.DataFrame(rows)
-    df["Timestamp"] = pd.to_datetime(df["Timestamp"], errors="coerce")
-    df = df.dropna(subset=["Symbol", "Timestamp"]).sort_values("Timestamp")
-
-    # === Symbol Selector ===
-    symbols = sorted(df["Symbol"].dropna().unique())
     selected_symbol = st.selectbox("🔎 Select Symbol", symbols)
-    sdf = df[df["Symbol"] == selected_symbol]
+
+    stats = aggregates.decision_rollup(by=["symbol"], symbol=selected_symbol)
+    if stats:
+        m1, m2, m3 = st.columns(3)
+        m1.metric("Decisions", stats[0]["n"])
+        m2.metric("Approval Rate", f"{stats[0]['approval_rate']:.1%}")
+        m3.metric("Avg Score", f"{stats[0]['avg_score']:.3f}" if stats[0]["avg_score"] is not None else "—")
 
     record_user_view(ctx, module="audit_decisions", action="select_symbol", payload={"symbol": selected_symbol})
 
@@ -97,26 +88,49 @@ def render(ctx: RequestContext, client: ClientContext):
         "only_unapproved": only_unapproved
     })
 
-    sdf["Score"] = pd.to_numeric(sdf["Score"], errors="coerce")
-    sdf["Approved"] = sdf["Approved"].fillna(False)
-    mask = (sdf["Score"] < score_threshold) & (~sdf["Approved"] if only_unapproved else True)
-    flagged = sdf[mask].copy()
+    # === Stream the symbol's records page by page, keeping only flagged summaries ===
+    flagged_rows, details = [], []
+    for batch in iter_decisions(client.client_id, symbol=selected_symbol,
+                                approved=False if only_unapproved else None):
+        for r in batch:
+            row = summarize_record(r)
+            score = pd.to_numeric(row["Score"], errors="coerce")
+            if not score < score_threshold:
+                continue
+            row["Score"] = score
+            if len(details) < 5:
+                details.append(row)
+            flagged_rows.append({k: v for k, v in row.items() if k != "Raw"})
+
+    flagged = pd.DataFrame(flagged_rows, columns=["Symbol", "Action", "Score", "Approved", "Timestamp"])
+    flagged["Timestamp"] = pd.to_datetime(flagged["Timestamp"], errors="coerce")
+    flagged["Approved"] = flagged["Approved"].fillna(False)
 
     # === Flagged Summary ===
     if flagged.empty:
         st.success("✅ No flagged records based on current criteria.")
         return
 
-    st.markdown(f"### 📊 {selected_symbol} · Score Trend")
-    fig = px.line(sdf, x="Timestamp", y="Score", title="Approval Score", markers=True)
-    st.plotly_chart(fig, use_container_width=True)
+    st.markdown(f"### 📊 {selected_symbol} · Score Trend (Daily Average)")
+    trend = pd.DataFrame(aggregates.decision_rollup(by=["date"], symbol=selected_symbol))
+    if not trend.empty:
+        fig = px.line(trend, x="date", y="avg_score", title="Approval Score", markers=True,
+                      labels={"date": "Date", "avg_score": "Score"})
+        st.plotly_chart(fig, use_container_width=True)
 
     st.markdown("### 🧾 Flagged Records Table")
-    st.dataframe(flagged[["Timestamp", "Action", "Score", "Approved"]], use_container_width=True)
+    pages = max((len(flagged) - 1) // AUDIT_PAGE_SIZE + 1, 1)
+    page = st.number_input("Page", min_value=1, max_value=pages, value=1, step=1) - 1 if pages > 1 else 0
+    st.dataframe(
+        flagged[["Timestamp", "Action", "Score", "Approved"]].iloc[page * AUDIT_PAGE_SIZE:(page + 1) * AUDIT_PAGE_SIZE],
+        use_container_width=True
+    )
+    st.caption(f"{len(flagged)} flagged records · page {page + 1} of {pages}")
 
     st.markdown("### 🔍 Flagged Record Details")
-    for _, row in flagged.sort_values("Timestamp", ascending=False).head(5).iterrows():
-        label = f"[{row['Timestamp'].strftime('%Y-%m-%d %H:%M')}] {row['Action']} | Score: {row['Score']} | {'✅' if row['Approved'] else '❌'}"
+    for row in details:
+        ts = pd.to_datetime(row["Timestamp"], errors="coerce")
+        label = f"[{ts.strftime('%Y-%m-%d %H:%M') if pd.notnull(ts) else row['Timestamp']}] {row['Action']} | Score: {row['Score']} | {'✅' if row['Approved'] else '❌'}"
         with st.expander(label):
             record_user_action(ctx, module="audit_decisions", action="view_flagged_detail", payload={
                 "symbol": row["Symbol"],
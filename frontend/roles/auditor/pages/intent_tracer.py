@@ -14,25 +14,33 @@ from core.request_context import RequestContext
 from core.client_context import ClientContext
 from utils.user_action import UserAction
 from audit.action_logger import record_user_action, record_user_view
+from audit.audit_trail import load_portfolio_snapshot
+from audit.decision_index import get_decision_index
+from audit.log_archive import iter_records, list_log_files
 
 def search_intent_in_audit(client_id, intent_id=None):
+    # Specific intent → indexed lookup in decisions/ (only module with nested intent records)
+    if intent_id is not None:
+        try:
+            index = get_decision_index(client_id)
+            index.refresh()
+            return index.read(index.locate(intent_id=intent_id))
+        except Exception as e:
+            print(f"[⚠️] Decision index lookup failed, scanning audit logs — {type(e).__name__}: {e}")
+
     base = f"clients/{client_id}/audit"
     results = []
     for module in os.listdir(base):
         module_path = os.path.join(base, module)
         if not os.path.isdir(module_path):
             continue
-        for file in glob(f"{module_path}/*.json*"):
-            with open(file, "r") as f:
-                lines = f.readlines() if file.endswith(".jsonl") else [f.read()]
-                for line in lines:
-                    try:
-                        record = json.loads(line)
-                        found_id = record.get("intent", {}).get("intent_id")
-                        if intent_id is None or found_id == intent_id:
-                            results.append((file, record))
-                    except:
-                        continue
+        for file in list_log_files(module_path):
+            for record in iter_records(file):
+                if not isinstance(record, dict):
+                    continue
+                found_id = record.get("intent", {}).get("intent_id")
+                if intent_id is None or found_id == intent_id:
+                    results.append((file, record))
     return results
 
 def format_time(timestamp):
@@ -133,7 +141,7 @@ def render(ctx: RequestContext, client: ClientContext):
                 intent = record.get("intent", {})
                 approval = record.get("approval", {})
                 execution = record.get("execution", {})
-                snapshot = record.get("portfolio_snapshot", {})
+                snapshot = load_portfolio_snapshot(record, client.client_id)
                 silent = record.get("silent", {})
                 killswitch = record.get("killswitch", {})
                 feedback = record.get("feedback")
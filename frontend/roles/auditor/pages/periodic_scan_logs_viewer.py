@@ -10,17 +10,14 @@ from datetime import datetime
 from core.client_context import ClientContext
 from core.request_context import RequestContext
 from audit.action_logger import record_user_view, record_user_action
+from audit.log_archive import list_log_files, plain_name, read_records
 from utils.user_action import UserAction
 
 SCAN_PATH = "audit/periodic_scan_logs"
 
 def load_jsonl(filepath):
-    try:
-        with open(filepath, "r") as f:
-            return [json.loads(line.strip()) for line in f if line.strip()]
-    except Exception as e:
-        print(f"[⚠️] Failed to load {filepath}: {e}")
-        return []
+    # Handles plain .jsonl and archived .jsonl.gz (see audit/log_archive.py)
+    return read_records(filepath)
 
 def extract_summary(record):
     return {
@@ -54,7 +51,7 @@ def render(ctx: RequestContext, client: ClientContext):
         st.warning("No audit/periodic_scan_logs directory found.")
         return
 
-    files = sorted([f for f in os.listdir(base_path) if f.endswith(".jsonl")], reverse=True)
+    files = [os.path.basename(f) for f in list_log_files(base_path, reverse=True) if not f.endswith(".json")]
     if not files:
         st.info("No scan log files found.")
         return
@@ -100,7 +97,7 @@ def render(ctx: RequestContext, client: ClientContext):
             if st.download_button(
                 label="Download CSV",
                 data=df.to_csv(index=False),
-                file_name=f"scan_{fname.replace('.jsonl','')}.csv"
+                file_name=f"scan_{plain_name(fname).replace('.jsonl','')}.csv"
             ):
                 record_user_action(ctx, module="periodic_scan_logs", action="download_csv", payload={
                     "file": fname,
@@ -2,15 +2,15 @@
 
 REQUIRES_CLIENT_CONTEXT = True
 
-import os, json
 import streamlit as st
 import pandas as pd
-from datetime import datetime
 
 from core.client_context import ClientContext
 from core.request_context import RequestContext
 from audit.action_logger import record_user_view, record_user_action
-from utils.time_utils import get_timestamps
+from audit.audit_aggregates import get_audit_aggregates, triggered_by
+from audit.audit_query import iter_triggers, trigger_page
+from audit.log_archive import read_records
 from utils.user_action import UserAction
 
 TRIGGER_MODULES = {
@@ -19,29 +19,28 @@ TRIGGER_MODULES = {
 }
 
 def load_json_or_jsonl(filepath):
-    try:
-        if filepath.endswith(".jsonl"):
-            with open(filepath, "r") as f:
-                return [json.loads(line.strip()) for line in f if line.strip()]
-        elif filepath.endswith(".json"):
-            with open(filepath, "r") as f:
-                return [json.load(f)]
-    except Exception as e:
-        print(f"[⚠️] Failed to load {filepath}: {e}")
-    return []
+    # Handles .json, .jsonl and archived .jsonl.gz (see audit/log_archive.py)
+    return read_records(filepath)
 
 def extract_trigger_summary(record, source_module):
     asset = record.get("symbol") or record.get("asset")
     return {
         "Timestamp": record.get("timestamp") or record.get("time") or record.get("trigger_time"),
         "Symbol": str(asset),
-        "TriggeredBy": record.get("user_id") or record.get("source", "system"),
+        "TriggeredBy": triggered_by(record),
         "Reason": record.get("reason", "—"),
         "TriggerType": TRIGGER_MODULES.get(source_module, source_module),
         "Days": record.get("days", record.get("duration", 0)),
         "Raw": record
     }
 
+def build_trigger_export(client_id, query):
+    # Streams every matching trigger log: only run on explicit request
+    return pd.DataFrame([
+        {k: v for k, v in extract_trigger_summary(r, category).items() if k != "Raw"}
+        for batch in iter_triggers(client_id, **query) for category, r in batch
+    ])
+
 def render(ctx: RequestContext, client: ClientContext):
 
     if not ctx.has_permission("auditor.view_risk_triggers"):
@@ -57,71 +56,81 @@ def render(ctx: RequestContext, client: ClientContext):
         </div>
     """, unsafe_allow_html=True)
 
-    base_path = client.base_path
-    all_entries = []
-
-    for folder, label in TRIGGER_MODULES.items():
-        full_path = os.path.join(base_path, "audit", folder)
-        if not os.path.exists(full_path):
-            continue
-        for fname in sorted(os.listdir(full_path), reverse=True):
-            if fname.endswith((".json", ".jsonl")):
-                for r in load_json_or_jsonl(os.path.join(full_path, fname)):
-                    entry = extract_trigger_summary(r, folder)
-                    entry["Module"] = folder
-                    all_entries.append(entry)
-
-    if not all_entries:
-        st.info("No trigger logs found.")
-        return
+    # === Summary counts (materialized daily aggregates) ===
+    aggregates = get_audit_aggregates(client.client_id)
+    summary = aggregates.trigger_rollup(by=["category", "event"])
+    if summary:
+        st.markdown("### 📊 Trigger Summary")
+        summary_df = pd.DataFrame(summary).rename(columns={"event": "Event", "n": "Count"})
+        summary_df.insert(0, "TriggerType", summary_df.pop("category").map(lambda c: TRIGGER_MODULES.get(c, c)))
+        st.dataframe(summary_df, use_container_width=True, hide_index=True)
 
-    df = pd.DataFrame(all_entries)
-    df["Timestamp"] = pd.to_datetime(df["Timestamp"], errors="coerce")
-    df = df.dropna(subset=["Timestamp"]).sort_values("Timestamp", ascending=False)
-
-    # === Filter Section ===
+    # === Filter Section (options from the aggregates, predicates pushed to the query) ===
     st.markdown("### 🎯 Filters")
     cols = st.columns(3)
     with cols[0]:
-        symbols = sorted(df["Symbol"].dropna().unique())
+        symbols = aggregates.distinct("trigger", "symbol")
         selected_symbol = st.selectbox("Symbol", ["(All)"] + symbols)
     with cols[1]:
-        types = sorted(df["TriggerType"].dropna().unique())
+        types = sorted(TRIGGER_MODULES.values())
         selected_type = st.selectbox("Trigger Type", ["(All)"] + types)
     with cols[2]:
-        users = sorted(df["TriggeredBy"].dropna().unique())
+        users = aggregates.distinct("trigger", "triggered_by")
         selected_user = st.selectbox("Triggered By", ["(All)"] + users)
 
-    filtered = df.copy()
-    if selected_symbol != "(All)":
-        filtered = filtered[filtered["Symbol"] == selected_symbol]
-    if selected_type != "(All)":
-        filtered = filtered[filtered["TriggerType"] == selected_type]
-    if selected_user != "(All)":
-        filtered = filtered[filtered["TriggeredBy"] == selected_user]
+    query = {
+        "categories": [c for c, label in TRIGGER_MODULES.items() if selected_type in ("(All)", label)],
+        "symbol": None if selected_symbol == "(All)" else selected_symbol,
+        "triggered_by": None if selected_user == "(All)" else selected_user
+    }
+
+    page = st.number_input("Page", min_value=1, value=1, step=1) - 1
+    entries, has_more = trigger_page(client.client_id, page=page, **query)
 
     record_user_view(ctx, module="risk_triggers", action="apply_filters", payload={
         "symbol": selected_symbol,
         "type": selected_type,
         "user": selected_user,
-        "count": len(filtered)
+        "page": page + 1,
+        "count": len(entries)
     })
 
+    if not entries:
+        st.info("No trigger logs found.")
+        return
+
+    filtered = pd.DataFrame([extract_trigger_summary(r, category) for category, r in entries])
+    filtered["Timestamp"] = pd.to_datetime(filtered["Timestamp"], errors="coerce")
+
     # === Summary Table ===
     st.markdown("### 📋 Triggered Events")
     st.dataframe(
         filtered[["Timestamp", "Symbol", "TriggerType", "Reason", "Days", "TriggeredBy"]],
         use_container_width=True
     )
+    st.caption(f"Page {page + 1}{' · more on the next page' if has_more else ''}")
 
-    # === Export CSV ===
+    # === Export CSV (all pages, summaries only; built on demand, kept for this filter) ===
     st.markdown("### 📥 Export")
-    if st.download_button("Download CSV", data=filtered.to_csv(index=False), file_name="risk_triggers.csv"):
-        record_user_action(ctx, module="risk_triggers", action="download_trigger_csv", payload={"count": len(filtered)})
+    export_scope = {"client_id": client.client_id, **query}
+    prepared = st.session_state.get("risk_triggers_export")
+    if prepared is None or prepared["scope"] != export_scope:
+        prepared = None
+        if st.button("Prepare export"):
+            export = build_trigger_export(client.client_id, query)
+            prepared = st.session_state["risk_triggers_export"] = {
+                "scope": export_scope,
+                "csv": export.to_csv(index=False),
+                "count": len(export)
+            }
+    if prepared is not None:
+        if st.download_button("Download CSV", data=prepared["csv"], file_name="risk_triggers.csv"):
+            record_user_action(ctx, module="risk_triggers", action="download_trigger_csv", payload={"count": prepared["count"]})
 
     # === Expanded View ===
     st.markdown("### 🔍 Record Details")
     for _, row in filtered.head(5).iterrows():
-        label = f"{row['Timestamp'].strftime('%Y-%m-%d %H:%M')} | {row['Symbol']} | {row['TriggerType']}"
+        ts = row["Timestamp"].strftime("%Y-%m-%d %H:%M") if pd.notnull(row["Timestamp"]) else "—"
+        label = f"{ts} | {row['Symbol']} | {row['TriggerType']}"
         with st.expander(label):
             st.json(row["Raw"])
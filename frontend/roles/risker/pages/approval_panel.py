@@ -12,15 +12,13 @@ from core.client_context import ClientContext
 from core.request_context import RequestContext
 from utils.user_action import UserAction
 from audit.action_logger import record_user_view, record_user_action
+from audit.audit_aggregates import date_from_path
+from audit.audit_query import iter_decisions
+from audit.log_archive import list_log_files, read_records
 
 def load_json_or_jsonl(filepath):
-    if filepath.endswith(".jsonl"):
-        with open(filepath, "r") as f:
-            return [json.loads(line.strip()) for line in f if line.strip()]
-    elif filepath.endswith(".json"):
-        with open(filepath, "r") as f:
-            return [json.load(f)]
-    return []
+    # Handles .json, .jsonl and archived .jsonl.gz (see audit/log_archive.py)
+    return read_records(filepath)
 
 def summarize_record(record):
     intent = record.get("intent", {})
@@ -58,13 +56,13 @@ def render(ctx: RequestContext, client: ClientContext):
     """, unsafe_allow_html=True)
 
     audit_folder = os.path.join(client.base_path, "audit/decisions")
-    files = sorted(glob(f"{audit_folder}/*.json*"), reverse=True)[:5]
+    files = list_log_files(audit_folder, reverse=True)[:5]
 
+    # Stream the last 5 log days through the shared query API
     all_rows = []
-    for f in files:
-        records = load_json_or_jsonl(f)
-        for r in records:
-            all_rows.append(summarize_record(r))
+    if files:
+        for batch in iter_decisions(client.client_id, newest_first=False, start_date=date_from_path(files[-1])):
+            all_rows.extend(summarize_record(r) for r in batch)
 
     if not all_rows:
         st.info("🟡 No approval records found in recent files.")
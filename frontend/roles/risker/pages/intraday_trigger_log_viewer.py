@@ -13,6 +13,7 @@ import dateutil.parser
 from core.request_context import RequestContext
 from utils.user_action import UserAction
 from audit.action_logger import record_user_action
+from audit.log_archive import list_log_files, read_last_record
 import pandas as pd
 from io import BytesIO
 from fpdf import FPDF
@@ -22,17 +23,14 @@ def load_latest_scan_log(client_id: str):
     if not os.path.exists(log_dir):
         return None, None
 
-    log_files = sorted(glob(os.path.join(log_dir, "*.jsonl")), reverse=True)
+    log_files = list_log_files(log_dir, reverse=True)
     for fpath in log_files:
-        with open(fpath, "r") as f:
-            lines = [line.strip() for line in f if line.strip()]
-            if lines:
-                try:
-                    data = json.loads(lines[-1])
-                    ts = data.get("timestamp")
-                    return data, ts
-                except Exception:
-                    continue
+        try:
+            data = read_last_record(fpath)
+            if data:
+                return data, data.get("timestamp")
+        except Exception:
+            continue
     return None, None
 
 def assess_risk_level(drawdown: float, silent_days: int) -> str:
@@ -60,7 +58,7 @@ def render(ctx: RequestContext):
     this_month_str = now.strftime("%Y-%m")
     this_week_start = (now - timedelta(days=now.weekday())).date()
 
-    registry = load_client_registry()
+    registry = load_client_registry(frozen=True)
     rows = []
     triggered_count = 0
 
@@ -3,27 +3,25 @@
 REQUIRES_CLIENT_CONTEXT = True
 
 import streamlit as st
-import os
-import json
 import pandas as pd
 import plotly.express as px
-from glob import glob
-from datetime import datetime
+from datetime import timedelta
 
 from core.client_context import ClientContext
 from core.request_context import RequestContext
 from utils.user_action import UserAction
 from audit.action_logger import record_user_view, record_user_action
+from audit.audit_aggregates import get_audit_aggregates
+from audit.audit_query import iter_decisions
+from audit.log_archive import read_records
+from utils.time_utils import get_timestamps
+
+RECENT_DAYS = 7  # raw records loaded for the summary table, alerts and export
 
 # === 加载审计记录 ===
 def load_json_or_jsonl(filepath):
-    if filepath.endswith(".jsonl"):
-        with open(filepath, "r") as f:
-            return [json.loads(line.strip()) for line in f if line.strip()]
-    elif filepath.endswith(".json"):
-        with open(filepath, "r") as f:
-            return [json.load(f)]
-    return []
+    # Handles .json, .jsonl and archived .jsonl.gz (see audit/log_archive.py)
+    return read_records(filepath)
 
 # === 提取摘要字段 ===
 def summarize_record(record):
@@ -60,55 +58,67 @@ def render(ctx: RequestContext, client: ClientContext):
         </div>
     """, unsafe_allow_html=True)
 
-    audit_path = os.path.join(client.base_path, "audit/decisions")
-    files = sorted(glob(f"{audit_path}/*.json*"))
-
-    rows = []
-    for f in files:
-        for r in load_json_or_jsonl(f):
-            rows.append(summarize_record(r))
-
-    df = pd.DataFrame(rows)
-    df = df[df["Date"].notnull()].copy()
-    df["Date"] = pd.to_datetime(df["Date"])
+    # Trends come from the materialized daily aggregates (full history)
+    trend = pd.DataFrame(get_audit_aggregates(client.client_id).decision_rollup(by=["date", "symbol"]))
+    if trend.empty:
+        st.info("No decision audit records found.")
+        return
+    trend = trend.rename(columns={
+        "date": "Date", "symbol": "Symbol", "avg_score": "Score", "avg_var": "VAR",
+        "avg_cvar": "CVAR", "avg_volatility": "Volatility", "approval_rate": "Approval Rate"
+    })
+    trend = trend[trend["Symbol"] != ""].copy()
+    trend["Date"] = pd.to_datetime(trend["Date"])
 
     # === 筛选器 ===
-    symbols = sorted(df["Symbol"].dropna().unique())
+    symbols = sorted(trend["Symbol"].unique())
     selected = st.multiselect("Filter by Symbol", symbols, default=symbols)
+    trend = trend[trend["Symbol"].isin(selected)]
 
-    df = df[df["Symbol"].isin(selected)]
+    # Raw records: only the recent window, filtered by symbol in the decision index
+    start_date = (get_timestamps()["now_ny"].date() - timedelta(days=RECENT_DAYS - 1)).isoformat()
+    rows = []
+    if selected:
+        for batch in iter_decisions(client.client_id, newest_first=False, symbol=selected, start_date=start_date):
+            rows.extend(summarize_record(r) for r in batch)
+
+    df = pd.DataFrame(rows, columns=["Date", "Symbol", "Score", "VAR", "CVAR", "Volatility", "Approved", "Raw"])
+    df = df[df["Date"].notnull() & (df["Date"] != "")].copy()
+    df["Date"] = pd.to_datetime(df["Date"])
 
     # ✅ 行为日志：筛选了哪些 symbol
     record_user_view(ctx, module="risk_insight", action="filter_symbols", payload={"symbols": selected})
 
     # === 概览表格 ===
-    st.markdown("### 🧾 Summary Table (Latest per Symbol)")
+    st.markdown(f"### 🧾 Summary Table (Latest per Symbol, last {RECENT_DAYS} days)")
     if not df.empty:
         latest_df = df.sort_values("Date").drop_duplicates("Symbol", keep="last")
         st.dataframe(latest_df[["Symbol", "Score", "VAR", "CVAR", "Volatility", "Approved"]], use_container_width=True)
 
-    # === 趋势图 ===
+    # === 趋势图（日均值） ===
     st.markdown("---")
-    st.markdown("### 📊 Risk Indicator Trends")
+    st.markdown("### 📊 Risk Indicator Trends (Daily Average)")
     df = df.sort_values("Date").drop_duplicates(["Date", "Symbol"], keep="last")
 
-    for col in ["Score", "VAR", "CVAR", "Volatility"]:
-        st.markdown(f"#### {col} Over Time")
-        fig = px.line(df, x="Date", y=col, color="Symbol", markers=True)
-
-        if col == "VAR":
-            warn_df = df[df["VAR"] < -0.05]
-            for s in warn_df["Symbol"].unique():
-                subset = warn_df[warn_df["Symbol"] == s]
-                fig.add_scatter(x=subset["Date"], y=subset["VAR"], mode="markers", name=f"⚠️ High VAR {s}", marker=dict(size=10, color="red"))
-
-        if col == "Score":
-            reject_df = df[df["Approved"] == False]
-            for s in reject_df["Symbol"].unique():
-                subset = reject_df[reject_df["Symbol"] == s]
-                fig.add_scatter(x=subset["Date"], y=subset["Score"], mode="markers", name=f"❌ Rejected {s}", marker=dict(size=10, color="orange"))
-
-        st.plotly_chart(fig, use_container_width=True)
+    if not trend.empty:
+        trend = trend.sort_values("Date")
+        for col in ["Score", "VAR", "CVAR", "Volatility"]:
+            st.markdown(f"#### {col} Over Time")
+            fig = px.line(trend, x="Date", y=col, color="Symbol", markers=True)
+
+            if col == "VAR":
+                warn_df = trend[trend["VAR"] < -0.05]
+                for s in warn_df["Symbol"].unique():
+                    subset = warn_df[warn_df["Symbol"] == s]
+                    fig.add_scatter(x=subset["Date"], y=subset["VAR"], mode="markers", name=f"⚠️ High VAR {s}", marker=dict(size=10, color="red"))
+
+            if col == "Score":
+                reject_df = trend[trend["approved"] < trend["n"]]
+                for s in reject_df["Symbol"].unique():
+                    subset = reject_df[reject_df["Symbol"] == s]
+                    fig.add_scatter(x=subset["Date"], y=subset["Score"], mode="markers", name=f"❌ Rejected {s}", marker=dict(size=10, color="orange"))
+
+            st.plotly_chart(fig, use_container_width=True)
 
     # === 异常详情 ===
     st.markdown("---")
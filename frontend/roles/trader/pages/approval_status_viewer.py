@@ -12,19 +12,14 @@ from core.client_context import ClientContext
 from utils.visualization import render_approval_status
 from utils.user_action import UserAction
 from audit.action_logger import record_user_view
+from audit.log_archive import iter_records, list_log_files
 
 def load_audit_records(base_path: str):
     audit_path = os.path.join(base_path, "audit", "decisions")
-    files = sorted(glob(f"{audit_path}/*.json*"), reverse=True)[:10]
+    files = list_log_files(audit_path, reverse=True)[:10]
     records = []
     for f in files:
-        with open(f, "r") as infile:
-            lines = [line.strip() for line in infile if line.strip()]
-            for line in lines:
-                try:
-                    records.append(json.loads(line))
-                except json.JSONDecodeError:
-                    continue
+        records.extend(iter_records(f))
     return records
 
 def render(ctx: RequestContext, client: ClientContext):
@@ -135,28 +135,16 @@ def render(ctx: RequestContext, client: ClientContext):
     st.markdown("<h3 style='font-size: 1.7rem; margin-bottom: 0.5rem;'>Portfolio Overview</h3>", unsafe_allow_html=True)
     st.markdown("<hr>", unsafe_allow_html=True)
 
-    portfolio_assets = client.portfolio_state.get("assets", {})
-    capital = client.portfolio_state.get("capital", 0.0)
+    # Running totals maintained by Portfolio — no pass over every position
+    exposure = client.portfolio.exposure_summary()
+    portfolio_assets = client.portfolio.assets
 
     if not portfolio_assets:
         st.warning("No holdings found. All positions may have been closed, or trading is currently restricted.")
         return
 
-    symbol_to_category = client.config_loader.symbol_category_map
-    categorized_assets = {}
-    category_total_value = {}
-
-    for symbol, info in portfolio_assets.items():
-        pos = info.get("position", 0)
-        price = info.get("current_price", 0.0)
-        if pos <= 0 or price <= 0:
-            continue
-
-        value = pos * price
-        category = symbol_to_category.get(symbol.upper(), "Uncategorized")
-        categorized_assets.setdefault(category, []).append({"symbol": symbol, "value": value})
-        category_total_value[category] = category_total_value.get(category, 0.0) + value
-
+    capital = exposure["cash"]
+    category_total_value = exposure["category_value"]
     total_invested = sum(category_total_value.values())
     total_account_value = capital + total_invested
 
@@ -182,7 +170,10 @@ def render(ctx: RequestContext, client: ClientContext):
         st.info(f"Cash reserve of ${capital:,.2f} is currently unallocated.")
         return
 
-    holdings = categorized_assets.get(selected_category, [])
+    holdings = [
+        {"symbol": symbol, "value": value}
+        for symbol, value in client.portfolio.exposure.holdings.get(selected_category, {}).items()
+    ]
     if not holdings:
         st.warning(f"No active holdings in '{selected_category}'.")
         return
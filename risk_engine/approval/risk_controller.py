@@ -23,6 +23,37 @@ Supports plug-in override classes:
 ✅ Actively used in trade gating and approval pipeline.
 """
 
+from risk_engine.models.model_fit_service import get_model_fit_service
+from risk_engine.signals.risk_signals import RiskSignalSet, cache_signal, get_cached_signal
+from utils.risk_utils import build_close_matrix, calculate_var_cvar_batch
+
+
+def compute_risk_signals_batch(market, symbols, priority_symbols=None, lookback_days: int = 50) -> dict:
+    """
+    Fetch histories and build RiskSignalSets for many symbols at once:
+    vectorized VaR/CVaR plus parallel, cached GARCH/HMM fits.
+    Results are stored in the shared per-day signal cache.
+
+    Returns:
+        dict — symbol → RiskSignalSet (symbols without history are omitted)
+    """
+    histories = market.get_price_history_multi(symbols, priority_symbols=priority_symbols)
+    tail_risk = calculate_var_cvar_batch(build_close_matrix(histories, lookback_days))
+    fits = get_model_fit_service().fit_universe(histories)
+
+    signals = {}
+    for symbol in histories:
+        fit = fits.get(symbol, {})
+        signals[symbol] = RiskSignalSet(
+            regime=fit.get("regime", "Neutral"),
+            volatility=fit.get("volatility"),
+            var=float(tail_risk.at[symbol, "var"]),
+            cvar=float(tail_risk.at[symbol, "cvar"])
+        )
+        cache_signal(symbol, signals[symbol])
+    return signals
+
+
 class RiskController:
     def __init__(self, ctx):
         self.ctx = ctx  # ClientContext with portfolio, config, metrics, etc.
@@ -41,6 +72,39 @@ class RiskController:
         """
         pass  # Implementation withheld
 
+    def evaluate_daily_risk_batch(self, symbols, lookback_days: int = 50, use_cache: bool = True):
+        """
+        Step 1b. Batched Risk Signal Computation
+
+        Same signals as `evaluate_daily_risk`, for many symbols at once:
+        - Fetch 100-day price history for every symbol
+        - Stack closes into one wide matrix
+        - Compute VaR and CVaR for all symbols in one vectorized pass
+        - Fit regime + GARCH in parallel via ModelFitService (cached, warm-started)
+        - Reuse signals already cached today (e.g. by the pre-market warm-up),
+          unless use_cache=False: then every symbol is recomputed on its latest
+          bars and the cache is refreshed (end-of-day snapshot)
+        - Save the mapping in ctx.metrics["risk_signals"]
+
+        Returns:
+            dict — symbol → RiskSignalSet (symbols without history are omitted)
+        """
+        signals = {}
+        missing = []
+        for symbol in symbols:
+            cached = get_cached_signal(symbol) if use_cache else None
+            if cached is not None:
+                signals[symbol] = cached
+            else:
+                missing.append(symbol)
+
+        if missing:
+            held = [s for s, a in self.ctx.portfolio_state.get("assets", {}).items() if a.get("position", 0) > 0]
+            signals.update(compute_risk_signals_batch(self.ctx.market, missing, held, lookback_days))
+
+        self.ctx.metrics["risk_signals"] = signals
+        return signals
+
     def evaluate_portfolio_risk(self):
         """
         Step 2. Portfolio-Level Risk Placeholder
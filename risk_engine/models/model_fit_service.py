@@ -0,0 +1,273 @@
+# risk_engine/models/model_fit_service.py
+
+"""
+ModelFitService — Parallel GARCH / HMM Fitting
+==============================================
+
+Fits the per-symbol GARCH(1,1) volatility model and the 3-state Gaussian HMM
+regime model for a whole symbol universe, spreading the work over a process
+pool sized to the machine's cores.
+
+Fitted parameters are cached per (symbol, last bar date) under:
+
+    market_data/model_cache/<SYMBOL>/<YYYY-MM-DD>.json
+
+so a history that gains a bar during the day (e.g. today's close at the
+end-of-day run) is refitted instead of served the pre-market fit. Each new
+GARCH fit is warm-started from the most recent earlier cached parameters, so
+daily refits converge in fewer optimizer steps.
+
+One HMM fit per symbol serves both the decay-weighted regime label and the
+latest regime probabilities; the fit and the labeling rule are RegimeModel's
+(utils/risk_utils.py), so batch and per-symbol regimes always agree. The HMM
+is always fitted cold: EM seeded from yesterday's parameters settles in a
+different local optimum often enough to flip the regime label.
+
+The process pool is created on first use and reused for the service's lifetime.
+"""
+
+import os
+import json
+import glob
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+from arch import arch_model
+
+from utils.risk_utils import RegimeModel
+from utils.time_utils import get_timestamps
+
+MODEL_CACHE_DIR = os.path.join("market_data", "model_cache")
+
+HMM_STATES = 3
+REGIME_WINDOW = 50
+FIT_MEMORY_SIZE = int(os.getenv("MODEL_FIT_MEMORY_SIZE", 4096))  # in-memory (symbol, date) fits
+
+
+# === Worker functions (top-level so they pickle into the process pool) ===
+
+def _fit_garch(close: np.ndarray, lookback_days: int, warm: Optional[dict]) -> dict:
+    """
+    Fit GARCH(1,1) on the trailing `lookback_days` closes (same window as
+    `predict_garch`) and return the 1-step volatility forecast with parameters.
+    """
+    window = close[-lookback_days:]
+    if len(window) < lookback_days:
+        return {"volatility": np.nan, "params": None}
+
+    log_returns = 100 * np.diff(np.log(window))
+    model = arch_model(log_returns, vol="Garch", p=1, q=1)
+
+    res = None
+    if warm and warm.get("params"):
+        try:
+            res = model.fit(disp="off", starting_values=np.asarray(warm["params"]))
+        except Exception:
+            res = None
+    if res is None:
+        try:
+            res = model.fit(disp="off")
+        except Exception as e:
+            print(f"⚠️ GARCH model fitting failed: {e}")
+            return {"volatility": np.nan, "params": None}
+
+    forecast = res.forecast(horizon=1)
+    volatility = float(np.sqrt(forecast.variance.values[-1, -1]) / 100)
+    return {"volatility": volatility, "params": [float(p) for p in res.params.values]}
+
+
+def _fit_hmm(close: np.ndarray, lambda_decay: float = 0.1) -> dict:
+    """
+    Fit the 3-state HMM once (RegimeModel) and derive:
+    - regime: decay-weighted label over the last REGIME_WINDOW closes (latest bar excluded)
+    - proba: posterior regime probabilities on the latest bar
+    """
+    regime_model = RegimeModel(pd.Series(close), n_states=HMM_STATES)
+    return {
+        "regime": regime_model.label_today(window=REGIME_WINDOW, lambda_decay=lambda_decay),
+        "proba": regime_model.proba()
+    }
+
+
+def fit_symbol_models(symbol: str, close: np.ndarray, lookback_days: int, warm: Optional[dict]) -> dict:
+    """
+    Fit GARCH and HMM for one symbol. Runs inside a pool worker.
+    """
+    warm = warm or {}
+    return {
+        "symbol": symbol,
+        "garch": _fit_garch(close, lookback_days, warm.get("garch")),
+        "hmm": _fit_hmm(close)
+    }
+
+
+def last_bar_date(prices: pd.DataFrame) -> Optional[str]:
+    """
+    "YYYY-MM-DD" of the latest bar in a history frame, or None without dates.
+    """
+    if prices is None or prices.empty or "date" not in prices.columns:
+        return None
+    return pd.Timestamp(prices["date"].max()).strftime("%Y-%m-%d")
+
+
+# === Service ===
+
+class ModelFitService:
+    """
+    Fits GARCH/HMM models for many symbols in parallel with a per-(symbol,
+    last bar date) parameter cache (last FIT_MEMORY_SIZE fits kept in memory)
+    and GARCH warm starts from the previous cached day.
+
+    Worker processes are started once (on the first parallel fit) and reused;
+    call `shutdown()` to release them.
+    """
+
+    def __init__(self, cache_dir: str = MODEL_CACHE_DIR, max_workers: Optional[int] = None,
+                 lookback_days: int = 50):
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.lookback_days = lookback_days
+        self._memory: "OrderedDict[tuple, dict]" = OrderedDict()
+        self._memory_lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._pool
+
+    def shutdown(self):
+        """Stop the worker processes (a later fit starts a new pool)."""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+    def _cache_path(self, symbol: str, date_str: str) -> str:
+        return os.path.join(self.cache_dir, symbol, f"{date_str}.json")
+
+    def get_cached(self, symbol: str, date_str: str) -> Optional[dict]:
+        """
+        Return the cached fit for (symbol, date), or None.
+        """
+        key = (symbol, date_str)
+        with self._memory_lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+
+        path = self._cache_path(symbol, date_str)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r") as f:
+                fit = json.load(f)
+        except Exception as e:
+            print(f"⚠️ Failed to read model cache {path}: {e}")
+            return None
+        self._remember(key, fit)
+        return fit
+
+    def _remember(self, key: tuple, fit: dict):
+        with self._memory_lock:
+            self._memory[key] = fit
+            self._memory.move_to_end(key)
+            while len(self._memory) > FIT_MEMORY_SIZE:
+                self._memory.popitem(last=False)
+
+    def _warm_params(self, symbol: str, date_str: str) -> Optional[dict]:
+        """
+        GARCH parameters from the most recent cached date strictly before `date_str`.
+        """
+        files = sorted(glob.glob(os.path.join(self.cache_dir, symbol, "*.json")))
+        previous = [f for f in files if os.path.basename(f)[:-5] < date_str]
+        if not previous:
+            return None
+        fit = self.get_cached(symbol, os.path.basename(previous[-1])[:-5])
+        if not fit:
+            return None
+        return {"garch": {"params": fit["garch"].get("params")} if fit["garch"].get("params") else None}
+
+    def _store(self, symbol: str, date_str: str, fit: dict):
+        self._remember((symbol, date_str), fit)
+        path = self._cache_path(symbol, date_str)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(fit, f)
+
+    def fit_universe(self, price_histories: Dict[str, pd.DataFrame], date_str: str = None) -> Dict[str, dict]:
+        """
+        Fit (or load from cache) GARCH and HMM for every symbol.
+
+        Args:
+            price_histories (dict): symbol → DataFrame with "date" and "close"
+            date_str (str): Fit date for every symbol (defaults to each
+                history's last bar date, or today if it has no "date" column)
+
+        Returns:
+            dict: symbol → {"volatility", "regime", "regime_proba"}
+        """
+        today = get_timestamps()["date_str"]
+        fits: Dict[str, dict] = {}
+        fit_dates: Dict[str, str] = {}
+        jobs = []
+
+        for symbol, prices in price_histories.items():
+            if prices is None or "close" not in prices.columns:
+                continue
+            if "date" in prices.columns:
+                prices = prices.sort_values("date")
+            fit_date = fit_dates[symbol] = date_str or last_bar_date(prices) or today
+            cached = self.get_cached(symbol, fit_date)
+            if cached:
+                fits[symbol] = cached
+                continue
+            close = prices["close"].to_numpy(dtype=float)
+            jobs.append((symbol, close, self.lookback_days, self._warm_params(symbol, fit_date)))
+
+        if len(jobs) == 1 or self.max_workers == 1:
+            results = [fit_symbol_models(*job) for job in jobs]
+        elif jobs:
+            try:
+                results = list(self._executor().map(fit_symbol_models, *zip(*jobs)))
+            except BrokenProcessPool as e:
+                # A worker died; drop the pool (the next call starts a fresh one) and fit here
+                print(f"[⚠️] Model fit pool broke, fitting in-process — {type(e).__name__}: {e}")
+                self.shutdown()
+                results = [fit_symbol_models(*job) for job in jobs]
+        else:
+            results = []
+
+        for fit in results:
+            symbol = fit.pop("symbol")
+            self._store(symbol, fit_dates[symbol], fit)
+            fits[symbol] = fit
+
+        return {
+            symbol: {
+                "volatility": fit["garch"]["volatility"],
+                "regime": fit["hmm"]["regime"],
+                "regime_proba": fit["hmm"]["proba"]
+            }
+            for symbol, fit in fits.items()
+        }
+
+
+_service: Optional[ModelFitService] = None
+
+
+def get_model_fit_service() -> ModelFitService:
+    """
+    Return the process-wide ModelFitService instance.
+    """
+    global _service
+    if _service is None:
+        _service = ModelFitService()
+    return _service
@@ -1,5 +1,6 @@
 # risk_engine/signals/risk_signals.py
 
+import threading
 from utils.time_utils import get_timestamps
 
 class RiskSignalSet:
@@ -144,3 +145,32 @@ class RiskSignalSet:
             f"V:{self.volatility:.3f} VaR:{self.var:.3f} CVaR:{self.cvar:.3f} Score:{self.score:.2f}>"
         )
 
+
+# === Shared per-day signal cache ===
+# Filled by the pre-market warm-up and by batch evaluations, so the first
+# approval or strategy run of the day does not pay for fetches and model fits.
+# Callers that need signals on newer bars (the end-of-day snapshot) bypass it
+# and refresh it (RiskController.evaluate_daily_risk_batch(use_cache=False)).
+
+_signal_cache = {}  # date_str → {symbol → RiskSignalSet}
+_signal_cache_lock = threading.Lock()
+
+
+def cache_signal(symbol: str, signal: RiskSignalSet, date_str: str = None):
+    """Store a computed signal for (symbol, date)."""
+    date_str = date_str or get_timestamps()["date_str"]
+    with _signal_cache_lock:
+        day = _signal_cache.get(date_str)
+        if day is None:
+            # First signal of a new day: drop previous days so the cache never
+            # outgrows one trading day
+            _signal_cache.clear()
+            day = _signal_cache[date_str] = {}
+        day[symbol] = signal
+
+
+def get_cached_signal(symbol: str, date_str: str = None):
+    """Return today's cached RiskSignalSet for a symbol, or None."""
+    date_str = date_str or get_timestamps()["date_str"]
+    with _signal_cache_lock:
+        return _signal_cache.get(date_str, {}).get(symbol)
@@ -0,0 +1,95 @@
+# scheduler/audit_archival.py
+
+"""
+XQRiskCore - Audit Log Archival
+===============================
+
+Nightly job that compresses closed-day audit logs with `audit.log_archive`.
+
+💡 When triggered (02:00–04:00 NY time, once per day), it:
+- Flushes the buffered audit writer
+- Archives every daily JSONL older than AUDIT_ARCHIVE_KEEP_DAYS days, across
+  all clients' audit categories and audit/user_action_logs
+- Records bytes before/after as a SYSTEM audit event
+
+Archived days stay readable (and randomly accessible) through
+`audit.log_archive`; the decision index keeps working on raw offsets.
+"""
+
+import os
+import argparse
+from datetime import timedelta
+
+from audit.action_logger import record_system_event
+from audit.audit_writer import flush_audit_writer
+from audit.log_archive import archive_closed_days
+from utils.time_utils import get_timestamps
+
+ARCHIVE_WINDOW = ((2, 0), (4, 0))  # NY time, inclusive start / exclusive end
+AUDIT_ARCHIVE_KEEP_DAYS = int(os.getenv("AUDIT_ARCHIVE_KEEP_DAYS", 2))
+last_archive_date = None
+
+
+def run_audit_archival(keep_days: int = AUDIT_ARCHIVE_KEEP_DAYS, dry_run: bool = False) -> dict:
+    """
+    Archive all closed-day logs older than `keep_days` days.
+
+    Returns:
+        dict: archival report (also written as a SYSTEM audit event)
+    """
+    ts = get_timestamps()
+    cutoff = (ts["now_ny"].date() - timedelta(days=keep_days - 1)).isoformat()
+    print(f"\n[{ts['ny_time_str']}] 🗜️ Archiving audit logs dated before {cutoff}...\n")
+
+    flush_audit_writer()
+    report = archive_closed_days(cutoff, dry_run=dry_run)
+    report["cutoff"] = cutoff
+    report["dry_run"] = dry_run
+    if report["raw_bytes"] and report["archived_bytes"]:
+        report["ratio"] = round(report["raw_bytes"] / report["archived_bytes"], 2)
+
+    if not dry_run:
+        record_system_event("audit_archival", "archive_complete", payload=report,
+                            status="error" if report["failed"] else "ok")
+    print(
+        f"✅ Archived {report['files']} files — {report['raw_bytes']:,} → {report['archived_bytes']:,} bytes"
+        f"{' (dry run)' if dry_run else ''}\n"
+    )
+    return report
+
+
+def maybe_run_audit_archival():
+    """
+    Scheduler trigger: run once per day inside ARCHIVE_WINDOW (NY time).
+    """
+    global last_archive_date
+    now = get_timestamps()["now_ny"]
+    if last_archive_date == now.date():
+        return None
+
+    (start_h, start_m), (end_h, end_m) = ARCHIVE_WINDOW
+    if not ((start_h, start_m) <= (now.hour, now.minute) < (end_h, end_m)):
+        return None
+
+    last_archive_date = now.date()
+    try:
+        return run_audit_archival()
+    except Exception as e:
+        print(f"[❌] Audit archival failed — {type(e).__name__}: {e}")
+        record_system_event("audit_archival", "archive_failed", payload={"error": str(e)}, status="error")
+        return None
+
+
+def main():
+    """
+    External entry point (e.g., via run_all.py or cron): archive now.
+    """
+    parser = argparse.ArgumentParser(description="Compress closed-day audit logs")
+    parser.add_argument("--keep-days", type=int, default=AUDIT_ARCHIVE_KEEP_DAYS)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    run_audit_archival(keep_days=args.keep_days, dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+# scheduler/premarket_warmup.py
+
+"""
+XQRiskCore - Pre-Market Cache Warm-Up
+=====================================
+
+Runs once per trading day before the open, so the first trader to open
+`trade_form` or the first strategy run does not pay for every Alpha Vantage
+fetch and HMM/GARCH fit inline.
+
+💡 When triggered (08:30–09:25 NY time on weekdays), it:
+- Collects every client's `symbol_universe` and currently held assets
+- Prefetches 100-day histories (held symbols first) into the PriceStore and HistoryCache
+- Precomputes RiskSignalSets (VaR/CVaR batch + cached GARCH/HMM fits)
+- Warms the RegimeModel LRU used by intraday approvals
+- Reports elapsed time and how many first requests were served ahead of time
+
+Run it in the same process as the other schedulers so the in-process caches
+are shared; the PriceStore and model parameter cache are on disk regardless.
+"""
+
+import os
+import time
+
+from audit.action_logger import record_system_event
+from core.market_data import MarketDataFetcher
+from risk_engine.approval.risk_controller import compute_risk_signals_batch
+from risk_engine.models.model_fit_service import get_model_fit_service, last_bar_date
+from risk_engine.signals.risk_signals import get_cached_signal
+from utils.config_loader import load_client_registry, load_client_asset_config
+from utils.risk_utils import get_regime_today, get_regime_proba
+from utils.state_journal import read_portfolio_state
+from utils.time_utils import get_timestamps
+
+WARMUP_WINDOW = ((8, 30), (9, 25))  # NY time, inclusive start / exclusive end
+last_warmup_date = None
+
+
+def load_held_symbols(client_id: str) -> list:
+    """
+    Return symbols with a non-zero position in the client's portfolio_state.json.
+    """
+    path = os.path.join("clients", client_id, "snapshots", "current", "portfolio_state.json")
+    if not os.path.exists(path):
+        return []
+    try:
+        assets = read_portfolio_state(path).get("assets", {})
+    except Exception as e:
+        print(f"[⚠️] Failed to read portfolio state for {client_id} — {type(e).__name__}: {e}")
+        return []
+    return [symbol for symbol, info in assets.items() if info.get("position", 0) > 0]
+
+
+def collect_warmup_universe() -> tuple:
+    """
+    Union of all clients' symbol universes and held assets.
+
+    Returns:
+        (symbols, held): both de-duplicated, held symbols listed first in `symbols`
+    """
+    registry = load_client_registry()
+    universe, held = [], []
+
+    for client_id in registry:
+        held.extend(load_held_symbols(client_id))
+        universe.extend(load_client_asset_config(client_id).get("symbol_universe", []) or [])
+
+    held = list(dict.fromkeys(held))
+    symbols = list(dict.fromkeys(held + universe))
+    return symbols, held
+
+
+def run_premarket_warmup() -> dict:
+    """
+    Prefetch histories and precompute risk signals for the whole universe.
+
+    Returns:
+        dict: warm-up report (also written as a SYSTEM audit event)
+    """
+    ts = get_timestamps()
+    date_str = ts["date_str"]
+    print(f"\n[{ts['ny_time_str']}] 🔥 Starting pre-market warm-up...\n")
+    t0 = time.perf_counter()
+
+    symbols, held = collect_warmup_universe()
+    market = MarketDataFetcher()
+    fit_service = get_model_fit_service()
+
+    # What the first caller would have paid for, had we not warmed up
+    cold_history = [s for s in symbols if market.store.get_last_fetch_date(s) != date_str]
+    cold_signals = [s for s in symbols if get_cached_signal(s, date_str) is None]
+
+    t_hist = time.perf_counter()
+    histories = market.get_price_history_multi(symbols, priority_symbols=held)
+    t_hist = time.perf_counter() - t_hist
+
+    # Fits are cached per last bar date, known once the histories are loaded
+    fit_dates = {s: last_bar_date(prices) or date_str for s, prices in histories.items()}
+    cold_fits = [s for s, d in fit_dates.items() if fit_service.get_cached(s, d) is None]
+
+    t_sig = time.perf_counter()
+    signals = compute_risk_signals_batch(market, cold_signals, priority_symbols=held) if cold_signals else {}
+    for symbol, prices in histories.items():
+        get_regime_today(prices.copy(), ts["now_ny"], symbol=symbol)
+        get_regime_proba(prices.copy(), ts["now_ny"], symbol=symbol)
+    t_sig = time.perf_counter() - t_sig
+
+    fetched = sum(1 for s in cold_history if market.store.get_last_fetch_date(s) == date_str)
+    fitted = sum(1 for s in cold_fits if fit_service.get_cached(s, fit_dates[s]) is not None)
+
+    report = {
+        "date": date_str,
+        "symbols": len(symbols),
+        "held_symbols": len(held),
+        "histories_loaded": len(histories),
+        "histories_fetched": fetched,
+        "signals_precomputed": len(signals),
+        "model_fits_precomputed": fitted,
+        "first_requests_saved": fetched + fitted,
+        "missing_history": sorted(set(symbols) - set(histories)),
+        "history_sec": round(t_hist, 2),
+        "signals_sec": round(t_sig, 2),
+        "elapsed_sec": round(time.perf_counter() - t0, 2),
+        "scheduler": market.history_scheduler.stats(),
+        "history_cache": market.history_cache.stats()
+    }
+
+    record_system_event("premarket_warmup", "warmup_complete", payload=report)
+    print(
+        f"✅ Warm-up done in {report['elapsed_sec']}s — {report['histories_loaded']}/{report['symbols']} histories, "
+        f"{report['signals_precomputed']} signals, {report['first_requests_saved']} first requests saved\n"
+    )
+    return report
+
+
+def maybe_run_premarket_warmup():
+    """
+    Scheduler trigger: run once per weekday inside WARMUP_WINDOW (NY time).
+    """
+    global last_warmup_date
+    now = get_timestamps()["now_ny"]
+    if now.weekday() >= 5 or last_warmup_date == now.date():
+        return None
+
+    (start_h, start_m), (end_h, end_m) = WARMUP_WINDOW
+    if not ((start_h, start_m) <= (now.hour, now.minute) < (end_h, end_m)):
+        return None
+
+    last_warmup_date = now.date()
+    try:
+        return run_premarket_warmup()
+    except Exception as e:
+        print(f"[❌] Pre-market warm-up failed — {type(e).__name__}: {e}")
+        record_system_event("premarket_warmup", "warmup_failed", payload={"error": str(e)}, status="error")
+        return None
+
+
+def main():
+    """
+    External entry point (e.g., via run_all.py or cron): run the warm-up now.
+    """
+    run_premarket_warmup()
+
+
+if __name__ == "__main__":
+    main()
@@ -16,8 +16,8 @@ class PortfolioLiveUpdater:
         self.market = market            # Real-time price fetcher (e.g. MarketDataFetcher)
 
     def update(self):
-        # === 1. Fetch real-time price for each held asset ===
-        #   - Call external market API to get current price and timestamp
+        # === 1. Fetch real-time prices for all held assets ===
+        #   - One batch call: market.get_prices(held_symbols) → single provider round-trip
         #   - Skip assets with zero position
 
         # === 2. Retrieve historical price references ===
@@ -42,6 +42,8 @@ class PortfolioLiveUpdater:
 
         # === 8. Update account-level net value ===
         #   - Total = cash + all positions marked to market
+        #   - Prices go through Portfolio.mark_to_market(), which keeps the running
+        #     market value / exposure totals current (O(1) per changed price)
 
         # === 9. Update peak account value (account_peak_value) ===
         #   - Track all-time-high value for drawdown benchmarking
@@ -6,14 +6,20 @@ from risk_engine.signals.risk_signals import RiskSignalSet
 
 def run_end_of_day_snapshot(client: ClientContext) -> None:
     per_asset_signals: Dict[str, RiskSignalSet] = {}
+    symbols = list(client.portfolio_state.get("assets", {}).keys())
 
-    for symbol in client.portfolio_state.get("assets", {}).keys():
-        try:
-            signal = client.risk.evaluate_daily_risk(symbol)
-            if signal:
-                per_asset_signals[symbol] = signal
-        except Exception as e:
-            print(f"[⚠️] Risk evaluation failed for {symbol} — {type(e).__name__}: {e}")
+    try:
+        # Bypass the intraday signal cache: it holds pre-open signals without today's close
+        per_asset_signals = client.risk.evaluate_daily_risk_batch(symbols, use_cache=False)
+    except Exception as e:
+        print(f"[⚠️] Batch risk evaluation failed — {type(e).__name__}: {e}, falling back to per-symbol")
+        for symbol in symbols:
+            try:
+                signal = client.risk.evaluate_daily_risk(symbol)
+                if signal:
+                    per_asset_signals[symbol] = signal
+            except Exception as e:
+                print(f"[⚠️] Risk evaluation failed for {symbol} — {type(e).__name__}: {e}")
 
     client.save(
         risk_signals=per_asset_signals,
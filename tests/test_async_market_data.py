@@ -0,0 +1,58 @@
+# tests/test_async_market_data.py
+
+import asyncio
+
+from aiohttp import web
+
+from core.async_market_data import AsyncMarketDataFetcher
+from core.history_cache import get_history_cache
+from core.price_store import PriceStore
+from core.request_scheduler import ProviderRequestScheduler, TokenBucket
+
+
+def _stub_app():
+    async def daily(request):
+        return web.json_response({"Time Series (Daily)": {
+            f"2025-05-{d:02d}": {"1. open": "100", "2. high": "101", "3. low": "99",
+                                 "4. close": str(100 + d), "5. volume": "1000"}
+            for d in range(1, 21)
+        }})
+
+    async def snapshots(request):
+        symbols = request.query.get("symbols", "").split(",")
+        return web.json_response({s: {"latestTrade": {"t": "2025-06-02T15:30:00Z", "p": 100.0}} for s in symbols})
+
+    app = web.Application()
+    app.router.add_get("/query", daily)
+    app.router.add_get("/v2/stocks/snapshots", snapshots)
+    return app
+
+
+async def _scan(tmp_path, schedulers):
+    runner = web.AppRunner(_stub_app())
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    base = f"http://127.0.0.1:{port}"
+    try:
+        async with AsyncMarketDataFetcher(alpaca_data_url=base, alpha_vantage_url=f"{base}/query",
+                                          store=PriceStore(root=str(tmp_path)), schedulers=schedulers) as market:
+            histories = await market.get_price_history_multi(["AAPL", "MSFT", "AAPL"])
+            await market.get_prices(["AAPL", "MSFT"])
+            return market, histories
+    finally:
+        await runner.cleanup()
+
+
+def test_every_request_takes_a_scheduler_token(tmp_path):
+    get_history_cache().clear()
+    schedulers = {name: ProviderRequestScheduler(name, TokenBucket(6000, 100)) for name in ("alpaca", "alphavantage")}
+
+    market, histories = asyncio.run(_scan(tmp_path, schedulers))
+
+    assert sorted(histories) == ["AAPL", "MSFT"]
+    assert histories["AAPL"]["close"].iloc[-1] == 120.0
+    assert schedulers["alphavantage"].stats()["requests"] == 2
+    assert schedulers["alpaca"].stats()["requests"] == 1
+    assert market.http_requests == 3
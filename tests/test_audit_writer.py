@@ -0,0 +1,72 @@
+# tests/test_audit_writer.py
+
+import json
+import os
+
+from audit.audit_trail import find_by_intent_id
+from audit.audit_writer import BufferedAuditWriter, append_line_sync
+from audit.decision_index import get_decision_index
+
+
+def _decision(intent_id: str) -> dict:
+    return {
+        "intent": {"intent_id": intent_id, "symbol": "AAPL", "timestamp": "2025-06-02T10:00:00"},
+        "approval": {"approved": True, "reason_code": "OK"},
+        "execution": {"status": "success"},
+    }
+
+
+def test_mixed_sync_and_buffered_appends_index_correct_offsets(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    client_id = "WriterTest"
+    path = os.path.join("clients", client_id, "audit", "decisions", "2025-06-02.jsonl")
+    index = get_decision_index(client_id)
+
+    def on_written(record):
+        return lambda p, offset, length: index.add(record, p, offset, length)
+
+    writer = BufferedAuditWriter(fsync_interval_sec=0.05)
+    try:
+        for i in range(20):
+            record = _decision(f"intent-{i}")
+            line = (json.dumps(record) + "\n").encode("utf-8")
+            if i % 3 == 0:
+                # Appends behind the buffered writer's long-lived handle
+                append_line_sync(path, line, on_written(record))
+            else:
+                writer.write(path, line, on_written(record))
+            if i % 4 == 0:
+                assert writer.flush()
+        assert writer.flush()
+    finally:
+        writer.close()
+
+    for i in range(20):
+        matches = find_by_intent_id(client_id, f"intent-{i}")
+        assert [m["intent"]["intent_id"] for m in matches] == [f"intent-{i}"]
+
+
+def test_handles_are_closed_when_the_date_rolls_over(tmp_path, monkeypatch):
+    day = {"value": "2025-06-02"}
+    monkeypatch.setattr("audit.audit_writer._today", lambda: day["value"])
+
+    def events_path(date):
+        return os.path.join(str(tmp_path), "admin", "alice", date, "events.jsonl")
+
+    writer = BufferedAuditWriter(fsync_interval_sec=0.05)
+    try:
+        for user in ("alice", "bob"):
+            writer.write(events_path("2025-06-02").replace("alice", user), b"{}\n")
+        assert writer.flush()
+        assert len(writer._handles) == 2
+
+        # Action logs move to a new directory each day; yesterday's handles go
+        day["value"] = "2025-06-03"
+        writer.write(events_path("2025-06-03"), b"{}\n")
+        assert writer.flush()
+        assert list(writer._handles) == [events_path("2025-06-03")]
+    finally:
+        writer.close()
+
+    with open(events_path("2025-06-02"), "rb") as f:
+        assert f.read() == b"{}\n"
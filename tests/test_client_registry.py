@@ -0,0 +1,90 @@
+# tests/test_client_registry.py
+
+import os
+
+import pytest
+import yaml
+
+from utils.client_registry import ClientRegistryService
+from utils.config_loader import DEFAULT_CLIENT_CONFIG, load_client_registry
+
+
+def _write_yaml(path, data):
+    # Plain (non-atomic) external edit, as a text editor would make it
+    with open(path, "w") as f:
+        yaml.dump(data, f)
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+
+def test_external_edit_swaps_the_snapshot(tmp_path):
+    path = str(tmp_path / "client_registry.yaml")
+    _write_yaml(path, {"C1": {"name": "One"}})
+    service = ClientRegistryService(path, DEFAULT_CLIENT_CONFIG)
+
+    before = service.registry()
+    assert before["C1"]["name"] == "One" and before["C1"]["dry_run"] is True
+    with pytest.raises(TypeError):
+        before["C1"]["name"] = "mutated"
+
+    _write_yaml(path, {"C1": {"name": "One"}, "C2": {"name": "Two"}})
+    service.refresh()
+
+    after = service.registry()
+    assert sorted(after) == ["C1", "C2"]
+    # Readers holding the old snapshot keep a consistent view
+    assert list(before) == ["C1"]
+
+
+def test_save_then_reload_round_trips(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = str(tmp_path / "client_registry.yaml")
+    service = ClientRegistryService(path, DEFAULT_CLIENT_CONFIG)
+
+    service.save_registry({"C1": {"name": "One", "base_capital": 5000}})
+    assert service.registry()["C1"]["base_capital"] == 5000
+    assert not os.path.exists(f"{path}.tmp")
+
+    # A fresh service (another process) parses the saved file
+    reloaded = ClientRegistryService(path, DEFAULT_CLIENT_CONFIG)
+    assert reloaded.registry() == service.registry()
+
+    service.save_asset_config("C1", {"symbol_universe": ["AAPL", "MSFT"]})
+    assert service.asset_config("C1")["symbol_universe"] == ("AAPL", "MSFT")
+
+
+def test_missing_files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = str(tmp_path / "clients" / "client_registry.yaml")
+    service = ClientRegistryService(path, DEFAULT_CLIENT_CONFIG)
+
+    assert dict(service.registry()) == {}
+    assert service.entry("C1") is None
+    assert service.asset_config("C1") is None
+
+    # Files created later are picked up; deleting them empties the snapshot again
+    os.makedirs(os.path.dirname(path))
+    _write_yaml(path, {"C1": {"name": "One"}})
+    config_path = service.asset_config_path("C1")
+    os.makedirs(os.path.dirname(config_path))
+    _write_yaml(config_path, {"symbol_universe": ["AAPL"]})
+    service.refresh()
+    assert service.entry("C1")["name"] == "One"
+    assert service.asset_config("C1")["symbol_universe"] == ("AAPL",)
+
+    os.remove(path)
+    service.refresh()
+    assert dict(service.registry()) == {}
+
+
+def test_load_client_registry_frozen_shares_the_snapshot(tmp_path):
+    path = str(tmp_path / "client_registry.yaml")
+    _write_yaml(path, {"C1": {"name": "One"}})
+
+    frozen = load_client_registry(path, frozen=True)
+    assert load_client_registry(path, frozen=True) is frozen
+
+    copy = load_client_registry(path)
+    assert type(copy) is dict and copy == {"C1": dict(frozen["C1"])}
+    copy["C1"]["name"] = "mutated"
+    assert load_client_registry(path)["C1"]["name"] == "One"
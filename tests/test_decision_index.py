@@ -0,0 +1,55 @@
+# tests/test_decision_index.py
+
+import json
+import os
+
+from audit.decision_index import DecisionIndex
+
+
+def _append(path, record) -> tuple:
+    line = (json.dumps(record) + "\n").encode("utf-8")
+    with open(path, "ab") as f:
+        offset = f.tell()
+        f.write(line)
+    return offset, len(line)
+
+
+def _decision(intent_id, approved="missing"):
+    approval = {} if approved == "missing" else {"approved": approved}
+    return {"intent": {"intent_id": intent_id, "symbol": "AAPL"}, "approval": approval}
+
+
+def test_not_approved_includes_records_without_an_approval_flag(tmp_path):
+    path = os.path.join(tmp_path, "2024-06-03.jsonl")
+    for record in (_decision("yes", True), _decision("no", False), _decision("null", None), _decision("none")):
+        _append(path, record)
+
+    index = DecisionIndex("C1", decisions_dir=str(tmp_path))
+    index.refresh()
+
+    rejected = sorted(r["intent"]["intent_id"] for r in index.query(approved=False))
+    assert rejected == ["no", "none", "null"]
+    assert index.count(approved=False) == 3
+    assert [r["intent"]["intent_id"] for r in index.query(approved=True)] == ["yes"]
+    index.close()
+
+
+def test_refresh_indexes_a_record_whose_add_failed(tmp_path):
+    path = os.path.join(tmp_path, "2024-06-03.jsonl")
+    index = DecisionIndex("C1", decisions_dir=str(tmp_path))
+
+    for intent_id in ("a", "b", "c"):
+        record = _decision(intent_id, True)
+        offset, length = _append(path, record)
+        if intent_id != "b":  # indexing "b" failed after its line was written
+            index.add(record, path, offset, length)
+
+    assert [r["intent"]["intent_id"] for r in index.query()] == ["a", "c"]
+    index.refresh()
+    assert [r["intent"]["intent_id"] for r in index.query()] == ["a", "b", "c"]
+
+    # Once caught up, adds advance the watermark again
+    offset, length = _append(path, _decision("d", True))
+    index.add(_decision("d", True), path, offset, length)
+    assert index.refresh() == 0
+    index.close()
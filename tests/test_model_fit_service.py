@@ -0,0 +1,66 @@
+# tests/test_model_fit_service.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from risk_engine.models.model_fit_service import ModelFitService
+from utils.risk_utils import RegimeModel, get_regime_proba, get_regime_today, predict_garch
+
+
+def _histories(n_symbols=3, days=120):
+    rng = np.random.default_rng(7)
+    dates = pd.date_range("2024-01-01", periods=days, freq="B")
+    return {
+        f"S{i}": pd.DataFrame({"date": dates, "close": 100 * np.exp(np.cumsum(rng.normal(0, 0.02, days)))})
+        for i in range(n_symbols)
+    }
+
+
+def test_batch_fit_matches_regime_model_and_reuses_pool(tmp_path):
+    histories = _histories()
+    service = ModelFitService(cache_dir=str(tmp_path), max_workers=2)
+    try:
+        fits = service.fit_universe(histories, date_str="2024-06-03")
+        pool = service._pool
+        assert pool is not None
+
+        service.fit_universe(histories, date_str="2024-06-04")
+        assert service._pool is pool
+    finally:
+        service.shutdown()
+
+    RegimeModel.clear_cache()
+    for symbol, prices in histories.items():
+        assert fits[symbol]["regime"] == get_regime_today(prices.copy(), None, symbol=symbol)
+        assert fits[symbol]["regime_proba"] == get_regime_proba(prices.copy(), None, symbol=symbol)
+
+
+def test_batch_fits_match_per_symbol_path_across_days(tmp_path):
+    histories = _histories(n_symbols=3, days=140)
+    service = ModelFitService(cache_dir=str(tmp_path), max_workers=1)
+
+    # Consecutive days: each day's fit is a refit on one more bar (GARCH warm-started)
+    for end in range(120, 140, 4):
+        window = {s: df.iloc[:end] for s, df in histories.items()}
+        fits = service.fit_universe(window)
+        RegimeModel.clear_cache()
+        for symbol, prices in window.items():
+            assert fits[symbol]["regime"] == get_regime_today(prices.copy(), None, symbol=symbol)
+            assert fits[symbol]["regime_proba"] == get_regime_proba(prices.copy(), None, symbol=symbol)
+            assert fits[symbol]["volatility"] == pytest.approx(predict_garch(prices.copy(), None), rel=1e-3)
+
+    assert len(list(tmp_path.glob("S0/*.json"))) == 5
+
+
+def test_in_memory_fits_are_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr("risk_engine.models.model_fit_service.FIT_MEMORY_SIZE", 4)
+    service = ModelFitService(cache_dir=str(tmp_path), max_workers=1)
+    histories = _histories(n_symbols=1, days=80)
+    for end in range(60, 80):
+        service.fit_universe({"S0": histories["S0"].iloc[:end]})
+
+    assert len(service._memory) == 4
+    # Evicted fits are still served from disk
+    first = histories["S0"]["date"].iloc[59].strftime("%Y-%m-%d")
+    assert service.get_cached("S0", first) is not None
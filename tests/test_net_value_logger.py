@@ -0,0 +1,127 @@
+# tests/test_net_value_logger.py
+
+import json
+import multiprocessing
+
+from utils.net_value_logger import NetValueLogger
+
+
+def _record(date, value, positions=None):
+    return {"date": date, "net_value": value, "capital": 0.0, "positions": positions or {}, "reason": "update"}
+
+
+def _append_many(base_path, worker, count):
+    logger = NetValueLogger("c1", base_path=base_path, compact=True)
+    for i in range(count):
+        logger._write(_record("2024-01-02", float(worker * 1000 + i)))
+
+
+def _compact(base_path):
+    NetValueLogger("c1", base_path=base_path, compact=True).compact_days(before="2024-01-02")
+
+
+def test_appends_during_compaction_are_not_lost(tmp_path):
+    base_path = str(tmp_path)
+    logger = NetValueLogger("c1", base_path=base_path, compact=True)
+    for i in range(300):
+        logger._write(_record("2024-01-01", float(-1 - i)))
+
+    # Offline compaction of 2024-01-01 runs while writers keep appending
+    ctx = multiprocessing.get_context("fork")
+    workers = [ctx.Process(target=_append_many, args=(base_path, w, 100)) for w in range(4)]
+    workers.append(ctx.Process(target=_compact, args=(base_path,)))
+    for p in workers:
+        p.start()
+    for p in workers:
+        p.join()
+        assert p.exitcode == 0
+
+    stored = {r["net_value"] for r in logger.load_all() + logger.load_intraday()}
+    expected = {float(-1 - i) for i in range(300)} | {float(w * 1000 + i) for w in range(4) for i in range(100)}
+    assert expected <= stored
+
+    days = [r for r in logger.load_all() if r["date"] == "2024-01-01"]
+    assert len(days) == 1 and days[0]["eod"] and days[0]["intraday_records"] == 300
+
+
+def test_writes_are_append_only(tmp_path):
+    plain = NetValueLogger("plain", base_path=str(tmp_path / "plain"))
+    compact = NetValueLogger("compact", base_path=str(tmp_path / "compact"), compact=True)
+    positions = {"AAPL": {"position": 1, "price": 10.0, "value": 10.0}}
+
+    for logger in (plain, compact):
+        logger._write(_record("2024-01-01", 1.0, positions))
+        logger._write(_record("2024-01-01", 2.0, positions))
+        with open(logger.file_path, "rb") as f:
+            before = f.read()
+
+        # A new day appends; closed days are not rolled up on the write path
+        logger._write(_record("2024-01-02", 3.0, positions))
+        with open(logger.file_path, "rb") as f:
+            after = f.read()
+        assert after.startswith(before) and len(after) > len(before)
+        assert [r["net_value"] for r in logger.load_all()] == [1.0, 2.0, 3.0]
+
+    # Plain by default: no positions_ref encoding
+    with open(plain.file_path) as f:
+        assert all("positions" in json.loads(line) for line in f)
+    with open(compact.file_path) as f:
+        assert sum("positions_ref" in json.loads(line) for line in f) == 2
+
+
+def _positions(symbol, price):
+    return {symbol: {"position": 1, "price": price, "value": price}}
+
+
+def test_read_recent_across_tail_chunk_boundaries(tmp_path, monkeypatch):
+    monkeypatch.setattr("utils.net_value_logger.TAIL_CHUNK_BYTES", 64)
+    logger = NetValueLogger("c1", base_path=str(tmp_path))
+    for i in range(40):
+        logger._write(_record(f"2024-01-{i % 28 + 1:02d}", float(i), _positions("S" * (i % 7 + 1), float(i))))
+
+    everything = logger.load_all()
+    for n in (1, 2, 3, 17, 39, 40, 100):
+        assert logger.read_recent(n) == everything[-n:]
+    assert logger.read_recent(0) == []
+
+
+def test_read_range_resolves_positions_stored_before_the_range(tmp_path):
+    logger = NetValueLogger("c1", base_path=str(tmp_path), compact=True)
+    held = _positions("AAPL", 10.0)
+    logger._write(_record("2024-01-01", 1.0, held))
+    logger._write(_record("2024-01-02", 2.0, held))  # positions_ref → the 2024-01-01 line
+    logger._write(_record("2024-01-03", 3.0, _positions("MSFT", 5.0)))
+
+    records = logger.read_range("2024-01-02", "2024-01-02")
+    assert records == [_record("2024-01-02", 2.0, held)]
+    assert logger.read_daily(2) == logger.load_all()[-2:]
+
+
+def test_index_is_rebuilt_after_compaction(tmp_path):
+    logger = NetValueLogger("c1", base_path=str(tmp_path), compact=True)
+    for day in (1, 2, 3):
+        for i in range(5):
+            logger._write(_record(f"2024-01-0{day}", float(day * 10 + i)))
+    assert len(logger.read_range("2024-01-02")) == 10
+    with open(logger.index_path) as f:
+        stale_index = f.read()
+
+    logger.compact_days(before="2024-01-03")
+    # A stale index left behind (e.g. by a reader racing the compaction) is rebuilt
+    with open(logger.index_path, "w") as f:
+        f.write(stale_index)
+
+    assert [r["net_value"] for r in logger.read_range("2024-01-02")] == [24.0, 30.0, 31.0, 32.0, 33.0, 34.0]
+    assert [r["net_value"] for r in logger.read_range(end="2024-01-01")] == [14.0]
+    assert [d for d, _ in logger.refresh_index()["dates"]] == ["2024-01-01", "2024-01-02", "2024-01-03"]
+
+
+def test_unsorted_dates_fall_back_to_a_filtered_full_read(tmp_path):
+    logger = NetValueLogger("c1", base_path=str(tmp_path))
+    for date, value in (("2024-01-02", 1.0), ("2024-01-03", 2.0), ("2024-01-01", 3.0), ("2024-01-03", 4.0)):
+        logger._write(_record(date, value))
+
+    assert logger.refresh_index()["sorted"] is False
+    assert [r["net_value"] for r in logger.read_range("2024-01-02", "2024-01-03")] == [1.0, 2.0, 4.0]
+    assert [r["net_value"] for r in logger.read_range(end="2024-01-01")] == [3.0]
+    assert [r["net_value"] for r in logger.read_daily(2)] == [1.0, 4.0]
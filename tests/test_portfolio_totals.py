@@ -0,0 +1,81 @@
+# tests/test_portfolio_totals.py
+
+import copy
+from datetime import datetime
+
+import pytest
+
+from core.portfolio.portfolio import Portfolio
+
+
+def _full_net_value(portfolio: Portfolio) -> float:
+    assets = portfolio.state["assets"].values()
+    return round(portfolio.cash + sum(a["position"] * a["current_price"] for a in assets), 2)
+
+
+@pytest.mark.parametrize("book", ["dict", "columnar"])
+def test_running_totals_follow_direct_state_writes(book):
+    state = {"capital": 10000.0, "assets": {}}
+    portfolio = Portfolio(state, book=book, category_map={"AAPL": "Tech"})
+    portfolio.add_trade("AAPL", "buy", 10, 100.0, slippage_pct=0.0)
+    portfolio.add_trade("MSFT", "buy", 5, 50.0, slippage_pct=0.0)
+
+    # Price refresh written straight into portfolio_state (live updater path)
+    state["assets"]["AAPL"]["current_price"] = 120.0
+    assert portfolio.to_snapshot()["net_value"] == _full_net_value(portfolio) == 10200.0
+
+    state["assets"]["NVDA"] = {"position": 2, "current_price": 10.0}
+    del state["assets"]["MSFT"]
+    assert portfolio.estimate_net_value() == _full_net_value(portfolio)
+
+    # Wholesale replacement of the assets mapping
+    state["assets"] = {"AAPL": {"position": 1, "current_price": 1.0}}
+    assert portfolio.estimate_net_value() == _full_net_value(portfolio)
+    assert portfolio.exposure_summary()["category_value"] == {"Tech": 1.0}
+    assert portfolio.verify_totals()
+
+    # Copies of the state are plain dicts
+    copied = copy.deepcopy(state)
+    assert type(copied["assets"]) is dict and type(copied["assets"]["AAPL"]) is dict
+
+
+def _trade_both_books():
+    portfolios = {}
+    for book in ("dict", "columnar"):
+        portfolio = Portfolio({"capital": 10000.0, "assets": {}}, book=book, category_map={"AAPL": "Tech"})
+        portfolio.add_trade("AAPL", "buy", 10, 100.0, slippage_pct=0.0)
+        portfolio.add_trade("MSFT", "buy", 5, 50.0, slippage_pct=0.0)
+        portfolio.add_trade("MSFT", "sell", 5, 55.0, slippage_pct=0.0)
+        portfolios[book] = portfolio
+    return portfolios
+
+
+def _without_timestamp(snapshot: dict) -> dict:
+    return {key: value for key, value in snapshot.items() if key != "timestamp"}
+
+
+def test_columnar_book_matches_dict_book(monkeypatch):
+    monkeypatch.setattr("core.portfolio.asset_position.get_timestamps",
+                        lambda: {"now_ny": datetime(2025, 6, 2, 9, 30)})
+    portfolios = _trade_both_books()
+
+    for prices in ({"AAPL": 90.0, "MSFT": 60.0, "NVDA": 5.0}, {"AAPL": 90.0, "MSFT": None}, {"AAPL": 110.5}):
+        changed = {book: p.mark_to_market(prices, timestamp="2025-06-02T10:00:00") for book, p in portfolios.items()}
+        assert changed["dict"] == changed["columnar"]
+
+        dict_book, columnar = portfolios["dict"], portfolios["columnar"]
+        assert columnar.book.to_assets() == {s: dict(a) for s, a in dict_book.state["assets"].items()}
+        assert _without_timestamp(columnar.to_snapshot()) == _without_timestamp(dict_book.to_snapshot())
+
+
+@pytest.mark.parametrize("book", ["dict", "columnar"])
+def test_snapshots_are_independent_copies(book):
+    portfolio = _trade_both_books()[book]
+    first = portfolio.to_snapshot()
+    first["assets"]["AAPL"]["position"] = 999
+    first["assets"]["AAPL"]["entry_time"] = "mutated"
+
+    second = portfolio.to_snapshot()
+    assert second["assets"]["AAPL"]["position"] == 10
+    assert second["assets"]["AAPL"]["entry_time"] != "mutated"
+    assert second["assets"]["AAPL"] is not first["assets"]["AAPL"]
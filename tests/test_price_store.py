@@ -0,0 +1,69 @@
+# tests/test_price_store.py
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from core.price_store import BAR_DTYPE, PriceStore
+
+
+def _frame(days, closes):
+    return pd.DataFrame({
+        "date": pd.to_datetime(days).tz_localize("UTC"),
+        "open": closes, "high": closes, "low": closes, "close": closes,
+        "volume": [1000.0] * len(closes),
+    })
+
+
+def test_append_upserts_revised_and_partial_bars(tmp_path):
+    store = PriceStore(root=str(tmp_path))
+    assert store.append("AAPL", _frame(["2024-01-02", "2024-01-03", "2024-01-04"], [10.0, 11.0, 12.0])) == 3
+
+    # Partial bar for 01-04 gets its final close; 01-05 is new
+    written = store.append("AAPL", _frame(["2024-01-03", "2024-01-04", "2024-01-05"], [11.0, 12.5, 13.0]))
+    assert written == 2
+    assert store.closes("AAPL").tolist() == [10.0, 11.0, 12.5, 13.0]
+
+    # Re-sending identical bars writes nothing
+    assert store.append("AAPL", _frame(["2024-01-04", "2024-01-05"], [12.5, 13.0])) == 0
+
+    # Revision of an older bar; stored dates absent from the frame are kept
+    assert store.append("AAPL", _frame(["2024-01-02", "2024-01-05"], [9.5, 13.0])) == 1
+    bars = store.bars("AAPL")
+    assert bars["close"].tolist() == [9.5, 11.0, 12.5, 13.0]
+    assert np.all(np.diff(bars["date"]) > 0)
+
+
+def test_reads_stop_at_the_committed_length_after_a_crashed_append(tmp_path):
+    store = PriceStore(root=str(tmp_path))
+    store.append("AAPL", _frame(["2024-01-02", "2024-01-03", "2024-01-04"], [10.0, 11.0, 12.0]))
+    store.set_last_fetch_date("AAPL", "2024-01-04")
+
+    # Crash after writing one whole bar and half of the next, before the metadata
+    with open(store._bars_path("AAPL"), "ab") as f:
+        f.write(b"\x07" * int(BAR_DTYPE.itemsize * 1.5))
+
+    assert store.closes("AAPL").tolist() == [10.0, 11.0, 12.0]
+    assert store.to_frame("AAPL", 2)["close"].tolist() == [11.0, 12.0]
+
+    # The next append truncates the torn bytes before writing
+    assert store.append("AAPL", _frame(["2024-01-05"], [13.0])) == 1
+    assert store.closes("AAPL").tolist() == [10.0, 11.0, 12.0, 13.0]
+    assert os.path.getsize(store._bars_path("AAPL")) == 4 * BAR_DTYPE.itemsize
+    assert store.get_last_fetch_date("AAPL") == "2024-01-04"
+
+
+def test_files_without_a_committed_length_read_whole_records(tmp_path):
+    store = PriceStore(root=str(tmp_path))
+    store.append("AAPL", _frame(["2024-01-02", "2024-01-03"], [10.0, 11.0]))
+
+    # Metadata from before "rows" was tracked, plus a torn trailing record
+    with open(store._meta_path("AAPL"), "w") as f:
+        json.dump({"last_fetch_date": "2024-01-03"}, f)
+    with open(store._bars_path("AAPL"), "ab") as f:
+        f.write(b"\x07" * (BAR_DTYPE.itemsize // 2))
+
+    assert store.closes("AAPL").tolist() == [10.0, 11.0]
+    assert store.get_last_fetch_date("AAPL") == "2024-01-03"
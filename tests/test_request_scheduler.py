@@ -0,0 +1,51 @@
+# tests/test_request_scheduler.py
+
+import requests
+
+from core.request_scheduler import ProviderRequestScheduler, TokenBucket, is_transient
+
+
+def _http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(f"{status} error", response=response)
+
+
+def test_is_transient():
+    assert is_transient(_http_error(429))
+    assert is_transient(_http_error(503))
+    assert is_transient(requests.exceptions.ConnectTimeout("timed out"))
+    assert is_transient(TimeoutError())
+    assert is_transient(ValueError("Thank you for using Alpha Vantage! Our standard API call frequency is 5 calls per minute"))
+    assert is_transient(ValueError(
+        "Thank you for using Alpha Vantage! Our standard API call frequency is 5 calls per minute and 500 calls "
+        "per day. Please visit https://www.alphavantage.co/premium/ if you would like to target a higher API call frequency."
+    ))
+    # Daily quota: will not reset within the backoff window
+    assert not is_transient(ValueError(
+        "Thank you for using Alpha Vantage! Our standard API rate limit is 25 requests per day. Please subscribe "
+        "to any of the premium plans at https://www.alphavantage.co/premium/ to instantly remove all daily rate limits."
+    ))
+    assert not is_transient(_http_error(404))
+    assert not is_transient(ValueError("Error Message: Invalid API call"))
+    assert not is_transient(KeyError("close"))
+
+
+def test_run_retries_only_transient_errors():
+    scheduler = ProviderRequestScheduler("test", TokenBucket(60000, 100), backoff_base_sec=0.001)
+    calls = {"GOOD": 0, "FLAKY": 0, "BAD": 0}
+
+    def fetch(symbol):
+        calls[symbol] += 1
+        if symbol == "BAD":
+            raise ValueError("Error Message: Invalid API call")
+        if symbol == "FLAKY" and calls[symbol] < 3:
+            raise _http_error(503)
+        return symbol.lower()
+
+    results = scheduler.run(["GOOD", "FLAKY", "BAD"], fetch)
+
+    assert results == {"GOOD": "good", "FLAKY": "flaky"}
+    assert calls == {"GOOD": 1, "FLAKY": 3, "BAD": 1}
+    stats = scheduler.stats()
+    assert stats["retries"] == 2 and stats["failures"] == 1 and stats["queue_depth"] == 0
@@ -0,0 +1,65 @@
+# tests/test_risk_controller.py
+
+import numpy as np
+import pandas as pd
+
+import risk_engine.approval.risk_controller as risk_controller
+from risk_engine.approval.risk_controller import RiskController
+from risk_engine.models.model_fit_service import ModelFitService
+from risk_engine.signals import risk_signals
+from services.snapshot.daily_snapshot_writer import run_end_of_day_snapshot
+from utils.risk_utils import calculate_cvar, calculate_var
+
+
+class _Market:
+    def __init__(self, histories):
+        self.histories = histories
+
+    def get_price_history_multi(self, symbols, priority_symbols=None):
+        return {s: self.histories[s].copy() for s in symbols if s in self.histories}
+
+
+class _Client:
+    def __init__(self, market, symbols):
+        self.market = market
+        self.portfolio_state = {"assets": {s: {"position": 1} for s in symbols}}
+        self.metrics = {}
+        self.risk = RiskController(self)
+        self.saved = None
+
+    def save(self, risk_signals=None, reason=None):
+        self.saved = risk_signals
+
+
+def test_end_of_day_snapshot_sees_bar_added_after_warmup(tmp_path, monkeypatch):
+    service = ModelFitService(cache_dir=str(tmp_path), max_workers=1)
+    monkeypatch.setattr(risk_controller, "get_model_fit_service", lambda: service)
+    monkeypatch.setattr(risk_signals, "_signal_cache", {})
+
+    rng = np.random.default_rng(3)
+    dates = pd.date_range("2024-01-01", periods=120, freq="B")
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(dates))))
+    market = _Market({"AAPL": pd.DataFrame({"date": dates, "close": close})})
+    client = _Client(market, ["AAPL"])
+
+    # Pre-market warm-up fills today's signal cache from yesterday's bars
+    warm = client.risk.evaluate_daily_risk_batch(["AAPL"])["AAPL"]
+    assert risk_signals.get_cached_signal("AAPL") is warm
+
+    # Today's close arrives: a -12% day
+    history = market.histories["AAPL"]
+    crash = pd.DataFrame({"date": [dates[-1] + pd.offsets.BDay()], "close": [close[-1] * 0.88]})
+    market.histories["AAPL"] = pd.concat([history, crash], ignore_index=True)
+
+    # Intraday callers still get the cached signal ...
+    assert client.risk.evaluate_daily_risk_batch(["AAPL"])["AAPL"] is warm
+
+    # ... the end-of-day snapshot recomputes on the new bar and refreshes the cache
+    run_end_of_day_snapshot(client)
+    eod = client.saved["AAPL"]
+    prices = market.histories["AAPL"]
+    assert eod is not warm
+    assert eod.var == calculate_var(prices.copy(), None) < warm.var
+    assert eod.cvar == calculate_cvar(prices.copy(), None)
+    assert service.get_cached("AAPL", crash["date"][0].strftime("%Y-%m-%d")) is not None
+    assert risk_signals.get_cached_signal("AAPL") is eod
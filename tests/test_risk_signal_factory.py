@@ -0,0 +1,23 @@
+# tests/test_risk_signal_factory.py
+
+from core.passive.risk_signal_factory import RiskSignalFactory
+
+
+def _factory(net_values):
+    factory = RiskSignalFactory.__new__(RiskSignalFactory)
+    factory.state = {"historical_net_value": net_values}
+    factory._tail_window = None
+    factory._tail_cache = {}
+    return factory
+
+
+def test_tail_risk_follows_new_net_value_bars():
+    net_values = [100.0 + (i % 5) for i in range(30)]
+    factory = _factory(net_values)
+    before = (factory.estimate_var(), factory.estimate_cvar())
+
+    net_values.append(80.0)
+    after = (factory.estimate_var(), factory.estimate_cvar())
+
+    assert after != before
+    assert after == (_factory(list(net_values)).estimate_var(), _factory(list(net_values)).estimate_cvar())
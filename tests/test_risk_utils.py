@@ -0,0 +1,33 @@
+# tests/test_risk_utils.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.risk_utils import build_close_matrix, calculate_cvar, calculate_var, calculate_var_cvar_batch
+
+
+def test_batch_var_cvar_matches_scalar_on_gappy_histories():
+    rng = np.random.default_rng(11)
+    dates = pd.date_range("2024-01-01", periods=100, freq="B")
+    histories = {}
+    for i in range(30):
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, len(dates))))
+        gaps = rng.choice(len(dates), size=i % 6, replace=False)
+        close[gaps] = np.nan
+        histories[f"S{i}"] = pd.DataFrame({"date": dates, "close": close})
+    histories["LAST_GAP"] = histories["S0"].assign(close=histories["S0"]["close"].where(dates != dates[-1]))
+    histories["SHORT"] = histories["S1"].tail(30)
+    histories["EMPTY"] = histories["S2"].assign(close=np.nan)
+
+    batch = calculate_var_cvar_batch(build_close_matrix(histories, lookback_days=50))
+
+    for symbol, prices in histories.items():
+        var = calculate_var(prices.copy(), None)
+        cvar = calculate_cvar(prices.copy(), None)
+        if np.isnan(var):
+            assert np.isnan(batch.at[symbol, "var"]) and np.isnan(batch.at[symbol, "cvar"])
+        else:
+            assert batch.at[symbol, "var"] == pytest.approx(var, abs=1e-12)
+            assert batch.at[symbol, "cvar"] == pytest.approx(cvar, abs=1e-12)
+    assert np.isnan(batch.at["SHORT", "var"]) and np.isnan(batch.at["EMPTY", "var"])
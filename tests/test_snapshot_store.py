@@ -0,0 +1,41 @@
+# tests/test_snapshot_store.py
+
+from audit.snapshot_store import SnapshotStore
+
+
+def _snapshot(timestamp, capital, assets, **extra):
+    snapshot = {
+        "timestamp": timestamp,
+        "capital": capital,
+        "net_value": capital + sum(a["position"] * a["current_price"] for a in assets.values()),
+        "exposure": {"gross_exposure": 0.4, "category_value": {"Tech": 1000.0}},
+        "performance": {"total_commission": 1.5},
+        "assets": assets,
+    }
+    snapshot.update(extra)
+    return snapshot
+
+
+def test_encode_decode_round_trips_every_top_level_key(tmp_path):
+    store = SnapshotStore("c1", root_dir=str(tmp_path))
+    snapshots = [
+        _snapshot("t0", 10000.0, {"AAPL": {"position": 5, "current_price": 200.0}}),
+        _snapshot("t1", 9000.0, {"AAPL": {"position": 10, "current_price": 190.0}},
+                  exposure={"gross_exposure": 0.6, "category_value": {"Tech": 1900.0}}),
+        _snapshot("t2", 9500.0, {"MSFT": {"position": 1, "current_price": 400.0}}, extra_field=[1, 2]),
+        _snapshot("t3", 9500.0, {}),
+    ]
+    del snapshots[3]["performance"]
+
+    refs = [store.encode(s) for s in snapshots]
+
+    # Later snapshots are deltas against the first keyframe
+    assert len({ref["hash"] for ref in refs}) == 1
+    for snapshot, ref in zip(snapshots, refs):
+        assert store.decode(ref) == snapshot
+
+    # A fresh store (no cache) rehydrates from disk
+    reader = SnapshotStore("c1", root_dir=str(tmp_path))
+    for snapshot, ref in zip(snapshots, refs):
+        assert reader.decode(ref) == snapshot
+
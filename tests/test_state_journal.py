@@ -0,0 +1,103 @@
+# tests/test_state_journal.py
+
+import json
+import random
+
+import pytest
+
+from core.portfolio.portfolio import Portfolio
+from core.trade_manager import TradeManager
+import utils.state_journal as state_journal
+from utils.state_journal import JournaledState, PortfolioStateJournal, _dumps
+
+
+def _plain(state):
+    return json.loads(_dumps(state))
+
+
+@pytest.mark.parametrize("book", ["dict", "columnar"])
+def test_dirty_path_saves_replay_to_the_live_state(tmp_path, book, monkeypatch):
+    path = tmp_path / "portfolio_state.json"
+    path.write_text(json.dumps({"capital": 100000.0, "assets": {}, "performance": {}}))
+    monkeypatch.setattr("utils.state_journal.PORTFOLIO_WAL_CHECKPOINT_EVERY", 10 ** 6)
+
+    journal = PortfolioStateJournal(str(path))
+    state = journal.load()
+    assert isinstance(state, JournaledState)
+    portfolio = Portfolio(state, book=book, category_map={})
+    trades = TradeManager(state)
+
+    clock = iter(range(10 ** 6))
+    monkeypatch.setattr(TradeManager, "_now", staticmethod(lambda: f"2024-01-{1 + next(clock) % 28:02d}T10:00:00"))
+
+    rng = random.Random(3)
+    symbols = ["AAPL", "MSFT", "NVDA", "TLT"]
+    for step in range(200):
+        symbol = rng.choice(symbols)
+        price = round(rng.uniform(50, 150), 2)
+        kind = rng.randrange(7)
+        if kind == 0:
+            portfolio.add_trade(symbol, "buy", rng.randint(1, 5), price)
+            trades.add_trade(symbol, "buy", price, 1, intent_id=f"i{step}")
+        elif kind == 1:
+            trades.update_trade(symbol, price)
+        elif kind == 2:
+            trades.close_trade(symbol, price)
+        elif kind == 3:
+            portfolio.mark_to_market({s: round(rng.uniform(50, 150), 2) for s in symbols})
+        elif kind == 4 and symbol in state["assets"]:
+            # Direct writes from other modules (silent mode, killswitch)
+            state["assets"][symbol]["silent_days_left"] = rng.randint(0, 3)
+            state["assets"][symbol]["note"] = f"step {step}"
+        elif kind == 5:
+            state["account_peak_value"] = price
+            state.setdefault("flags", {})["last_step"] = step
+        elif kind == 6 and symbol in state["assets"]:
+            del state["assets"][symbol]
+
+        journal.save(state)
+        assert journal._base == _plain(state)
+        assert PortfolioStateJournal(str(path)).load() == _plain(state)
+
+    journal.checkpoint(state)
+    assert json.loads(path.read_text()) == _plain(state)
+    assert journal.save(state) == 0
+
+
+def test_save_diffs_only_marked_assets(tmp_path, monkeypatch):
+    assets = {f"S{i}": {"position": 1, "current_price": 10.0} for i in range(500)}
+    path = tmp_path / "portfolio_state.json"
+    path.write_text(json.dumps({"capital": 0.0, "assets": assets}))
+    journal = PortfolioStateJournal(str(path))
+    state = journal.load()
+    portfolio = Portfolio(state, book="dict", category_map={})
+    journal.save(state)
+
+    compared = []
+    real_diff = state_journal.diff_state
+
+    def spy(old, new, path=None):
+        compared.append(tuple(path or ()))
+        return real_diff(old, new, path)
+
+    monkeypatch.setattr(state_journal, "diff_state", spy)
+    portfolio.mark_to_market({"S7": 11.0})
+    state["capital"] = 5.0
+
+    assert journal.save(state) > 0
+    assert ("assets",) not in compared and () not in compared
+    assert {p[:2] for p in compared if p[:1] == ("assets",)} == {("assets", "S7")}
+    assert PortfolioStateJournal(str(path)).load() == _plain(state)
+
+
+def test_config_loader_saves_state_assigned_before_any_load(tmp_path):
+    from utils.config_loader import ConfigLoader
+
+    loader = ConfigLoader("C1", base_dir=str(tmp_path))
+    loader.portfolio_state = {"capital": 10.0, "assets": {}}
+    loader.save_portfolio_state()
+
+    loader.portfolio_state["capital"] = 20.0
+    loader.save_portfolio_state()
+
+    assert ConfigLoader("C1", base_dir=str(tmp_path)).portfolio_state == {"capital": 20.0, "assets": {}}
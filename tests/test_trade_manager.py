@@ -0,0 +1,48 @@
+# tests/test_trade_manager.py
+
+import json
+
+from core.trade_manager import TradeManager
+
+
+def _reload(state: dict) -> dict:
+    return json.loads(json.dumps(state))
+
+
+def _open_book(state: dict) -> TradeManager:
+    tm = TradeManager(state, "LedgerTest")
+    for symbol, price in (("X", 1.0), ("AAPL", 100.0), ("Y", 1.0), ("AAPL", 200.0)):
+        tm.add_trade(symbol, "buy", price, 1, slippage_pct=0.0, intent_id=f"{symbol}-{price}")
+    return tm
+
+
+def test_oldest_lot_closes_first_after_reload(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    state = {}
+    _open_book(state).close_trade("X", 2.0)
+
+    tm = TradeManager(_reload(state), "LedgerTest")
+    tm.close_trade("AAPL", 150.0)
+
+    closed = list(tm.iter_closed_trades())
+    assert [(t["symbol"], t["entry_price"]) for t in closed] == [("X", 1.0), ("AAPL", 100.0)]
+
+
+def test_close_replayed_from_stale_state_is_not_double_counted(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    state = {}
+    _open_book(state)
+    stale = _reload(state)
+
+    # Close is appended to the ledger, but the process dies before saving state
+    tm = TradeManager(state, "LedgerTest")
+    tm.close_trade("AAPL", 150.0)
+    expected = tm.get_monthly_summary()
+
+    recovered = TradeManager(stale, "LedgerTest")
+    assert recovered.get_monthly_summary() == expected
+
+    recovered.close_trade("AAPL", 170.0)
+    assert recovered.get_monthly_summary() == expected
+    assert len(list(recovered.iter_closed_trades())) == 1
+    assert recovered._open_trade("AAPL")["entry_price"] == 200.0
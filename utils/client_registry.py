@@ -0,0 +1,254 @@
+# utils/client_registry.py
+"""
+Client Registry Service
+=======================
+
+Process-wide, watched cache of `clients/client_registry.yaml` and each
+client's `config/asset_config.yaml`.
+
+Each file is parsed once and held as an immutable snapshot (read-only
+mappings / tuples). A background watcher swaps in a fresh snapshot when a
+file changes on disk: inotify via the optional `watchdog` package, or
+stat() polling every CLIENT_REGISTRY_POLL_SEC seconds without it. Saves
+made through this module write atomically (temp file + rename) and replace
+the snapshot immediately, so readers never see a half-written file.
+
+`utils.config_loader.load_client_registry / load_client_entry /
+load_client_asset_config` are thin wrappers that hand out mutable copies;
+read-only callers (sidebar, dashboards, schedulers) pass `frozen=True` to
+`load_client_registry` and get the shared snapshot without a copy.
+"""
+
+import os
+import time
+import threading
+from types import MappingProxyType
+from typing import Callable, Dict, Mapping, Optional
+
+import yaml
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # polling fallback
+    FileSystemEventHandler, Observer = object, None
+
+CLIENT_REGISTRY_POLL_SEC = float(os.getenv("CLIENT_REGISTRY_POLL_SEC", 2.0))
+
+_MISSING = object()
+
+
+def freeze(value):
+    """Recursively convert dicts/lists to read-only mappings/tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+def thaw(value):
+    """Mutable deep copy of a frozen snapshot."""
+    if isinstance(value, Mapping):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(v) for v in value]
+    return value
+
+
+def _signature(path: str) -> Optional[tuple]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _atomic_yaml_dump(path: str, data: dict):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        yaml.dump(data, f, sort_keys=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class _WatchedFile:
+    """One YAML file: parser, current signature and frozen snapshot."""
+
+    def __init__(self, path: str, parser: Callable[[Optional[dict]], object]):
+        self.path = path
+        self.parser = parser
+        self.signature = _MISSING
+        self.snapshot = None
+
+    def reload(self) -> bool:
+        """Re-parse if the file changed; returns True if the snapshot was swapped."""
+        signature = _signature(self.path)
+        if signature == self.signature:
+            return False
+        data = None
+        if signature is not None:
+            try:
+                with open(self.path, "r") as f:
+                    data = yaml.safe_load(f)
+            except Exception as e:
+                # Keep serving the last good snapshot (e.g. a non-atomic writer mid-save)
+                print(f"[⚠️] Failed to reload {self.path} — {type(e).__name__}: {e}")
+                return False
+        self.snapshot = freeze(self.parser(data))
+        self.signature = signature
+        return True
+
+
+class ClientRegistryService:
+    """
+    Watched, immutable snapshots of the client registry and asset configs.
+    """
+
+    def __init__(self, registry_path: str, defaults: dict):
+        self.registry_path = os.path.abspath(registry_path)
+        self.defaults = dict(defaults)
+        self._lock = threading.Lock()
+        self._files: Dict[str, _WatchedFile] = {}
+        self._observer = None
+        self._watched_dirs = set()
+        self._poller = None
+
+        self._registry = self._watch(self.registry_path, self._parse_registry)
+        self._start_watcher()
+
+    # === Parsing ===
+
+    def _parse_registry(self, data) -> dict:
+        if data is None:
+            print(f"⛔ client_registry.yaml not found at: {self.registry_path}")
+            return {}
+        if not isinstance(data, dict):
+            print("⚠️ client_registry.yaml must be a dictionary of clients")
+            return {}
+        return {client_id: {**self.defaults, **(cfg or {})} for client_id, cfg in data.items()}
+
+    @staticmethod
+    def _parse_asset_config(data) -> dict:
+        return data or {}
+
+    @staticmethod
+    def asset_config_path(client_id: str) -> str:
+        return os.path.abspath(os.path.join("clients", client_id, "config", "asset_config.yaml"))
+
+    # === Watching ===
+
+    def _watch(self, path: str, parser) -> _WatchedFile:
+        with self._lock:
+            watched = self._files.get(path)
+            if watched is None:
+                watched = _WatchedFile(path, parser)
+                watched.reload()
+                self._files[path] = watched
+        self._watch_dir(os.path.dirname(path))
+        return watched
+
+    def _watch_dir(self, directory: str):
+        if self._observer is None or directory in self._watched_dirs:
+            return
+        if not os.path.isdir(directory):
+            # Nothing to watch yet (e.g. a client without config/); poll for its creation
+            self._start_poller()
+            return
+        try:
+            self._observer.schedule(_ChangeHandler(self), directory, recursive=False)
+            self._watched_dirs.add(directory)
+        except Exception as e:
+            print(f"[⚠️] Cannot watch {directory}, relying on polling — {type(e).__name__}: {e}")
+            self._start_poller()
+
+    def _start_watcher(self):
+        if Observer is not None:
+            try:
+                self._observer = Observer()
+                self._observer.daemon = True
+                self._observer.start()
+                self._watch_dir(os.path.dirname(self.registry_path))
+                return
+            except Exception as e:
+                print(f"[⚠️] File watcher unavailable, polling instead — {type(e).__name__}: {e}")
+                self._observer = None
+        self._start_poller()
+
+    def _start_poller(self):
+        if self._poller is not None:
+            return
+        self._poller = threading.Thread(target=self._poll, name="client-registry-poller", daemon=True)
+        self._poller.start()
+
+    def _poll(self):
+        while True:
+            time.sleep(CLIENT_REGISTRY_POLL_SEC)
+            self.refresh()
+
+    def on_file_event(self, path: str):
+        path = os.path.abspath(path)
+        with self._lock:
+            watched = self._files.get(path)
+            if watched is not None and watched.reload():
+                print(f"🔄 Reloaded {path}")
+
+    def refresh(self):
+        """Re-check every watched file now (polling path; also safe to call manually)."""
+        with self._lock:
+            for watched in self._files.values():
+                watched.reload()
+
+    # === Read API (immutable snapshots) ===
+
+    def registry(self) -> Mapping:
+        return self._registry.snapshot
+
+    def entry(self, client_id: str) -> Optional[Mapping]:
+        return self._registry.snapshot.get(client_id)
+
+    def asset_config(self, client_id: str) -> Optional[Mapping]:
+        """Frozen asset_config.yaml, or None if the client has none."""
+        watched = self._watch(self.asset_config_path(client_id), self._parse_asset_config)
+        return watched.snapshot if watched.signature is not None else None
+
+    # === Write API (atomic file replace + snapshot swap) ===
+
+    def save_registry(self, registry: dict):
+        with self._lock:
+            _atomic_yaml_dump(self.registry_path, registry)
+            self._registry.reload()
+
+    def save_asset_config(self, client_id: str, config: dict):
+        watched = self._watch(self.asset_config_path(client_id), self._parse_asset_config)
+        with self._lock:
+            _atomic_yaml_dump(watched.path, config)
+            watched.reload()
+
+
+class _ChangeHandler(FileSystemEventHandler):
+    def __init__(self, service: ClientRegistryService):
+        super().__init__()
+        self.service = service
+
+    def on_any_event(self, event):
+        for path in (getattr(event, "src_path", None), getattr(event, "dest_path", None)):
+            if path:
+                self.service.on_file_event(path)
+
+
+_services: Dict[str, ClientRegistryService] = {}
+_services_lock = threading.Lock()
+
+
+def get_client_registry_service(registry_path: str, defaults: dict) -> ClientRegistryService:
+    """
+    Return the process-wide ClientRegistryService for a registry file.
+    """
+    key = os.path.abspath(registry_path)
+    with _services_lock:
+        if key not in _services:
+            _services[key] = ClientRegistryService(key, defaults)
+        return _services[key]
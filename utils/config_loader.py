@@ -2,11 +2,13 @@
 
 import os
 import json
-import shutil
 import yaml
-from typing import Dict, List, Optional
+import threading
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
 
+from utils.client_registry import get_client_registry_service, thaw
 from utils.net_value_logger import NetValueLogger  # ✅ Structured logger for historical net value tracking
+from utils.state_journal import PortfolioStateJournal
 
 # Default configuration for any new or incomplete client entry
 DEFAULT_CLIENT_CONFIG = {
@@ -22,58 +24,99 @@ DEFAULT_CLIENT_CONFIG = {
     "created_at": ""
 }
 
-def save_client_registry(updated_registry):
-    """Save the full client registry to YAML."""
-    with open("clients/client_registry.yaml", "w") as f:
-        yaml.dump(updated_registry, f, sort_keys=False)
+# Trailing days of net value history loaded for trend analysis
+NET_VALUE_HISTORY_DAYS = int(os.getenv("NET_VALUE_HISTORY_DAYS", 252))
+
+# === Process-wide parsed-file cache ===
+# path -> ((mtime_ns, size), parsed value). A file is re-parsed only when its
+# signature changes; cached values are shared, so callers that mutate must copy.
+_file_cache: Dict[str, Tuple[tuple, object]] = {}
+_file_cache_lock = threading.Lock()
+
 
-def load_client_registry(path="clients/client_registry.yaml") -> dict:
+def file_signature(path: str) -> Optional[tuple]:
+    """(mtime_ns, size) of a file, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def load_cached(path: str, parser: Callable[[str], object], default=None):
     """
-    Load all client entries from the YAML registry.
-    Fills in missing fields with DEFAULT_CLIENT_CONFIG.
+    Parse `path` with `parser`, reusing the previous result while the file's
+    (path, mtime, size) is unchanged. Returns `default` if the file is missing.
     """
-    root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-    full_path = os.path.join(root_dir, path)
+    key = os.path.abspath(path)
+    signature = file_signature(key)
+    if signature is None:
+        return default
+
+    with _file_cache_lock:
+        cached = _file_cache.get(key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    value = parser(path)
+    with _file_cache_lock:
+        _file_cache[key] = (signature, value)
+    return value
 
-    if not os.path.exists(full_path):
-        print(f"⛔ client_registry.yaml not found at: {full_path}")
-        return {}
 
-    with open(full_path, "r") as f:
-        data = yaml.safe_load(f)
-        if not isinstance(data, dict):
-            print("⚠️ client_registry.yaml must be a dictionary of clients")
-            return {}
+def _parse_yaml(path: str):
+    with open(path, "r") as f:
+        return yaml.safe_load(f)
+
+
+def _parse_symbol_category(path: str) -> Dict[str, str]:
+    data = _parse_yaml(path) or {}
+    print(f"✅ Loaded symbol-category map from {path} — {len(data)} symbols")
+    return {symbol: category for symbol, category in data.items()}
+
+
+REGISTRY_PATH = os.path.join(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")),
+                             "clients", "client_registry.yaml")
+
 
-    merged = {}
-    for client_id, cfg in data.items():
-        cfg = cfg or {}
-        full_cfg = {**DEFAULT_CLIENT_CONFIG, **cfg}
-        merged[client_id] = full_cfg
+def _registry_service(path: str = REGISTRY_PATH):
+    # Watched, immutable snapshots — see utils/client_registry.py
+    return get_client_registry_service(path, DEFAULT_CLIENT_CONFIG)
+
+def save_client_registry(updated_registry):
+    """Save the full client registry to YAML (atomic replace + cache update)."""
+    _registry_service().save_registry(updated_registry)
+
+def load_client_registry(path="clients/client_registry.yaml", frozen: bool = False) -> Mapping:
+    """
+    Load all client entries from the YAML registry.
+    Fills in missing fields with DEFAULT_CLIENT_CONFIG.
 
-    return merged
+    Served from the registry service's cached snapshot; the returned dict is
+    a private copy the caller may modify (and pass to save_client_registry).
+    With frozen=True the shared read-only snapshot is returned as is (no copy).
+    """
+    root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    registry = _registry_service(os.path.join(root_dir, path)).registry()
+    return registry if frozen else thaw(registry)
 
 def load_client_asset_config(client_id: str) -> dict:
-    """Load per-client asset_config.yaml."""
-    path = os.path.join("clients", client_id, "config", "asset_config.yaml")
-    if not os.path.exists(path):
+    """Load per-client asset_config.yaml (cached; returns a private copy)."""
+    config = _registry_service().asset_config(client_id)
+    if config is None:
         print(f"⚠️ asset_config.yaml not found for client: {client_id}")
         return {}
-    with open(path, "r") as f:
-        return yaml.safe_load(f) or {}
+    return thaw(config)
 
 def save_client_asset_config(client_id: str, config: dict):
-    """Save per-client asset_config.yaml."""
-    path = os.path.join("clients", client_id, "config", "asset_config.yaml")
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w") as f:
-        yaml.dump(config, f, sort_keys=False)
+    """Save per-client asset_config.yaml (atomic replace + cache update)."""
+    _registry_service().save_asset_config(client_id, config)
     print(f"✅ asset_config.yaml saved for client: {client_id}")
 
 def load_client_entry(client_id: str) -> dict:
     """Load a single client entry from the registry."""
-    registry = load_client_registry()
-    return registry.get(client_id, DEFAULT_CLIENT_CONFIG.copy())
+    entry = _registry_service().entry(client_id)
+    return thaw(entry) if entry is not None else DEFAULT_CLIENT_CONFIG.copy()
 
 def get_client_assets(client_id: str) -> List[str]:
     """Shortcut to load tradable symbols for a given client."""
@@ -81,16 +124,17 @@ def get_client_assets(client_id: str) -> List[str]:
     loader = ConfigLoader(client_id)
     return loader.asset_config.get("symbol_universe", [])
 
+def load_symbol_category_map(path: str = "config/symbol_category.yaml") -> Dict[str, str]:
+    """Load the global symbol → category map (cached until the file changes)."""
+    data = load_cached(path, _parse_symbol_category)
+    if data is None:
+        print("⚠️ symbol_category.yaml not found — returning empty map")
+        return {}
+    return dict(data)
+
 def load_all_symbols_from_category(path: str = "config/symbol_category.yaml") -> List[str]:
     """Load all globally known asset symbols from category map."""
-    print(f"📄 Loading global symbol list from: {path}")
-    if not os.path.exists(path):
-        print("⚠️ symbol_category.yaml not found — returning empty list")
-        return []
-    with open(path, "r") as f:
-        data = yaml.safe_load(f)
-    print(f"✅ Loaded global symbol list — {len(data)} symbols")
-    return list(data.keys())
+    return list(load_symbol_category_map(path).keys())
 
 class ConfigLoader:
     """
@@ -102,6 +146,12 @@ class ConfigLoader:
     - portfolio_state.json
     - symbol universe and category map
     - historical net value snapshots
+
+    Every file is loaded lazily on first attribute access. Read-only inputs
+    (asset config, symbol map, net value history) are parsed once per
+    process and re-parsed only when the file changes — the asset config via
+    the client registry service, the others via load_cached; each loader
+    gets its own copy, so in-place edits stay local until saved.
     """
 
     def __init__(self, client_id: str, base_dir: str = "clients"):
@@ -109,34 +159,61 @@ class ConfigLoader:
         self.base_dir = base_dir
         self.client_dir = os.path.join(base_dir, client_id)
 
-        print(f"🔧 Initializing ConfigLoader for client: {client_id}")
-        print(f"📁 Client directory: {self.client_dir}")
-
-        self.asset_config = self._load_asset_config()
-        self.portfolio_state = self._load_portfolio_state()
-        self.symbol_universe = self._load_symbol_universe()
-        self.symbol_category_map = self._load_symbol_category_map()
-        self.historical_net_value = self._load_net_value_history()
-
-        print(f"✅ ConfigLoader ready for [{client_id}] — assets: {len(self.asset_config)}, symbols: {len(self.symbol_universe)}\n")
+        self._asset_config = None
+        self._portfolio_state = None
+        self._symbol_category_map = None
+        self._historical_net_value = None
+        self.state_journal = None
+
+    # === Lazy attributes ===
+
+    @property
+    def asset_config(self) -> Dict:
+        if self._asset_config is None:
+            self._asset_config = self._load_asset_config()
+        return self._asset_config
+
+    @asset_config.setter
+    def asset_config(self, value: Dict):
+        self._asset_config = value
+
+    @property
+    def portfolio_state(self) -> Dict:
+        if self._portfolio_state is None:
+            self._portfolio_state = self._load_portfolio_state()
+        return self._portfolio_state
+
+    @portfolio_state.setter
+    def portfolio_state(self, value: Dict):
+        self._portfolio_state = value
+
+    @property
+    def symbol_category_map(self) -> Dict[str, str]:
+        if self._symbol_category_map is None:
+            self._symbol_category_map = self._load_symbol_category_map()
+        return self._symbol_category_map
+
+    @property
+    def symbol_universe(self) -> List[str]:
+        return list(self.symbol_category_map.keys())
+
+    @property
+    def historical_net_value(self) -> List[float]:
+        if self._historical_net_value is None:
+            self._historical_net_value = self._load_net_value_history()
+        return self._historical_net_value
 
     def _load_asset_config(self) -> Dict:
-        path = os.path.join(self.client_dir, "config", "asset_config.yaml")
-        print(f"📄 Loading asset config from: {path}")
-        if not os.path.exists(path):
+        # Same watched snapshot as load_client_asset_config (one cache per file)
+        data = _registry_service().asset_config(self.client_id)
+        if data is None:
+            path = os.path.join(self.client_dir, "config", "asset_config.yaml")
             raise FileNotFoundError(f"[{self.client_id}] asset_config.yaml not found: {path}")
-        with open(path, "r") as f:
-            data = yaml.safe_load(f)
-        print(f"✅ Loaded asset config — {len(data)} entries")
-        return data
+        return thaw(data)
 
     def save_asset_config(self):
-        """Save updated asset_config.yaml."""
-        path = os.path.join(self.client_dir, "config", "asset_config.yaml")
-        print(f"💾 Saving asset config to: {path}")
-        with open(path, "w") as f:
-            yaml.dump(self.asset_config, f, sort_keys=False)
-        print("✅ asset_config.yaml saved")
+        """Save updated asset_config.yaml (atomic replace + cache update)."""
+        save_client_asset_config(self.client_id, self.asset_config)
 
     def get_risk_style(self) -> str:
         """Return the risk style defined in asset_config.yaml (default: 'conservative')"""
@@ -146,58 +223,66 @@ class ConfigLoader:
         """Return custom constraint dictionary from asset_config.yaml (if any)"""
         return self.asset_config.get("risk_constraints", {})
 
+    def _portfolio_state_path(self) -> str:
+        return os.path.join(self.client_dir, "snapshots/current", "portfolio_state.json")
+
     def _load_portfolio_state(self) -> Dict:
-        path = os.path.join(self.client_dir, "snapshots/current", "portfolio_state.json")
+        # Not shared through the file cache: the state is mutated in place and
+        # owned by this loader's journal
+        path = self._portfolio_state_path()
         print(f"📄 Loading portfolio state from: {path}")
         if not os.path.exists(path):
             raise FileNotFoundError(f"[{self.client_id}] portfolio_state.json not found: {path}")
-        with open(path, "r") as f:
-            data = json.load(f)
+        # Checkpoint + write-ahead log replay (see utils/state_journal.py)
+        self.state_journal = PortfolioStateJournal(path)
+        data = self.state_journal.load()
         print(f"✅ Loaded portfolio state — keys: {list(data.keys())}")
         return data
 
-    def save_portfolio_state(self):
-        """Save updated portfolio state, with automatic backup."""
-        path = os.path.join(self.client_dir, "snapshots/current", "portfolio_state.json")
-        backup_path = os.path.join(self.client_dir, "snapshots/current", "portfolio_state_backup.json")
-
-        print(f"💾 Saving portfolio state to: {path}")
-        if os.path.exists(path):
-            shutil.copy(path, backup_path)
-            print(f"🗂️ Backup created at: {backup_path}")
+    def save_portfolio_state(self, checkpoint: bool = False):
+        """
+        Save updated portfolio state.
 
-        with open(path, "w") as f:
-            json.dump(self.portfolio_state, f, indent=2)
-        print("✅ Portfolio state saved\n")
+        Only the changes since the last save are appended to the state WAL;
+        the full JSON (with portfolio_state_backup.json) is rewritten on
+        periodic checkpoints, or immediately when `checkpoint=True` (e.g. EOD).
+        A state assigned without being loaded first is written as a full
+        checkpoint.
 
-    def _load_symbol_universe(self) -> List[str]:
-        return load_all_symbols_from_category()
+        Only one process may own (save) a given client's state file: a
+        checkpoint deletes the WAL, which another writer could still be
+        appending to. Other processes read it with `read_portfolio_state`.
+        """
+        state = self.portfolio_state
+        if self.state_journal is None:
+            path = self._portfolio_state_path()
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.state_journal = PortfolioStateJournal(path)
+        path = self.state_journal.path
+        print(f"💾 Saving portfolio state to: {path}")
+        n_ops = self.state_journal.save(state, force_checkpoint=checkpoint)
+        print(f"✅ Portfolio state saved — {n_ops} changes journaled\n")
 
     def _load_symbol_category_map(self) -> Dict[str, str]:
-        path = "config/symbol_category.yaml"
-        print(f"📄 Loading symbol-category mapping from: {path}")
-        if not os.path.exists(path):
-            print("⚠️ symbol_category.yaml not found — returning empty map")
-            return {}
-        with open(path, "r") as f:
-            data = yaml.safe_load(f)
-        print(f"✅ Loaded symbol-category map — {len(data)} entries")
-        return {symbol: category for symbol, category in data.items()}
+        return load_symbol_category_map("config/symbol_category.yaml")
 
     def _load_net_value_history(self) -> List[float]:
         """
         Load structured net value history from JSONL via NetValueLogger.
 
         Returns:
-            List[float]: sequence of daily net values (used for trend analysis, etc.)
+            List[float]: the last NET_VALUE_HISTORY_DAYS daily net values (used for trend analysis, etc.)
         """
         logger = NetValueLogger(self.client_id, base_path=os.path.join(self.client_dir, "snapshots"))
 
-        try:
-            records = logger.load_all()
+        def parse(path):
+            records = logger.read_daily(NET_VALUE_HISTORY_DAYS)
             net_values = [r["net_value"] for r in records if isinstance(r.get("net_value"), (int, float))]
             print(f"📈 Loaded {len(net_values)} historical net values")
             return net_values
+
+        try:
+            return list(load_cached(logger.file_path, parse, default=[]))
         except Exception as e:
             print(f"❌ Failed to load net value history for {self.client_id}: {e}")
             return []
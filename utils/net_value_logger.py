@@ -2,19 +2,92 @@
 
 import os
 import json
+import argparse
+import threading
+from bisect import bisect_left, bisect_right
 from datetime import datetime
-from typing import Dict, Optional
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # non-POSIX: in-process locking only
+    fcntl = None
+
+TAIL_CHUNK_BYTES = 8192
+
+# Compact encoding (opt-in): skip duplicate records and reference unchanged
+# positions (see NetValueLogger docstring). Day rollups run offline (main()).
+NET_VALUE_COMPACT = os.getenv("NET_VALUE_COMPACT", "0") == "1"
+
+# lock file path → in-process lock (fcntl.flock covers other processes)
+_thread_locks: Dict[str, threading.Lock] = {}
+_thread_locks_lock = threading.Lock()
+
+
+def _thread_lock(path: str) -> threading.Lock:
+    with _thread_locks_lock:
+        if path not in _thread_locks:
+            _thread_locks[path] = threading.Lock()
+        return _thread_locks[path]
+
+
+def _encode(record: dict, prev_positions, prev_holder: Optional[int], offset: int) -> Tuple[dict, int]:
+    """
+    Replace an unchanged positions map by a reference to the line that holds it.
+
+    Returns:
+        (record to write, byte offset of the line holding this record's positions)
+    """
+    if prev_holder is None or "positions" not in record or record["positions"] != prev_positions:
+        return record, offset
+    out = {}
+    for key, value in record.items():
+        if key == "positions":
+            out["positions_ref"] = prev_holder
+        else:
+            out[key] = value
+    return out, prev_holder
 
 
 class NetValueLogger:
     """
     Logger for recording portfolio net value over time as structured JSONL.
     Each line = one daily snapshot.
+
+    Readers avoid parsing the whole history:
+    - read_recent(n) seeks backwards from the end of the file
+    - read_range(start, end) uses a hidden sidecar index
+      (`.net_value_history.jsonl.idx`) mapping each date to the byte offset
+      of its first record; the index is extended incrementally from the
+      bytes appended since it was last updated
+
+    Appends are always append-only. Compact encoding (NET_VALUE_COMPACT=1,
+    opt-in):
+    - a record identical to the previous one is not written again
+    - an unchanged positions map is stored as `"positions_ref": <byte offset>`
+      of the line that holds it (readers resolve it transparently)
+
+    compact_days() (offline: `python -m utils.net_value_logger`) rolls closed
+    days up into one canonical EOD record (`"eod": true, "intraday_records": k`)
+    and moves the intraday records to `net_value_history_intraday.jsonl`.
+
+    Appends and compaction hold an exclusive lock on a sidecar lock file
+    (`.net_value_history.jsonl.lock`, flock across processes), so a record
+    appended while another writer compacts is never lost to the file replace.
     """
 
-    def __init__(self, client_id: str, base_path: Optional[str] = None):
+    def __init__(self, client_id: str, base_path: Optional[str] = None, compact: bool = NET_VALUE_COMPACT):
         self.client_id = client_id
         self.file_path = self.get_net_value_log_path(base_path)
+        self.index_path = os.path.join(
+            os.path.dirname(self.file_path), "." + os.path.basename(self.file_path) + ".idx"
+        )
+        self.intraday_path = self.file_path[:-len(".jsonl")] + "_intraday.jsonl"
+        self.lock_path = os.path.join(
+            os.path.dirname(self.file_path), "." + os.path.basename(self.file_path) + ".lock"
+        )
+        self.compact = compact
         os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
 
     def get_net_value_log_path(self, base_path: Optional[str] = None) -> str:
@@ -36,8 +109,7 @@ class NetValueLogger:
             "positions": positions,
             "reason": reason
         }
-        with open(self.file_path, "a") as f:
-            f.write(json.dumps(entry) + "\n")
+        self._write(entry)
 
     def append_extended(self, portfolio_state: dict, per_asset_signals: Optional[Dict[str, object]] = None, reason: str = "update"):
         # Append enhanced snapshot, including per-asset positions and optional signal metadata
@@ -68,9 +140,7 @@ class NetValueLogger:
             "positions": positions,
             "reason": reason
         }
-
-        with open(self.file_path, "a") as f:
-            f.write(json.dumps(record) + "\n")
+        self._write(record)
 
     def auto_initialize_if_missing(self, portfolio_state: dict):
         # Auto-log an initial state if file does not exist
@@ -82,10 +152,330 @@ class NetValueLogger:
                 reason="auto-initialization"
             )
 
+    # === Writing ===
+
+    @contextmanager
+    def _locked(self):
+        """
+        Exclusive writer lock for this history (threads and processes).
+        The lock lives on a sidecar file, which compaction never replaces.
+        """
+        with _thread_lock(os.path.abspath(self.lock_path)):
+            with open(self.lock_path, "a") as f:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def _write(self, record: dict):
+        with self._locked():
+            if not self.compact:
+                with open(self.file_path, "a") as f:
+                    f.write(json.dumps(record) + "\n")
+                return
+
+            last, _ = self._tail_state(self.file_path)
+            if last == record:
+                return  # identical to the previous record
+            self._append_encoded(self.file_path, [record])
+
+    def _tail_state(self, path: str) -> Tuple[Optional[dict], Optional[int]]:
+        """(last record with positions resolved, offset of the line holding its positions)."""
+        tail = self._tail(path, 1)
+        if not tail:
+            return None, None
+        offset, record = tail[0]
+        holder = record.get("positions_ref", offset)
+        return self._resolve(path, tail)[0], holder
+
+    def _append_encoded(self, path: str, records: List[dict]):
+        last, holder = self._tail_state(path)
+        prev_positions = last.get("positions") if last else None
+        with open(path, "ab") as f:
+            for record in records:
+                offset = f.tell()
+                out, holder = _encode(record, prev_positions, holder, offset)
+                prev_positions = record.get("positions")
+                f.write((json.dumps(out) + "\n").encode("utf-8"))
+
+    def compact_days(self, before: Optional[str] = None) -> int:
+        """
+        Roll every day before `before` (default: today) into one EOD record
+        and move its intraday records to the intraday sidecar. Rewrites the
+        whole file: run it offline (main()), not on the trade path.
+
+        Returns:
+            int: number of intraday records moved
+        """
+        with self._locked():
+            return self._compact_days(before)
+
+    def _compact_days(self, before: Optional[str] = None) -> int:
+        """compact_days() body; the caller holds the writer lock."""
+        before = before or datetime.now().strftime("%Y-%m-%d")
+        records = self._resolve(self.file_path, list(self._iter_lines(self.file_path)))
+
+        groups: List[Tuple[Optional[str], List[dict]]] = []
+        for record in records:
+            date = record.get("date")
+            if groups and groups[-1][0] == date:
+                groups[-1][1].append(record)
+            else:
+                groups.append((date, [record]))
+
+        kept, moved = [], []
+        for date, group in groups:
+            if not date or date >= before or (len(group) == 1 and group[0].get("eod")):
+                kept.extend(group)
+                continue
+            eod = {k: v for k, v in group[-1].items() if k != "eod" and k != "intraday_records"}
+            eod["eod"] = True
+            eod["intraday_records"] = sum(r.get("intraday_records", 1) for r in group)
+            kept.append(eod)
+            moved.extend(r for r in group if not r.get("eod"))
+
+        if not moved:
+            return 0
+
+        # 1) intraday detail first (skipping days a crashed run already moved) ...
+        last_moved, _ = self._tail_state(self.intraday_path)
+        if last_moved is not None:
+            moved = [r for r in moved if r.get("date", "") > last_moved.get("date", "")]
+        if moved:
+            self._append_encoded(self.intraday_path, moved)
+
+        # 2) ... then atomically replace the main series
+        tmp_path = self.file_path + ".tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        self._append_encoded(tmp_path, kept)
+        with open(tmp_path, "rb+") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.file_path)
+        if os.path.exists(self.index_path):
+            os.remove(self.index_path)
+
+        print(f"🗜️ Compacted net value history for {self.client_id} — {len(records)} → {len(kept)} records")
+        return len(moved)
+
+    # === Reading ===
+
+    @staticmethod
+    def _iter_lines(path: str) -> Iterator[Tuple[int, dict]]:
+        """(byte offset, raw record) for every well-formed line."""
+        if not os.path.exists(path):
+            return
+        with open(path, "rb") as f:
+            offset = 0
+            for line in f:
+                if line.strip():
+                    try:
+                        yield offset, json.loads(line)
+                    except json.JSONDecodeError:
+                        pass
+                offset += len(line)
+
+    @staticmethod
+    def _read_line_at(path: str, offset: int) -> Optional[dict]:
+        with open(path, "rb") as f:
+            f.seek(offset)
+            try:
+                return json.loads(f.readline())
+            except json.JSONDecodeError:
+                return None
+
+    def _resolve(self, path: str, pairs: List[Tuple[int, dict]]) -> List[dict]:
+        """Records with every `positions_ref` replaced by the referenced positions map."""
+        positions_at: Dict[int, dict] = {}
+        records = []
+        for offset, record in pairs:
+            if "positions_ref" in record:
+                ref = record["positions_ref"]
+                if ref not in positions_at:
+                    holder = self._read_line_at(path, ref) or {}
+                    positions_at[ref] = holder.get("positions", {})
+                record = {("positions" if k == "positions_ref" else k): (positions_at[ref] if k == "positions_ref" else v)
+                          for k, v in record.items()}
+            elif "positions" in record:
+                positions_at[offset] = record["positions"]
+            records.append(record)
+        return records
+
     def load_all(self) -> list:
         # Load and return all historical records
+        return self._resolve(self.file_path, list(self._iter_lines(self.file_path)))
+
+    def load_intraday(self) -> list:
+        # Intraday records moved out of the main series by compact_days()
+        return self._resolve(self.intraday_path, list(self._iter_lines(self.intraday_path)))
+
+    def _tail(self, path: str, n: int) -> List[Tuple[int, dict]]:
+        """
+        Last `n` (offset, raw record) pairs, read by seeking backwards from
+        the end of the file in TAIL_CHUNK_BYTES chunks.
+        """
+        if n <= 0 or not os.path.exists(path):
+            return []
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            pos = f.tell()
+            buf = b""
+            # n complete lines need n + 1 newlines, unless we reach the start of the file
+            while pos > 0 and buf.count(b"\n") <= n:
+                step = min(TAIL_CHUNK_BYTES, pos)
+                pos -= step
+                f.seek(pos)
+                buf = f.read(step) + buf
+
+        pairs, offset = [], pos
+        pieces = buf.split(b"\n")
+        for i, line in enumerate(pieces):
+            if line.strip() and not (i == 0 and pos > 0):  # first piece may be a partial line
+                try:
+                    pairs.append((offset, json.loads(line)))
+                except json.JSONDecodeError:
+                    pass
+            offset += len(line) + 1
+        return pairs[-n:]
+
+    def read_recent(self, n: int) -> List[dict]:
+        """
+        Last `n` records (oldest first), read by seeking backwards from the
+        end of the file in TAIL_CHUNK_BYTES chunks.
+        """
+        return self._resolve(self.file_path, self._tail(self.file_path, n))
+
+    def read_daily(self, n: Optional[int] = None) -> List[dict]:
+        """
+        One record per day (the last one, i.e. the EOD record for compacted
+        days), oldest first; only the last `n` days if given. This is the
+        clean series for trend scoring and charts.
+        """
+        records = None
+        if n:
+            index = self.refresh_index()
+            if index["sorted"] and len(index["dates"]) > n:
+                records = self.read_range(index["dates"][-n][0])
+        if records is None:
+            records = self.load_all()
+
+        daily = {}
+        for record in records:
+            if record.get("date"):
+                daily[record["date"]] = record
+        # By date, not file position: backfilled days may be appended out of order
+        series = [daily[date] for date in sorted(daily)]
+        return series[-n:] if n else series
+
+    # === Date index ===
+
+    def _load_index(self) -> dict:
+        try:
+            with open(self.index_path, "r") as f:
+                index = json.load(f)
+            if isinstance(index.get("dates"), list) and isinstance(index.get("size"), int):
+                return index
+        except (FileNotFoundError, json.JSONDecodeError, AttributeError):
+            pass
+        return {"size": 0, "dates": [], "sorted": True}
+
+    def refresh_index(self) -> dict:
+        """
+        Bring the date → offset index up to date with the log file, scanning
+        only bytes appended since the last refresh (full rebuild if the file
+        shrank, e.g. after compaction).
+        """
+        index = self._load_index()
+        size = os.path.getsize(self.file_path) if os.path.exists(self.file_path) else 0
+        if size < index["size"]:
+            index = {"size": 0, "dates": [], "sorted": True}
+        if size == index["size"]:
+            return index
+
+        dates = index["dates"]
+        with open(self.file_path, "rb") as f:
+            f.seek(index["size"])
+            offset = index["size"]
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # partial trailing line; picked up next time
+                try:
+                    date = json.loads(line).get("date")
+                except (json.JSONDecodeError, AttributeError):
+                    date = None
+                if date and (not dates or dates[-1][0] != date):
+                    if dates and date < dates[-1][0]:
+                        index["sorted"] = False
+                    dates.append([date, offset])
+                offset += len(line)
+        index["size"] = offset
+
+        tmp_path = self.index_path + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(index, f)
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            print(f"[⚠️] Failed to write net value index {self.index_path} — {type(e).__name__}: {e}")
+        return index
+
+    def read_range(self, start: Optional[str] = None, end: Optional[str] = None) -> List[dict]:
+        """
+        Records with start <= date <= end ("YYYY-MM-DD", inclusive; either
+        bound may be None). Only the byte range covering those dates is read.
+        """
         if not os.path.exists(self.file_path):
             return []
-        with open(self.file_path, "r") as f:
-            return [json.loads(line) for line in f if line.strip()]
+        index = self.refresh_index()
+        if not index["sorted"]:
+            # Out-of-order dates: offsets are not monotonic in date, filter a full read
+            return [r for r in self.load_all()
+                    if (start is None or r.get("date", "") >= start) and (end is None or r.get("date", "") <= end)]
+
+        dates = [d for d, _ in index["dates"]]
+        lo = bisect_left(dates, start) if start else 0
+        hi = bisect_right(dates, end) if end else len(dates)
+        if lo >= hi:
+            return []
+        begin = index["dates"][lo][1]
+        stop = index["dates"][hi][1] if hi < len(dates) else index["size"]
+
+        with open(self.file_path, "rb") as f:
+            f.seek(begin)
+            chunk = f.read(stop - begin)
+        pairs, offset = [], begin
+        for line in chunk.split(b"\n"):
+            if line.strip():
+                try:
+                    pairs.append((offset, json.loads(line)))
+                except json.JSONDecodeError:
+                    pass
+            offset += len(line) + 1
+        return self._resolve(self.file_path, pairs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact net value histories (EOD rollup + intraday sidecar)")
+    parser.add_argument("client_ids", nargs="*", help="Clients to compact (default: all registered)")
+    parser.add_argument("--before", help="Roll up days before this date (default: today)")
+    args = parser.parse_args()
+
+    client_ids = args.client_ids
+    if not client_ids:
+        from utils.config_loader import load_client_registry
+        client_ids = list(load_client_registry().keys())
+
+    for client_id in client_ids:
+        logger = NetValueLogger(client_id, compact=True)
+        if not logger.file_exists():
+            continue
+        before = os.path.getsize(logger.file_path)
+        moved = logger.compact_days(args.before)
+        print(f"✅ [{client_id}] {moved} intraday records moved — {before:,} → {os.path.getsize(logger.file_path):,} bytes")
+
 
+if __name__ == "__main__":
+    main()
@@ -1,53 +1,141 @@
 # utils/risk_utils.py
 
+import hashlib
+import threading
 import numpy as np
 import pandas as pd
 from datetime import datetime
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 from sklearn.preprocessing import StandardScaler
 from hmmlearn.hmm import GaussianHMM
 from arch import arch_model
 
 # === VaR & CVaR ===
 
-def calculate_var(prices: pd.DataFrame, now: datetime, lookback_days: int = 50, confidence_level: float = 0.95) -> float:
+def _window_returns(prices: pd.DataFrame, lookback_days: int, label: str):
+    """
+    Log returns over the trailing `lookback_days` closes, or None if there
+    is not enough data.
+    """
     if "date" in prices.columns:
         prices["date"] = pd.to_datetime(prices["date"])
         prices = prices.set_index("date").sort_index()
 
     if "close" not in prices.columns or len(prices) < lookback_days:
-        print("⚠️ Not enough data to compute VaR")
-        return np.nan
+        print(f"⚠️ Not enough data to compute {label}")
+        return None
 
-    close = prices["close"].iloc[-lookback_days:]
-    returns = np.log(close / close.shift(1)).dropna()
+    close = prices["close"].iloc[-lookback_days:].to_numpy(dtype=float)
+    returns = np.diff(np.log(close))
+    returns = returns[~np.isnan(returns)]
+    return returns if len(returns) else None
 
-    if returns.empty:
-        return np.nan
 
-    sorted_returns = np.sort(returns)
-    index = int((1 - confidence_level) * len(sorted_returns))
-    return float(sorted_returns[index])
+def tail_risk_from_sorted(sorted_returns, confidence_level: float = 0.95) -> tuple:
+    """
+    Empirical (VaR, CVaR) from an ascending array of returns.
 
+    VaR is the return at index int((1 - confidence) * n); CVaR is the mean of
+    all returns at or below VaR. Shared by the batch and scalar paths.
+    """
+    n = len(sorted_returns)
+    if n == 0:
+        return np.nan, np.nan
+    var = float(sorted_returns[int((1 - confidence_level) * n)])
+    k = int(np.searchsorted(sorted_returns, var, side="right"))
+    return var, float(np.mean(sorted_returns[:k]))
 
-def calculate_cvar(prices: pd.DataFrame, now: datetime, lookback_days: int = 50, confidence_level: float = 0.95) -> float:
-    if "date" in prices.columns:
-        prices["date"] = pd.to_datetime(prices["date"])
-        prices = prices.set_index("date").sort_index()
 
-    if "close" not in prices.columns or len(prices) < lookback_days:
-        print("⚠️ Not enough data to compute CVaR")
+def calculate_var(prices: pd.DataFrame, now: datetime, lookback_days: int = 50, confidence_level: float = 0.95) -> float:
+    returns = _window_returns(prices, lookback_days, "VaR")
+    if returns is None:
         return np.nan
+    return tail_risk_from_sorted(np.sort(returns), confidence_level)[0]
 
-    close = prices["close"].iloc[-lookback_days:]
-    returns = np.log(close / close.shift(1)).dropna()
-    var = calculate_var(prices, now, lookback_days, confidence_level)
 
-    if np.isnan(var):
+def calculate_cvar(prices: pd.DataFrame, now: datetime, lookback_days: int = 50, confidence_level: float = 0.95) -> float:
+    returns = _window_returns(prices, lookback_days, "CVaR")
+    if returns is None:
         return np.nan
+    return tail_risk_from_sorted(np.sort(returns), confidence_level)[1]
+
+
+# === Batched VaR & CVaR ===
+
+def build_close_matrix(price_histories: dict, lookback_days: int = 50) -> pd.DataFrame:
+    """
+    Stack the trailing closes of many symbols into one wide matrix.
+
+    Each column holds the last `lookback_days` closes of one symbol. Symbols
+    with fewer than `lookback_days` bars fail the "not enough data" check of
+    the per-symbol functions and are left all-NaN; any other NaN is a gap in
+    the symbol's own history.
+
+    Args:
+        price_histories (dict): symbol → DataFrame with a "close" column
+        lookback_days (int): Number of trailing bars to keep per symbol
+
+    Returns:
+        pd.DataFrame: shape (lookback_days, n_symbols), columns = symbols
+    """
+    symbols = list(price_histories.keys())
+    matrix = np.full((lookback_days, len(symbols)), np.nan)
+
+    for col, symbol in enumerate(symbols):
+        prices = price_histories[symbol]
+        if prices is None or "close" not in getattr(prices, "columns", []):
+            continue
+        if "date" in prices.columns:
+            prices = prices.sort_values("date")
+        if len(prices) < lookback_days:
+            continue
+        matrix[:, col] = prices["close"].to_numpy(dtype=float)[-lookback_days:]
+
+    return pd.DataFrame(matrix, columns=symbols)
+
+
+def calculate_var_cvar_batch(close_matrix: pd.DataFrame, confidence_level: float = 0.95) -> pd.DataFrame:
+    """
+    Compute historical VaR and CVaR for every column of a close-price matrix
+    in one vectorized pass.
 
-    losses = returns[returns <= var]
-    return float(losses.mean()) if not losses.empty else var
+    Matches `calculate_var` / `calculate_cvar` per column: log returns over the
+    window with NaN returns (gaps) dropped, empirical quantile at index
+    int((1 - confidence) * n) of the n valid returns, and CVaR as the mean of
+    returns at or below VaR. Columns without any valid return yield NaN.
+
+    Args:
+        close_matrix (pd.DataFrame): Output of `build_close_matrix`
+        confidence_level (float): VaR confidence level
+
+    Returns:
+        pd.DataFrame: index = symbols, columns = ["var", "cvar"]
+    """
+    closes = close_matrix.to_numpy(dtype=float)
+    symbols = list(close_matrix.columns)
+
+    if closes.shape[0] < 2 or not symbols:
+        return pd.DataFrame(np.nan, index=symbols, columns=["var", "cvar"])
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = np.diff(np.log(closes), axis=0)
+
+    # NaNs sort last, so the first n_valid rows of each column are its valid returns
+    n_valid = (~np.isnan(returns)).sum(axis=0)
+    sorted_returns = np.sort(returns, axis=0)
+    index = np.floor((1 - confidence_level) * n_valid).astype(int)
+    var = np.take_along_axis(sorted_returns, index[np.newaxis, :], axis=0)[0]
+
+    tail = returns <= var  # False for NaN returns
+    tail_count = tail.sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cvar = np.where(tail, returns, 0.0).sum(axis=0) / tail_count
+    cvar = np.where(tail_count > 0, cvar, var)
+
+    valid = n_valid > 0
+    var = np.where(valid, var, np.nan)
+    cvar = np.where(valid, cvar, np.nan)
+    return pd.DataFrame({"var": var, "cvar": cvar}, index=symbols)
 
 
 # === Volatility: GARCH ===
@@ -77,36 +165,125 @@ def predict_garch(prices: pd.DataFrame, now: datetime, lookback_days: int = 50)
 
 # === Regime Detection: HMM ===
 
-def detect_regime(price_series: pd.Series, n_states: int = 3, lambda_decay: float = 0.1) -> pd.Series:
-    log_returns = np.log(price_series / price_series.shift(1)).dropna()
-    log_returns = log_returns.replace([np.inf, -np.inf], np.nan).dropna()
-
-    if len(log_returns) < 30:
-        return pd.Series(index=price_series.index[1:], data="Neutral")
-
-    X = log_returns.values.reshape(-1, 1)
-
-    try:
-        model = GaussianHMM(n_components=n_states, covariance_type="full", n_iter=1000, random_state=42)
-        model.fit(X)
-        hidden_states = model.predict(X)
-    except Exception as e:
-        print(f"⚠️ HMM fitting failed: {e}")
-        return pd.Series(index=log_returns.index, data="Neutral")
+REGIME_CACHE_SIZE = 128
+NEUTRAL_PROBA = {"Bull": 0.33, "Neutral": 0.34, "Bear": 0.33}
+
+
+class RegimeModel:
+    """
+    A single fitted 3-state GaussianHMM over a close series.
+
+    Fitting is done once per (symbol, close fingerprint) and shared through a
+    small process-wide LRU, so the regime label, the regime probabilities and
+    the per-bar regime series all come from the same fit, and repeated
+    intraday approvals for an unchanged series never refit.
+    """
+
+    _cache: "OrderedDict[tuple, RegimeModel]" = OrderedDict()
+    _lock = threading.Lock()
+
+    def __init__(self, close_series: pd.Series, n_states: int = 3):
+        self.index = close_series.index
+        self.model = None
+        self.hidden_states = None
+        self.probs = None
+        self.state_to_regime = {}
+
+        log_returns = np.log(close_series / close_series.shift(1)).dropna()
+        self.log_returns = log_returns.replace([np.inf, -np.inf], np.nan).dropna()
+
+        if len(self.log_returns) < 30:
+            return
+
+        X = self.log_returns.values.reshape(-1, 1)
+        try:
+            model = GaussianHMM(n_components=n_states, covariance_type="full", n_iter=1000, random_state=42)
+            model.fit(X)
+            self.hidden_states = model.predict(X)
+            self.probs = model.predict_proba(X)
+            self.model = model
+        except Exception as e:
+            print(f"⚠️ HMM fitting failed: {e}")
+            return
+
+        sorted_states = np.argsort(model.means_.flatten())
+        self.state_to_regime = {
+            sorted_states[2]: "Bull",
+            sorted_states[1]: "Neutral",
+            sorted_states[0]: "Bear"
+        }
+
+    @staticmethod
+    def fingerprint(close_series: pd.Series) -> str:
+        """Hash of the raw close values, used as the cache key."""
+        values = np.ascontiguousarray(close_series.to_numpy(dtype=float))
+        return hashlib.sha1(values.tobytes()).hexdigest()
+
+    @classmethod
+    def get(cls, close_series: pd.Series, symbol: str = None) -> "RegimeModel":
+        """
+        Return the cached model for this (symbol, close fingerprint), fitting on miss.
+        """
+        key = (symbol, cls.fingerprint(close_series))
+        with cls._lock:
+            if key in cls._cache:
+                cls._cache.move_to_end(key)
+                return cls._cache[key]
+
+        regime_model = cls(close_series)
+
+        with cls._lock:
+            cls._cache[key] = regime_model
+            cls._cache.move_to_end(key)
+            while len(cls._cache) > REGIME_CACHE_SIZE:
+                cls._cache.popitem(last=False)
+        return regime_model
+
+    @classmethod
+    def clear_cache(cls):
+        with cls._lock:
+            cls._cache.clear()
+
+    def series(self) -> pd.Series:
+        """Regime label per return bar ("Bull" / "Neutral" / "Bear")."""
+        if len(self.log_returns) < 30:
+            return pd.Series(index=self.index[1:], data="Neutral")
+        if self.model is None:
+            return pd.Series(index=self.log_returns.index, data="Neutral")
+        regimes = pd.Series(self.hidden_states, index=self.log_returns.index)
+        return regimes.map(self.state_to_regime)
+
+    def label_today(self, window: int = 50, lambda_decay: float = 0.1) -> str:
+        """
+        Decay-weighted dominant regime over the last `window` closes,
+        excluding the latest (possibly partial) bar.
+        """
+        regime_series = self.series().iloc[-window:-1]
+        if regime_series.empty:
+            return "Neutral"
+
+        weights = defaultdict(float)
+        for t, r in enumerate(regime_series):
+            weight = np.exp(-lambda_decay * (len(regime_series) - 1 - t))
+            weights[r] += weight
+
+        return max(weights.items(), key=lambda x: x[1])[0]
+
+    def proba(self) -> dict:
+        """Posterior regime probabilities on the latest bar."""
+        if self.model is None:
+            return dict(NEUTRAL_PROBA)
+        last_probs = self.probs[-1]
+        return {self.state_to_regime[i]: float(last_probs[i]) for i in range(len(last_probs))}
 
-    state_means = model.means_.flatten()
-    sorted_states = np.argsort(state_means)
-    regime_map = {
-        sorted_states[2]: "Bull",
-        sorted_states[1]: "Neutral",
-        sorted_states[0]: "Bear"
-    }
 
-    regimes = pd.Series(hidden_states, index=log_returns.index)
-    return regimes.map(regime_map)
+def detect_regime(price_series: pd.Series, n_states: int = 3, lambda_decay: float = 0.1) -> pd.Series:
+    if n_states != 3:
+        return RegimeModel(price_series, n_states=n_states).series()
+    return RegimeModel.get(price_series).series()
 
 
-def get_regime_today(prices: pd.DataFrame, now: datetime, lambda_decay: float = 0.1) -> str:
+def get_regime_today(prices: pd.DataFrame, now: datetime, lambda_decay: float = 0.1, symbol: str = None) -> str:
     if "date" in prices.columns:
         prices["date"] = pd.to_datetime(prices["date"])
         prices = prices.set_index("date").sort_index()
@@ -114,51 +291,15 @@ def get_regime_today(prices: pd.DataFrame, now: datetime, lambda_decay: float =
     if "close" not in prices.columns or len(prices) < 51:
         return "Neutral"
 
-    close_series = prices["close"].iloc[-51:-1]
-    regime_series = detect_regime(close_series, lambda_decay=lambda_decay)
-    if regime_series.empty:
-        return "Neutral"
-
-    weights = defaultdict(float)
-    for t, r in enumerate(regime_series):
-        weight = np.exp(-lambda_decay * (len(regime_series) - 1 - t))
-        weights[r] += weight
-
-    return max(weights.items(), key=lambda x: x[1])[0]
+    return RegimeModel.get(prices["close"], symbol).label_today(lambda_decay=lambda_decay)
 
 
-def get_regime_proba(prices: pd.DataFrame, now: datetime, lambda_decay: float = 0.1) -> dict:
+def get_regime_proba(prices: pd.DataFrame, now: datetime, lambda_decay: float = 0.1, symbol: str = None) -> dict:
     if "date" in prices.columns:
         prices["date"] = pd.to_datetime(prices["date"])
         prices = prices.set_index("date").sort_index()
 
     if "close" not in prices.columns:
-        return {"Bull": 0.33, "Neutral": 0.34, "Bear": 0.33}
+        return dict(NEUTRAL_PROBA)
 
-    close_series = prices["close"]
-    log_returns = np.log(close_series / close_series.shift(1)).dropna()
-    log_returns = log_returns.replace([np.inf, -np.inf], np.nan).dropna()
-
-    if len(log_returns) < 30:
-        return {"Bull": 0.33, "Neutral": 0.34, "Bear": 0.33}
-
-    X = log_returns.values.reshape(-1, 1)
-
-    try:
-        model = GaussianHMM(n_components=3, covariance_type="full", n_iter=1000, random_state=42)
-        model.fit(X)
-        probs = model.predict_proba(X)
-    except Exception as e:
-        print(f"⚠️ HMM proba prediction failed: {e}")
-        return {"Bull": 0.33, "Neutral": 0.34, "Bear": 0.33}
-
-    last_probs = probs[-1]
-    state_means = model.means_.flatten()
-    sorted_states = np.argsort(state_means)
-    state_to_regime = {
-        sorted_states[2]: "Bull",
-        sorted_states[1]: "Neutral",
-        sorted_states[0]: "Bear"
-    }
-
-    return {state_to_regime[i]: float(last_probs[i]) for i in range(3)}
+    return RegimeModel.get(prices["close"], symbol).proba()
@@ -0,0 +1,394 @@
+# utils/state_journal.py
+"""
+Portfolio State Journal
+=======================
+
+Write-ahead log + checkpoint persistence for `portfolio_state.json`.
+
+Each save appends only the *changes* since the last save to
+`portfolio_state.wal.jsonl` (one fsynced JSON line per save). The full JSON
+file is rewritten as a checkpoint (temp file + atomic rename, previous
+checkpoint kept as `portfolio_state_backup.json`) every
+PORTFOLIO_WAL_CHECKPOINT_EVERY saves or PORTFOLIO_WAL_CHECKPOINT_SEC seconds,
+after which the WAL is truncated.
+
+Loading reads the checkpoint and replays the WAL, so a crash between
+checkpoints loses nothing that was saved. A torn last WAL line (crash
+mid-append) is ignored.
+
+A state file has a single owner process: only that process saves it (a
+checkpoint removes the WAL another writer might still be appending to).
+Other processes use `read_portfolio_state`.
+
+WAL line:
+    {"ts": <epoch>, "ops": [op, ...]}
+
+Ops (path = dict keys / list indexes from the state root):
+    {"op": "set", "path": [...], "value": ...}
+    {"op": "del", "path": [...]}
+    {"op": "extend", "path": [...], "at": n, "values": [...]}   # list cut to n items, then extended
+
+Dirty tracking: `load()` returns a JournaledState. Objects that own a
+top-level key (Portfolio → "assets", TradeManager → "trades",
+"monthly_trade_summary") claim it with `track(key)` and report each change
+with `mark_dirty(key, ...)`, so a save diffs only the marked subtrees of
+claimed keys. Unclaimed keys are small and written from many places; they
+are always diffed in full.
+
+Ops are idempotent and every save logs its diff *before* checkpointing, so a
+crash between the checkpoint rename and the WAL truncation just replays the
+full WAL over the new checkpoint: each path ends at its last logged value,
+which is the checkpointed one.
+"""
+
+import os
+import json
+import time
+import shutil
+from collections.abc import Mapping
+from typing import Dict, List
+
+PORTFOLIO_WAL_CHECKPOINT_EVERY = int(os.getenv("PORTFOLIO_WAL_CHECKPOINT_EVERY", 50))
+PORTFOLIO_WAL_CHECKPOINT_SEC = float(os.getenv("PORTFOLIO_WAL_CHECKPOINT_SEC", 300))
+
+WAL_SUFFIX = ".wal.jsonl"
+
+
+# === Diff / apply ===
+
+def _plain(value):
+    """json `default=` hook: non-dict mappings (e.g. a columnar PositionBook view) as dicts."""
+    if isinstance(value, Mapping):
+        return dict(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _dumps(value, **kwargs) -> str:
+    return json.dumps(value, default=_plain, **kwargs)
+
+
+def diff_state(old, new, path: list = None) -> List[dict]:
+    """
+    Ops that turn `old` into `new`. Mappings are diffed key by key; lists
+    item by item plus one "extend" for a length change (replaced outright
+    when most items differ); anything else is replaced.
+    """
+    path = path or []
+    if old == new:
+        return []
+
+    if isinstance(old, Mapping) and isinstance(new, Mapping):
+        ops = []
+        for key, value in new.items():
+            if key not in old:
+                ops.append({"op": "set", "path": path + [key], "value": value})
+            else:
+                ops.extend(diff_state(old[key], value, path + [key]))
+        for key in old:
+            if key not in new:
+                ops.append({"op": "del", "path": path + [key]})
+        return ops
+
+    if isinstance(old, list) and isinstance(new, list):
+        common = min(len(old), len(new))
+        changed = [i for i in range(common) if old[i] != new[i]]
+        if len(changed) <= common // 2:
+            ops = []
+            for i in changed:
+                ops.extend(diff_state(old[i], new[i], path + [i]))
+            if len(new) != len(old):
+                ops.append({"op": "extend", "path": path, "at": common, "values": new[common:]})
+            return ops
+
+    return [{"op": "set", "path": path, "value": new}]
+
+
+_MISSING = object()
+
+
+def _child(container, key):
+    if isinstance(container, Mapping):
+        return container.get(key, _MISSING)
+    if isinstance(container, list) and isinstance(key, int) and 0 <= key < len(container):
+        return container[key]
+    return _MISSING
+
+
+def _lookup(root, path):
+    for key in path:
+        root = _child(root, key)
+        if root is _MISSING:
+            break
+    return root
+
+
+def _diff_at(old, new, path: list) -> List[dict]:
+    """diff_state restricted to the subtree at `path` (widened to the parent if it changed shape)."""
+    while path:
+        old_parent, new_parent = _lookup(old, path[:-1]), _lookup(new, path[:-1])
+        if isinstance(old_parent, Mapping) and isinstance(new_parent, Mapping):
+            break
+        if (isinstance(old_parent, list) and isinstance(new_parent, list)
+                and len(old_parent) == len(new_parent) and _child(new_parent, path[-1]) is not _MISSING):
+            break
+        path = path[:-1]
+    if not path:
+        return diff_state(old, new)
+
+    old_value, new_value = _child(old_parent, path[-1]), _child(new_parent, path[-1])
+    if new_value is _MISSING:
+        return [] if old_value is _MISSING else [{"op": "del", "path": path}]
+    if old_value is _MISSING:
+        return [{"op": "set", "path": path, "value": new_value}]
+    return diff_state(old_value, new_value, path)
+
+
+def diff_paths(old, new, paths) -> List[dict]:
+    """
+    Ops that bring the subtrees at `paths` (tuples of keys / indexes) of
+    `old` in line with `new`. A path inside another listed path is skipped.
+    """
+    ops, done = [], set()
+    for path in sorted(paths, key=len):
+        if any(path[:n] in done for n in range(1, len(path))):
+            continue
+        done.add(path)
+        ops.extend(_diff_at(old, new, list(path)))
+    return ops
+
+
+def apply_ops(state: dict, ops: List[dict]) -> dict:
+    """Apply journal ops to `state` in place (and return it)."""
+    for op in ops:
+        keys = op["path"]
+        if not keys:
+            if op["op"] == "set":
+                state.clear()
+                state.update(op["value"])
+            continue
+
+        parent = state
+        for key in keys[:-1]:
+            parent = parent[key] if isinstance(parent, list) else parent.setdefault(key, {})
+        last = keys[-1]
+
+        if op["op"] == "set":
+            parent[last] = op["value"]
+        elif op["op"] == "del":
+            parent.pop(last, None)
+        elif op["op"] == "extend":
+            target = parent[last] if isinstance(parent, list) else parent.setdefault(last, [])
+            del target[op["at"]:]
+            target.extend(op["values"])
+    return state
+
+
+class JournaledState(dict):
+    """
+    portfolio_state as returned by PortfolioStateJournal.load(): a plain
+    dict that also collects change paths from the owners of its subtrees.
+
+    - track(key): the caller owns state[key] and reports every change below it
+    - mark_dirty(key, ...): the subtree at that path changed since the last save
+
+    Assigning or deleting a tracked key marks it dirty as a whole. Copies and
+    pickles are plain dicts.
+    """
+
+    __slots__ = ("tracked", "dirty")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.tracked = set()
+        self.dirty = set()
+
+    def __reduce__(self):
+        return dict, (dict(self),)
+
+    def track(self, key: str):
+        # Whatever the owner did before claiming the key is diffed once
+        self.tracked.add(key)
+        self.dirty.add((key,))
+
+    def mark_dirty(self, *path):
+        self.dirty.add(path)
+
+    def pop_dirty(self) -> set:
+        dirty, self.dirty = self.dirty, set()
+        return dirty
+
+    def _touch(self, key):
+        if key in self.tracked:
+            self.dirty.add((key,))
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._touch(key)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._touch(key)
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def pop(self, key, *default):
+        value = super().pop(key, *default)
+        self._touch(key)
+        return value
+
+    def popitem(self):
+        key, value = super().popitem()
+        self._touch(key)
+        return key, value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def clear(self):
+        super().clear()
+        self.dirty.update((key,) for key in self.tracked)
+
+
+# === Journal ===
+
+class PortfolioStateJournal:
+    """
+    WAL-backed persistence for one portfolio_state.json file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.wal_path = path[:-len(".json")] + WAL_SUFFIX if path.endswith(".json") else path + WAL_SUFFIX
+        self.backup_path = path[:-len(".json")] + "_backup.json" if path.endswith(".json") else path + ".bak"
+
+        self._base: Dict = None          # state as it would be recovered from disk
+        self._pending = 0                # WAL entries since the last checkpoint
+        self._last_checkpoint = time.time()
+
+    def load(self) -> Dict:
+        """
+        Read the checkpoint and replay the WAL.
+
+        Returns:
+            dict: recovered state (a fresh object owned by the caller)
+        """
+        with open(self.path, "r") as f:
+            state = json.load(f)
+
+        replayed = 0
+        if os.path.exists(self.wal_path):
+            with open(self.wal_path, "r") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        print(f"[⚠️] Ignoring torn WAL entry in {self.wal_path}")
+                        break
+                    apply_ops(state, entry.get("ops", []))
+                    replayed += 1
+        if replayed:
+            print(f"🔁 Replayed {replayed} WAL entries onto {self.path}")
+
+        self._base = json.loads(_dumps(state))
+        self._pending = replayed
+        self._last_checkpoint = time.time()
+        return JournaledState(state)
+
+    def _diff(self, state: Dict) -> List[dict]:
+        """
+        Ops since the last save: untracked top-level keys in full, tracked
+        keys only at their dirty paths.
+        """
+        if not isinstance(state, JournaledState) or not state.tracked:
+            return diff_state(self._base, state)
+
+        tracked = state.tracked
+        ops = [{"op": "del", "path": [key]} for key in self._base if key not in tracked and key not in state]
+        for key, value in state.items():
+            if key in tracked:
+                continue
+            if key not in self._base:
+                ops.append({"op": "set", "path": [key], "value": value})
+            else:
+                ops.extend(diff_state(self._base[key], value, [key]))
+        dirty = [path for path in state.pop_dirty() if path and path[0] in tracked]
+        return ops + diff_paths(self._base, state, dirty)
+
+    def save(self, state: Dict, force_checkpoint: bool = False) -> int:
+        """
+        Persist `state`: append its changes to the WAL, checkpointing when due.
+
+        Returns:
+            int: number of ops written (0 if nothing changed)
+        """
+        if self._base is None:
+            # Never loaded through the journal: start from a full checkpoint
+            self.checkpoint(state)
+            return 0
+
+        dirty = set(state.dirty) if isinstance(state, JournaledState) else None
+        ops = self._diff(state)
+        if ops:
+            line = _dumps({"ts": round(time.time(), 3), "ops": ops}) + "\n"
+            try:
+                with open(self.wal_path, "a") as f:
+                    f.write(line)
+                    f.flush()
+                    os.fsync(f.fileno())
+            except OSError:
+                if dirty:
+                    state.dirty.update(dirty)  # not journaled; diff these again next time
+                raise
+            # Advance the base through the serialized form, exactly as recovery would
+            apply_ops(self._base, json.loads(line)["ops"])
+            self._pending += 1
+
+        due = (
+            self._pending >= PORTFOLIO_WAL_CHECKPOINT_EVERY
+            or (self._pending and time.time() - self._last_checkpoint >= PORTFOLIO_WAL_CHECKPOINT_SEC)
+        )
+        if force_checkpoint or due:
+            self.checkpoint(state)
+        return len(ops)
+
+    def checkpoint(self, state: Dict):
+        """
+        Rewrite the full JSON file atomically and truncate the WAL.
+        """
+        if isinstance(state, JournaledState):
+            state.pop_dirty()  # the full file covers every change
+        text = _dumps(state, indent=2)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+
+        if os.path.exists(self.path):
+            shutil.copy(self.path, self.backup_path)
+        os.replace(tmp_path, self.path)
+
+        # Checkpoint is durable; the WAL entries it covers can go
+        if os.path.exists(self.wal_path):
+            os.remove(self.wal_path)
+
+        # Base from the text just written (no second serialization)
+        self._base = json.loads(text)
+        self._pending = 0
+        self._last_checkpoint = time.time()
+
+
+def read_portfolio_state(path: str) -> Dict:
+    """
+    Read-only recovery of a portfolio_state.json (checkpoint + WAL replay),
+    for processes that do not own the state.
+    """
+    return PortfolioStateJournal(path).load()
@@ -7,6 +7,7 @@ import streamlit as st
 import plotly.graph_objects as go
 import plotly.express as px
 from utils.asset_utils import get_asset_category
+from audit.audit_trail import rehydrate_record
 
 
 def render_portfolio_pie(asset_data):
@@ -162,6 +163,9 @@ def render_trade_audit(record: dict):
         st.error("❌ Incomplete audit record. Cannot render trade summary.")
         return
 
+    # Decision records carry a snapshot hash + delta; restore the full snapshot for export
+    record = rehydrate_record(record)
+
     intent = record.get("intent", {})
     approval = record.get("approval", {})
     signals = approval.get("signals", {})